@@ -0,0 +1,40 @@
+"""Model many datasets in one run, listed in a JSON manifest"""
+import argparse
+import os
+import sys
+# Ensure `src` is importable when running this script directly
+ROOT = os.path.dirname(__file__)
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from datamodeler import batch
+
+
+def _progress(r):
+    state = "cached" if r.get("cached") else r["status"]
+    detail = r.get("error") or f"{len(r.get('tables', []))} tables, {r.get('fks', 0)} FKs"
+    print(f"  {r['name']}: {state} in {r.get('seconds', 0):.2f}s ({detail})")
+
+
+def main(manifest, report, workers=None, warm_llm=True):
+    datasets = batch.load_manifest(manifest)
+    print(f"Running {len(datasets)} datasets from {manifest}")
+    result = batch.run_batch(datasets, workers=workers, warm_llm=warm_llm, progress=_progress)
+    batch.save_report(result, report)
+    t = result["totals"]
+    print(f"{t['succeeded']} succeeded ({t['cached']} from cache), {t['failed']} failed; "
+          f"{t['wall_seconds']:.2f}s wall, {t['cpu_seconds']:.2f}s CPU on {result['workers']} workers "
+          f"(utilization {t['utilization']})")
+    print(f"Saved report to: {report}")
+    return 1 if t["failed"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--manifest", required=True, help="JSON list of {input, output[, name, options]}")
+    parser.add_argument("--report", default=os.path.join("outputs", "batch_report.json"), help="Combined report")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-warm-llm", action="store_true", help="Don't load the LLM when workers start")
+    args = parser.parse_args()
+    sys.exit(main(args.manifest, args.report, workers=args.workers, warm_llm=not args.no_warm_llm))
@@ -0,0 +1,70 @@
+"""Benchmark every pipeline stage on synthetic schemas and compare to a baseline"""
+import argparse
+import os
+import sys
+# Ensure `src` is importable when running this script directly
+ROOT = os.path.dirname(__file__)
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from datamodeler import bench
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+
+def _fmt(metrics):
+    if metrics["peak_mb"] is None:
+        return f"{metrics['seconds']:.3f}s"
+    return f"{metrics['seconds']:.3f}s/{metrics['peak_mb']:.0f}MB"
+
+
+def main(suite, out, baseline, save_baseline=False, tolerance=0.5, fk_mode="exact", work_dir=None, memory=True,
+         repeat=3, startup=True):
+    specs = bench.SUITES[suite]
+    print(f"Running benchmark suite '{suite}' ({len(specs)} datasets)")
+    results = bench.run_benchmark(specs, work_dir=work_dir, fk_mode=fk_mode, memory=memory,
+                                  repeat=repeat, startup=startup)
+
+    for r in results["results"]:
+        stages = ", ".join(f"{k}={_fmt(v)}" for k, v in r["stages"].items())
+        print(f"{r['spec']['name']}: total {r['total_seconds']:.3f}s, "
+              f"FK recall {r['checks']['fk_recall']}\n  {stages}")
+    if "startup" in results:
+        stages = ", ".join(f"{k}={_fmt(v)}" for k, v in results["startup"]["stages"].items())
+        print(f"startup ({results['startup']['spec']['name']}):\n  {stages}")
+
+    bench.save_results(results, out)
+    print(f"Saved results to: {out}")
+
+    if save_baseline:
+        bench.save_results(results, baseline)
+        print(f"Saved baseline to: {baseline}")
+        return 0
+    if not os.path.exists(baseline):
+        print(f"No baseline at {baseline}; run with --save-baseline to create one")
+        return 0
+    problems = bench.compare(results, bench.load_results(baseline), tolerance=tolerance)
+    for p in problems:
+        print(f"REGRESSION: {p}")
+    if not problems:
+        print("No regressions against the baseline.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suite", default="default", choices=sorted(bench.SUITES), help="Datasets to run")
+    parser.add_argument("--out", default=os.path.join("benchmarks", "results.json"), help="Results file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown/memory growth (0.5 = 50%%)")
+    parser.add_argument("--fk-mode", default="exact", choices=["exact", "approx"], help="FK detection mode")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run that measures peak memory")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is kept)")
+    parser.add_argument("--no-startup", action="store_true", help="Skip the import and first-run latency measurements")
+    parser.add_argument("--work-dir", default=None, help="Keep the generated datasets here")
+    args = parser.parse_args()
+    sys.exit(main(args.suite, args.out, args.baseline, save_baseline=args.save_baseline,
+                  tolerance=args.tolerance, fk_mode=args.fk_mode, work_dir=args.work_dir,
+                  memory=not args.no_memory, repeat=args.repeat, startup=not args.no_startup))
@@ -12,19 +12,47 @@ if SRC not in sys.path:
 from datamodeler.langgraph_integration import run_datamodel_pipeline
 
 
-def main(samples_dir, out_dir):
+def main(samples_dir, out_dir, streaming=False, chunk_rows=None, workers=1, state_dir=None, profile_dir=None,
+         compact=False, erd_partition="auto", erd_neighborhoods=False, key_backend="memory",
+         sample_rows=None, sample_seed=0, confirm_keys=False):
     print(f"Running DataModel pipeline (LangGraph) on: {samples_dir}")
     
-    result = run_datamodel_pipeline(samples_dir, out_dir)
+    kwargs = {"streaming": streaming, "workers": workers, "state_dir": state_dir, "profile_dir": profile_dir,
+              "compact": compact, "erd_partition": erd_partition,
+              "erd_neighborhoods": erd_neighborhoods, "key_backend": key_backend,
+              "sample_rows": sample_rows, "sample_seed": sample_seed, "confirm_keys": confirm_keys}
+    if chunk_rows:
+        kwargs["chunk_rows"] = chunk_rows
+    result = run_datamodel_pipeline(samples_dir, out_dir, **kwargs)
     
     if result.get("error"):
         print(f"ERROR: {result['error']}")
         return
     
     print(f"Loaded tables: {list(result['tables'].keys())}")
+    for t, meta in result["profile"].items():
+        if "memory_bytes_saved" in meta:
+            print(f"Compacted {t}: {meta['memory_bytes']} bytes in memory, {meta['memory_bytes_saved']} saved")
+    for t, meta in result["profile"].items():
+        if "sample" in meta:
+            s = meta["sample"]
+            total = f"{s['total_rows']}" if s["exact_total"] else f"~{s['total_rows']}"
+            print(f"Sampled {t}: {s['rows']} of {total} rows ({s['method']})")
+    for t, pk in result.get("key_confidence", {}).items():
+        state = "confirmed" if pk["confirmed"] else f"confidence {pk['confidence']}"
+        print(f"PK {t}({', '.join(pk['columns'])}): {state}")
+    if result.get("incremental"):
+        print(f"Re-profiled tables: {result['incremental']['changed']}")
     print(f"Saved SQL to: {out_dir}/model.sql")
     print(f"Saved catalog to: {out_dir}/catalog.json")
     print(f"Generated ERD at: {result['erd_svg']}")
+    if result.get("erd_parts"):
+        print(f"ERD partitions: {len(result['erd_parts'])} diagrams in {os.path.join(out_dir, 'erd_parts')}")
+    print("\nNode timings:")
+    for node, m in result.get("metrics", {}).items():
+        print(f"  {node}: {m['wall_seconds']:.3f}s wall, {m['cpu_seconds']:.3f}s CPU, peak RSS {m['peak_rss_mb']:.0f}MB")
+    if profile_dir:
+        print(f"cProfile dumps in: {profile_dir}")
     print("\nPipeline completed successfully!")
 
 
@@ -32,5 +60,24 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--samples", default="samples", help="Samples input folder")
     parser.add_argument("--out", default="outputs", help="Output folder")
+    parser.add_argument("--streaming", action="store_true", help="Read inputs in chunks instead of loading them fully")
+    parser.add_argument("--chunk-rows", type=int, default=None, help="Rows per chunk in streaming mode")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for loading/profiling tables (0 = one per CPU)")
+    parser.add_argument("--state-dir", default=None, help="Keep state here and only reprocess changed inputs")
+    parser.add_argument("--erd-partition", default="auto", choices=["auto", "none", "component", "prefix"],
+                        help="Split large ERDs by FK component or table-name prefix")
+    parser.add_argument("--erd-neighborhoods", action="store_true", help="Also draw one ERD per fact table")
+    parser.add_argument("--key-backend", default="memory", choices=["memory", "sqlite"],
+                        help="Run PK/FK checks in memory or in an on-disk SQLite database")
+    parser.add_argument("--compact", action="store_true", help="Downcast dtypes after loading and report bytes saved")
+    parser.add_argument("--profile-dir", default=None, help="Dump a cProfile file per pipeline node here")
+    parser.add_argument("--sample-rows", type=int, default=None,
+                        help="Fast mode: profile and find keys on a sample of about N rows per table")
+    parser.add_argument("--sample-seed", type=int, default=0, help="Seed of the fast-mode samples")
+    parser.add_argument("--confirm-keys", action="store_true", help="In fast mode, check the chosen keys on full data")
     args = parser.parse_args()
-    main(args.samples, args.out)
+    main(args.samples, args.out, streaming=args.streaming, chunk_rows=args.chunk_rows, workers=args.workers,
+         state_dir=args.state_dir, profile_dir=args.profile_dir,
+         compact=args.compact, erd_partition=args.erd_partition,
+         erd_neighborhoods=args.erd_neighborhoods, key_backend=args.key_backend,
+         sample_rows=args.sample_rows, sample_seed=args.sample_seed, confirm_keys=args.confirm_keys)
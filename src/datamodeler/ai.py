@@ -1,40 +1,97 @@
 import os
-from typing import Optional
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
-def generate_column_description(name: str, series) -> str:
-    """Try to generate a description for a column using a local HF model if configured.
+from . import cache
+from .stats import ColumnStats
 
-    If no model is available, fallback to a heuristic description.
-    """
-    model_name = os.environ.get("LOCAL_LLM_MODEL")
-    sample = None
+# Process-wide text-generation pipelines, keyed by model name. A failed load is
+# remembered as None so we don't retry it for every column.
+_PIPELINES: Dict[str, object] = {}
+_PIPELINE_LOCK = threading.Lock()
+
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_MAX_NEW_TOKENS = 40
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
     try:
-        sample = series.dropna().astype(str).unique()[:5].tolist()
-    except Exception:
-        sample = None
+        return int(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
 
-    if model_name:
+def get_text_pipeline(model_name: Optional[str] = None):
+    """Return the shared text-generation pipeline, loading it on first use.
+
+    Returns None when no model is configured or it cannot be loaded.
+    """
+    model_name = model_name or os.environ.get("LOCAL_LLM_MODEL")
+    if not model_name:
+        return None
+    with _PIPELINE_LOCK:
+        if model_name in _PIPELINES:
+            return _PIPELINES[model_name]
+        pipe = None
         try:
             # Lazy import to avoid requiring transformers unless configured
             from transformers import pipeline
+            threads = _env_int("LOCAL_LLM_THREADS", None)
+            if threads:
+                try:
+                    import torch
+                    torch.set_num_threads(threads)
+                except Exception:
+                    pass
             pipe = pipeline("text-generation", model=model_name, device=-1)
-            prompt = f"Write a concise description (1 sentence) for a dataset column named '{name}'. Samples: {sample}\nDescription:"
-            out = pipe(prompt, max_length=80, do_sample=False)
-            text = out[0]["generated_text"]
-            # strip prompt
-            desc = text.split("Description:")[-1].strip()
-            return desc
+            tok = getattr(pipe, "tokenizer", None)
+            if tok is not None:
+                # batched generation needs a pad token and left padding for decoder-only models
+                if tok.pad_token_id is None:
+                    tok.pad_token_id = tok.eos_token_id
+                tok.padding_side = "left"
         except Exception:
-            pass
+            pipe = None
+        _PIPELINES[model_name] = pipe
+        return pipe
+
+
+def warm_up(model_name: Optional[str] = None) -> bool:
+    """Load the configured model and open its description cache now (e.g. at server startup).
+
+    Returns True if the model loaded.
+    """
+    if not (model_name or os.environ.get("LOCAL_LLM_MODEL")):
+        return False
+    cache.get_description_cache()
+    return get_text_pipeline(model_name) is not None
+
 
-    # Fallback heuristic
-    dtype = str(getattr(series, "dtype", "object"))
-    nunique = None
+def _sample_values(series) -> Optional[List[str]]:
+    try:
+        return series.dropna().astype(str).unique()[:5].tolist()
+    except Exception:
+        return None
+
+
+def _column_facts(column) -> Tuple[str, str, Optional[int], Optional[List[str]]]:
+    """(name, dtype, nunique, sample) from a ColumnStats or a `(name, series)` pair."""
+    if isinstance(column, ColumnStats):
+        return column.name, column.dtype, column.nunique, column.sample
+    name, series = column
     try:
         nunique = int(series.nunique(dropna=True))
     except Exception:
         nunique = None
+    return name, str(getattr(series, "dtype", "object")), nunique, _sample_values(series)
+
+
+def _prompt(name: str, sample) -> str:
+    return f"Write a concise description (1 sentence) for a dataset column named '{name}'. Samples: {sample}\nDescription:"
 
+
+def heuristic_description(name: str, dtype: str, nunique: Optional[int] = None, sample=None) -> str:
+    """Describe a column from its name, dtype and cardinality without a model."""
     if "id" in name.lower() or name.lower().endswith("_id"):
         return f"Identifier column; likely references another table (dtype={dtype})."
     if "date" in name.lower() or "time" in name.lower():
@@ -42,3 +99,62 @@ def generate_column_description(name: str, series) -> str:
     if nunique is not None and nunique <= 10:
         return f"Categorical column with {nunique} unique values (dtype={dtype})."
     return f"Column '{name}' of type {dtype}; sampled values: {sample[:5] if sample else 'N/A'}"
+
+
+def generate_column_descriptions(columns: Sequence[Union[ColumnStats, Tuple[str, object]]], batch_size: Optional[int] = None,
+                                 max_new_tokens: Optional[int] = None, use_cache: bool = True) -> List[str]:
+    """Describe many columns at once, running the model prompts in batches.
+
+    `columns` holds `ColumnStats` objects or `(name, series)` pairs, e.g. every
+    column of a table or of a whole dataset. Batch size and token budget default to
+    `LOCAL_LLM_BATCH_SIZE` / `LOCAL_LLM_MAX_NEW_TOKENS`; columns the model fails
+    on fall back to the heuristic description. Model output is cached on disk
+    (see `cache.DescriptionCache`) unless `use_cache` is False.
+    """
+    facts = [_column_facts(c) for c in columns]
+    results: List[Optional[str]] = [None] * len(columns)
+
+    model_name = os.environ.get("LOCAL_LLM_MODEL")
+    if model_name and columns:
+        # consult the persistent cache first; only misses load and reach the model
+        desc_cache = cache.get_description_cache() if use_cache else None
+        cache_keys = [cache.description_key(name, dtype, sample, model_name)
+                      for name, dtype, _, sample in facts]
+        if desc_cache is not None:
+            found = desc_cache.get_many(cache_keys)
+            results = [found.get(k) for k in cache_keys]
+        todo = [i for i, r in enumerate(results) if r is None]
+        pipe = get_text_pipeline(model_name) if todo else None
+        if pipe is None:
+            todo = []
+
+        batch_size = batch_size or _env_int("LOCAL_LLM_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        max_new_tokens = max_new_tokens or _env_int("LOCAL_LLM_MAX_NEW_TOKENS", DEFAULT_MAX_NEW_TOKENS)
+        generated = {}
+        for start in range(0, len(todo), batch_size):
+            idx = todo[start:start + batch_size]
+            chunk = [_prompt(facts[i][0], facts[i][3]) for i in idx]
+            try:
+                outs = pipe(chunk, batch_size=len(chunk), max_new_tokens=max_new_tokens,
+                            do_sample=False, return_full_text=False)
+            except Exception:
+                continue
+            for i, out in zip(idx, outs):
+                # a list input yields one list of candidates per prompt
+                cand = out[0] if isinstance(out, list) else out
+                text = cand.get("generated_text", "")
+                results[i] = text.split("Description:")[-1].strip() or None
+                if results[i] is not None:
+                    generated[cache_keys[i]] = results[i]
+        if desc_cache is not None:
+            desc_cache.put_many(generated)
+
+    return [r if r is not None else heuristic_description(*f) for r, f in zip(results, facts)]
+
+
+def generate_column_description(name: str, series) -> str:
+    """Try to generate a description for a column using a local HF model if configured.
+
+    If no model is available, fallback to a heuristic description.
+    """
+    return generate_column_descriptions([(name, series)])[0]
@@ -0,0 +1,192 @@
+"""Run the pipeline over many datasets with one shared worker pool.
+
+A manifest lists `{"input": ..., "output": ...}` pairs (optionally with a
+`name` and per-dataset `options`). Datasets are submitted largest first
+(longest-processing-time scheduling, which keeps the pool busy until the end)
+to a process pool whose workers import the pipeline and load the LLM once, in
+their initializer, and then run dataset after dataset. A dataset whose input
+files and options match a previous run is copied from the result cache
+(`cache.get_result_cache`) instead of being recomputed. `run_batch` returns a
+combined report of per-dataset status, timings and outputs.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from . import cache
+
+REPORT_VERSION = 1
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """Datasets from a JSON manifest: a list, or `{"options": {...}, "datasets": [...]}`.
+
+    Relative paths are resolved against the manifest's directory, and top-level
+    `options` are the defaults for every dataset's own `options`.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    defaults = {}
+    if isinstance(data, dict):
+        defaults = data.get("options") or {}
+        data = data.get("datasets") or []
+    base = os.path.dirname(os.path.abspath(path))
+    datasets = []
+    for i, entry in enumerate(data):
+        if "input" not in entry or "output" not in entry:
+            raise ValueError(f"Manifest entry {i} needs 'input' and 'output'")
+        input_path = os.path.join(base, entry["input"])
+        datasets.append({
+            "name": entry.get("name") or os.path.basename(os.path.normpath(input_path)),
+            "input": input_path,
+            "output": os.path.join(base, entry["output"]),
+            "options": dict(defaults, **(entry.get("options") or {})),
+        })
+    return datasets
+
+
+def estimate_size(input_path: str) -> int:
+    """Bytes of a dataset's input files, used as its priority."""
+    from .core import input_files
+    from .streaming import part_files
+
+    return sum(os.path.getsize(p) for path in input_files(input_path).values()
+               for p in part_files(path) if os.path.exists(p))
+
+
+def _file_digests(input_path: str, block: int = 1 << 20) -> Dict[str, str]:
+    from .core import input_files
+    from .streaming import part_files
+
+    digests = {}
+    for table_path in input_files(input_path).values():
+        for path in part_files(table_path):
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(block), b""):
+                    h.update(chunk)
+            # part files are keyed by their path within the input directory
+            digests[os.path.relpath(path, os.path.dirname(table_path))] = h.hexdigest()
+    return digests
+
+
+# per worker process, opened on first use
+_RESULT_CACHE: Dict[str, Optional[cache.ResultCache]] = {}
+
+
+def _result_cache() -> Optional[cache.ResultCache]:
+    if "cache" not in _RESULT_CACHE:
+        _RESULT_CACHE["cache"] = cache.get_result_cache()
+    return _RESULT_CACHE["cache"]
+
+
+def warm_worker(warm_llm: bool = True):
+    """Pool initializer: pay for imports, graph compilation and model loading once per worker."""
+    from .jobs import warm_worker as warm_pipeline
+
+    warm_pipeline(warm_llm)
+    _result_cache()
+
+
+def _copy_cached(files: List[List[str]], output_dir: str) -> List[List[str]]:
+    copied = []
+    for arcname, path in files:
+        dest = os.path.join(output_dir, arcname)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(path, dest)
+        copied.append([arcname, dest])
+    return copied
+
+
+def run_dataset(dataset: Dict) -> Dict:
+    """Worker entry point: run (or fetch from the cache) one dataset."""
+    from .jobs import run_pipeline_job
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    options = dataset.get("options") or {}
+    result_cache = _result_cache()
+    key = None
+    out = {"name": dataset["name"], "cached": False, "pid": os.getpid()}
+    try:
+        if result_cache is not None:
+            cache_options = dict({k: v for k, v in options.items() if k != "profile_dir"},
+                                 model=os.environ.get("LOCAL_LLM_MODEL"))
+            key = cache.result_key(_file_digests(dataset["input"]), cache_options)
+            summary = result_cache.get(key)
+            if summary is not None:
+                os.makedirs(dataset["output"], exist_ok=True)
+                summary["files"] = _copy_cached(summary["files"], dataset["output"])
+                out.update(summary, cached=True)
+        if not out["cached"]:
+            summary = run_pipeline_job(dataset["input"], dataset["output"], options)
+            if not summary.get("error") and result_cache is not None:
+                result_cache.put(key, summary["files"],
+                                 {k: v for k, v in summary.items() if k not in ("files", "metrics")})
+            out.update(summary)
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+    out["status"] = "failed" if out.get("error") else "succeeded"
+    out["seconds"] = round(time.perf_counter() - wall, 4)
+    out["cpu_seconds"] = round(time.process_time() - cpu, 4)
+    return out
+
+
+def run_batch(datasets: List[Dict], workers: Optional[int] = None, warm_llm: bool = True,
+              progress=None) -> Dict:
+    """Run every dataset on a shared pool of `workers` processes (default: CPU count).
+
+    `progress`, if given, is called with each dataset's result as it finishes.
+    """
+    workers = workers or os.cpu_count() or 1
+    pool_size = min(workers, max(1, len(datasets)))
+    start = time.perf_counter()
+    for d in datasets:
+        d.setdefault("estimated_bytes", estimate_size(d["input"]))
+    order = sorted(range(len(datasets)), key=lambda i: datasets[i]["estimated_bytes"], reverse=True)
+    results: List[Optional[Dict]] = [None] * len(datasets)
+    # spawn: workers start clean and warm themselves up in the initializer
+    with ProcessPoolExecutor(max_workers=pool_size, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=warm_worker, initargs=(warm_llm,)) as pool:
+        futures = {pool.submit(run_dataset, datasets[i]): i for i in order}
+        for future in as_completed(futures):
+            d = datasets[futures[future]]
+            try:
+                r = future.result()
+            except Exception as e:
+                # the worker itself died
+                r = {"name": d["name"], "status": "failed", "error": f"{type(e).__name__}: {e}"}
+            r.update(input=d["input"], output=d["output"], estimated_bytes=d["estimated_bytes"])
+            results[futures[future]] = r
+            if progress is not None:
+                progress(r)
+
+    wall = time.perf_counter() - start
+    cpu = sum(r.get("cpu_seconds", 0.0) for r in results)
+    return {
+        "version": REPORT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "workers": pool_size,
+        "datasets": results,
+        "totals": {
+            "datasets": len(results),
+            "succeeded": sum(1 for r in results if r["status"] == "succeeded"),
+            "failed": sum(1 for r in results if r["status"] == "failed"),
+            "cached": sum(1 for r in results if r.get("cached")),
+            "wall_seconds": round(wall, 4),
+            "dataset_seconds": round(sum(r.get("seconds", 0.0) for r in results), 4),
+            "cpu_seconds": round(cpu, 4),
+            # 1.0 means every worker was busy for the whole run
+            "utilization": round(cpu / (wall * pool_size), 4) if wall else None,
+        },
+    }
+
+
+def save_report(report: Dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
@@ -0,0 +1,272 @@
+"""Per-stage benchmark harness on synthetic schemas.
+
+`run_benchmark` writes each `SyntheticSpec` to disk and runs the pipeline
+stages one by one (`load_all_inputs`, `column_statistics`, `profile_tables`,
+`detect_primary_keys`, `detect_foreign_keys`, `build_sql`, `generate_erd`,
+`json_to_star`), recording wall time, CPU time and peak traced memory for
+each. `compare` flags stages that got slower or hungrier than a stored
+baseline, so a scaling regression shows up as soon as it lands.
+
+`run_startup` measures cold-start latency in fresh interpreters: how long
+importing the server and the pipeline takes, and how much slower the first
+pipeline run is than the second, with and without `warm_up`.
+"""
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from . import core
+from . import erd as erd_module
+from . import keys
+from . import synthetic
+from .synthetic import SyntheticSpec
+
+RESULTS_VERSION = 1
+
+# Suites grow one dimension at a time so the ratio between neighbours shows
+# how a stage scales (rows, tables/columns for the FK scan, topology, depth).
+SUITES: Dict[str, List[SyntheticSpec]] = {
+    "quick": [
+        SyntheticSpec(name="star-5x2k", tables=5, rows=2_000),
+        SyntheticSpec(name="chain-5x2k", tables=5, rows=2_000, topology="chain"),
+    ],
+    "default": [
+        SyntheticSpec(name="star-5x10k", tables=5, rows=10_000),
+        SyntheticSpec(name="star-5x40k", tables=5, rows=40_000),
+        SyntheticSpec(name="star-20x10k", tables=20, rows=10_000),
+        SyntheticSpec(name="snowflake-15x10k", tables=15, rows=10_000, topology="snowflake"),
+        SyntheticSpec(name="chain-10x10k", tables=10, rows=10_000, topology="chain"),
+        SyntheticSpec(name="wide-5x10k", tables=5, rows=10_000, columns=40),
+        SyntheticSpec(name="nested-depth4", tables=2, rows=1_000, json_rows=5_000, json_depth=4),
+    ],
+}
+
+
+def measure(fn: Callable, *args, memory: bool = True, repeat: int = 3,
+            **kwargs) -> Tuple[object, Dict[str, float]]:
+    """Run `fn` and return its result with wall/CPU seconds and peak MB.
+
+    Times are the best of `repeat` runs, which filters out most scheduler and
+    cache noise. Tracing allocations slows allocation-heavy code by an order of
+    magnitude, so with `memory=True` peak memory (Python-level allocations,
+    numpy and pandas buffers included) comes from one extra run under
+    `tracemalloc`.
+    """
+    best_wall = best_cpu = float("inf")
+    for _ in range(max(1, repeat)):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = fn(*args, **kwargs)
+        best_wall = min(best_wall, time.perf_counter() - wall)
+        best_cpu = min(best_cpu, time.process_time() - cpu)
+    metrics = {"seconds": round(best_wall, 4), "cpu_seconds": round(best_cpu, 4), "peak_mb": None}
+    if memory:
+        tracemalloc.start()
+        try:
+            fn(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        metrics["peak_mb"] = round(peak / 2 ** 20, 2)
+    return result, metrics
+
+
+def _erd_tables(profile: Dict[str, Dict], pks: Dict[str, object]) -> Dict[str, List[Dict]]:
+    return {t: [{"name": c["name"], "type": c["dtype"], "pk": c["name"] in keys.pk_columns(pks.get(t))}
+                for c in meta["columns"]]
+            for t, meta in profile.items()}
+
+
+def run_spec(spec: SyntheticSpec, work_dir: str, fk_mode: str = "exact", memory: bool = True,
+             repeat: int = 3) -> Dict:
+    """Generate one dataset and benchmark every stage on it."""
+    data_dir = os.path.join(work_dir, spec.name)
+    tables_dir, json_path = synthetic.write_dataset(spec, data_dir)
+    stages: Dict[str, Dict[str, float]] = {}
+    stage = functools.partial(measure, memory=memory, repeat=repeat)
+
+    tables, stages["load_all_inputs"] = stage(core.load_all_inputs, tables_dir)
+    column_stats, stages["column_statistics"] = stage(core.column_statistics, tables)
+    profile, stages["profile_tables"] = stage(core.profile_tables, tables, column_stats=column_stats)
+    pks, stages["detect_primary_keys"] = stage(core.detect_primary_keys, tables, column_stats=column_stats)
+    fks, stages["detect_foreign_keys"] = stage(core.detect_foreign_keys, tables, mode=fk_mode,
+                                               column_stats=column_stats)
+    _, stages["build_sql"] = stage(core.build_sql, tables, pks, fks, column_stats=column_stats)
+    # a fresh directory per call, otherwise unchanged diagrams are not re-rendered
+    _, stages["generate_erd"] = stage(lambda: erd_module.generate_erd(
+        _erd_tables(profile, pks), fks, os.path.join(tempfile.mkdtemp(dir=data_dir), "erd")))
+    star, stages["json_to_star"] = stage(core.json_to_star, json_path)
+
+    expected = set(synthetic.expected_fks(spec))
+    found = {(fk["child_table"], fk["parent_table"]) for fk in fks}
+    return {
+        "spec": spec.to_dict(),
+        "stages": stages,
+        "total_seconds": round(sum(s["seconds"] for s in stages.values()), 4),
+        "checks": {
+            "tables": len(tables),
+            "columns": sum(len(cols) for cols in column_stats.values()),
+            "pks_found": sum(1 for pk in pks.values() if pk),
+            "fks_expected": len(expected),
+            "fks_found": len(fks),
+            "fk_recall": round(len(expected & found) / len(expected), 4) if expected else 1.0,
+            "star_tables": len(star),
+        },
+    }
+
+
+# the directory holding the `datamodeler` package, for the fresh interpreters
+_SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_IMPORTS = ("datamodeler.mcp_server", "datamodeler.langgraph_integration")
+
+_IMPORT_CODE = """
+import json, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+_FIRST_RUN_CODE = """
+import json, sys, time
+data_dir, out_dir, warm = sys.argv[1], sys.argv[2], sys.argv[3] == "1"
+from datamodeler import langgraph_integration as lg
+timings = {}
+if warm:
+    start = time.perf_counter()
+    lg.warm_up()
+    timings["warm_up"] = time.perf_counter() - start
+for run in ("first_run", "second_run"):
+    start = time.perf_counter()
+    result = lg.run_datamodel_pipeline(data_dir, out_dir + "/" + run)
+    timings[run] = time.perf_counter() - start
+    if result.get("error"):
+        raise SystemExit(result["error"])
+print(json.dumps(timings))
+"""
+
+
+def _fresh_python(code: str, *args: str) -> Dict[str, float]:
+    """Run `code` in a new interpreter and return the timings it prints as JSON."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in (_SRC, os.environ.get("PYTHONPATH")) if p))
+    out = subprocess.run([sys.executable, "-c", code, *args], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_startup(spec: SyntheticSpec, work_dir: str, repeat: int = 3) -> Dict:
+    """Cold-start latency on `spec`'s tables, best of `repeat` fresh interpreters per measurement.
+
+    Stages are `import:<module>` for `STARTUP_IMPORTS` that are installed, then
+    `first_run` / `second_run` of the pipeline in one process, and `warm_up`
+    followed by `first_run_after_warm_up` in another.
+    """
+    tables_dir, _ = synthetic.write_dataset(spec, os.path.join(work_dir, "startup-" + spec.name))
+    best: Dict[str, float] = {}
+
+    def keep(name: str, seconds: float):
+        best[name] = min(best.get(name, float("inf")), seconds)
+
+    for _ in range(max(1, repeat)):
+        for module in STARTUP_IMPORTS:
+            try:
+                keep("import:" + module, _fresh_python(_IMPORT_CODE, module)["seconds"])
+            except subprocess.CalledProcessError:
+                continue  # e.g. the server's dependencies are not installed
+        cold = _fresh_python(_FIRST_RUN_CODE, tables_dir, tempfile.mkdtemp(dir=work_dir), "0")
+        keep("first_run", cold["first_run"])
+        keep("second_run", cold["second_run"])
+        warm = _fresh_python(_FIRST_RUN_CODE, tables_dir, tempfile.mkdtemp(dir=work_dir), "1")
+        keep("warm_up", warm["warm_up"])
+        keep("first_run_after_warm_up", warm["first_run"])
+    return {
+        "spec": spec.to_dict(),
+        "stages": {name: {"seconds": round(v, 4), "cpu_seconds": None, "peak_mb": None}
+                   for name, v in best.items()},
+    }
+
+
+def run_benchmark(specs: List[SyntheticSpec], work_dir: Optional[str] = None, fk_mode: str = "exact",
+                  memory: bool = True, repeat: int = 3, startup: bool = True) -> Dict:
+    """Benchmark every spec; datasets go to a temporary directory unless `work_dir` is given.
+
+    With `startup`, cold-start latency is measured on the first spec (see `run_startup`).
+    """
+    if work_dir is None:
+        with tempfile.TemporaryDirectory(prefix="datamodeler-bench-") as tmp:
+            return run_benchmark(specs, tmp, fk_mode, memory, repeat, startup)
+    results = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": platform.python_version(), "pandas": pd.__version__,
+                        "machine": platform.machine(), "cpus": os.cpu_count()},
+        "fk_mode": fk_mode,
+        "repeat": repeat,
+        "results": [run_spec(spec, work_dir, fk_mode, memory, repeat) for spec in specs],
+    }
+    if startup and specs:
+        results["startup"] = run_startup(specs[0], work_dir, repeat)
+    return results
+
+
+def _compare_stages(name: str, stages: Dict[str, Dict], ref_stages: Dict[str, Dict], tolerance: float,
+                    min_seconds: float) -> List[str]:
+    problems = []
+    for stage, now in stages.items():
+        was = ref_stages.get(stage)
+        if was is None:
+            continue
+        if max(now["seconds"], was["seconds"]) >= min_seconds \
+                and now["seconds"] > was["seconds"] * (1 + tolerance):
+            problems.append(f"{name}/{stage}: {now['seconds']:.3f}s vs baseline {was['seconds']:.3f}s")
+        if now["peak_mb"] is not None and was["peak_mb"] is not None \
+                and now["peak_mb"] > max(was["peak_mb"], 1.0) * (1 + tolerance):
+            problems.append(f"{name}/{stage}: peak {now['peak_mb']:.1f}MB vs baseline {was['peak_mb']:.1f}MB")
+    return problems
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.5, min_seconds: float = 0.05) -> List[str]:
+    """Regressions of `current` against `baseline`, one message each.
+
+    A stage regresses when its time or peak memory exceeds the baseline by more
+    than `tolerance` (0.5 = 50%). Stages faster than `min_seconds` in both runs
+    are too noisy to judge on time. Specs missing from the baseline are skipped.
+    Startup latencies are compared the same way when both runs measured them
+    on the same spec.
+    """
+    base = {r["spec"]["name"]: r for r in baseline.get("results", [])}
+    problems = []
+    for result in current.get("results", []):
+        name = result["spec"]["name"]
+        ref = base.get(name)
+        if ref is None:
+            continue
+        if ref["spec"] != result["spec"]:
+            problems.append(f"{name}: spec differs from the baseline; regenerate it")
+            continue
+        problems += _compare_stages(name, result["stages"], ref["stages"], tolerance, min_seconds)
+        if result["checks"]["fk_recall"] < ref["checks"]["fk_recall"]:
+            problems.append(f"{name}: FK recall {result['checks']['fk_recall']} "
+                            f"vs baseline {ref['checks']['fk_recall']}")
+    startup, ref = current.get("startup"), baseline.get("startup")
+    if startup and ref and startup["spec"] == ref["spec"]:
+        problems += _compare_stages("startup", startup["stages"], ref["stages"], tolerance, min_seconds)
+    return problems
+
+
+def load_results(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: Dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
@@ -0,0 +1,307 @@
+"""Persistent on-disk caches.
+
+`DescriptionCache` stores generated column descriptions in a single SQLite file,
+content-addressed by column name, dtype, a fingerprint of the sampled values and
+the model name. Entries are evicted least-recently-used once the stored bytes
+exceed a size budget.
+
+`ResultCache` keeps the output files of whole pipeline runs, keyed by a hash of
+the uploaded file contents and the pipeline options, under the same
+LRU-by-bytes policy.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "datamodeler")
+DEFAULT_DESCRIPTION_CACHE_MB = 64
+DEFAULT_RESULT_CACHE_MB = 512
+
+
+def cache_dir() -> Optional[str]:
+    """Cache root from `DATAMODELER_CACHE_DIR`; an empty value disables caching."""
+    path = os.environ.get("DATAMODELER_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return path or None
+
+
+def description_key(name: str, dtype: str, sample, model_name: str) -> str:
+    payload = json.dumps([name, dtype, sample, model_name], default=str, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def result_key(file_digests: Dict[str, str], options: Dict) -> str:
+    """Key for a pipeline run: per-file content digests (by name) plus options."""
+    payload = json.dumps([sorted(file_digests.items()), options], default=str, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DescriptionCache:
+    def __init__(self, path: str, max_bytes: int = DEFAULT_DESCRIPTION_CACHE_MB * 1024 * 1024):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS descriptions ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " accessed REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS descriptions_accessed ON descriptions(accessed)")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Look up several keys; hits get their access time refreshed for LRU."""
+        keys = list(keys)
+        found: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM descriptions WHERE key IN ({marks})", chunk).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE descriptions SET accessed=? WHERE key=?",
+                                       [(now, k) for k in found])
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, str]):
+        if not items:
+            return
+        now = time.time()
+        rows = [(k, v, len(k) + len(v.encode("utf-8")), now) for k, v in items.items()]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("INSERT OR REPLACE INTO descriptions VALUES (?, ?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+            self._evict()
+
+    def put(self, key: str, value: str):
+        self.put_many({key: value})
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._size_bytes()
+
+    def _size_bytes(self) -> int:
+        return int(self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM descriptions").fetchone()[0])
+
+    def _evict(self):
+        excess = self._size_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        victims: List[str] = []
+        for key, size in self._conn.execute("SELECT key, size FROM descriptions ORDER BY accessed"):
+            victims.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM descriptions WHERE key=?", [(k,) for k in victims])
+        self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = int(self._conn.execute("SELECT COUNT(*) FROM descriptions").fetchone()[0])
+            size = self._size_bytes()
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM descriptions")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _link_or_copy(src: str, dest: str) -> str:
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+    return dest
+
+
+class ResultCache:
+    """Output files of previous pipeline runs, one directory per key.
+
+    A SQLite index next to the entry directories records each entry's size,
+    summary and last access; the least recently used entries are deleted once
+    the total exceeds `max_bytes`.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_RESULT_CACHE_MB * 1024 * 1024):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, summary TEXT NOT NULL, size INTEGER NOT NULL,"
+            " accessed REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed)")
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get(self, key: str, dest: Optional[str] = None) -> Optional[Dict]:
+        """Return the stored summary, or None.
+
+        `files` point into the cache entry, which a later `put` may evict; with
+        `dest` the files are first hard-linked (or copied) there and point
+        into `dest` instead.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM results WHERE key=?", (key,)).fetchone()
+            summary = json.loads(row[0]) if row else None
+            if summary is not None:
+                summary["files"] = [[arc, os.path.join(self._entry_dir(key), arc)] for arc in summary["files"]]
+                if not all(os.path.exists(path) for _, path in summary["files"]):
+                    # entry directory lost behind the index's back
+                    self._conn.execute("DELETE FROM results WHERE key=?", (key,))
+                    summary = None
+            if summary is None:
+                self.misses += 1
+                return None
+            if dest is not None:
+                # under the lock, so no eviction removes the entry half-way
+                summary["files"] = [[arc, _link_or_copy(path, os.path.join(dest, arc))]
+                                    for arc, path in summary["files"]]
+            self._conn.execute("UPDATE results SET accessed=? WHERE key=?", (time.time(), key))
+            self.hits += 1
+        return summary
+
+    def put(self, key: str, files: List[List[str]], summary: Dict):
+        """Copy `[arcname, path]` files into the cache and record `summary` with them.
+
+        Files are copied into a private temporary directory that is moved into
+        place whole, so concurrent puts of the same key (threads or processes)
+        never see each other's partial copies.
+        """
+        entry = self._entry_dir(key)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            size = 0
+            for arcname, path in files:
+                dest = os.path.join(tmp, arcname)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                shutil.copyfile(path, dest)
+                size += os.path.getsize(path)
+            stored = dict(summary, files=[arcname for arcname, _ in files])
+            with self._lock:
+                shutil.rmtree(entry, ignore_errors=True)
+                try:
+                    os.replace(tmp, entry)
+                except OSError:
+                    # another process moved its complete copy in first
+                    if not os.path.isdir(entry):
+                        raise
+                self._conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                   (key, json.dumps(stored, default=str), size, time.time()))
+                self._evict()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _size_bytes(self) -> int:
+        return int(self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0])
+
+    def _evict(self):
+        excess = self._size_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        victims: List[str] = []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY accessed"):
+            victims.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM results WHERE key=?", [(k,) for k in victims])
+        for key in victims:
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+        self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = int(self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0])
+            size = self._size_bytes()
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        with self._lock:
+            keys = [k for (k,) in self._conn.execute("SELECT key FROM results")]
+            self._conn.execute("DELETE FROM results")
+            for key in keys:
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_DESCRIPTION_CACHE: Optional[DescriptionCache] = None
+_DESCRIPTION_CACHE_LOCK = threading.Lock()
+
+
+def get_description_cache() -> Optional[DescriptionCache]:
+    """Return the process-wide description cache, or None if caching is disabled."""
+    global _DESCRIPTION_CACHE
+    root = cache_dir()
+    if root is None:
+        return None
+    with _DESCRIPTION_CACHE_LOCK:
+        if _DESCRIPTION_CACHE is None:
+            try:
+                max_mb = float(os.environ.get("DATAMODELER_DESC_CACHE_MB", DEFAULT_DESCRIPTION_CACHE_MB))
+            except ValueError:
+                max_mb = DEFAULT_DESCRIPTION_CACHE_MB
+            try:
+                _DESCRIPTION_CACHE = DescriptionCache(os.path.join(root, "descriptions.sqlite"),
+                                                      max_bytes=int(max_mb * 1024 * 1024))
+            except (OSError, sqlite3.Error):
+                return None
+        return _DESCRIPTION_CACHE
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Build the pipeline result cache, or None if caching is disabled.
+
+    Sized by `DATAMODELER_RESULT_CACHE_MB`; `0` disables it.
+    """
+    root = cache_dir()
+    if root is None:
+        return None
+    try:
+        max_mb = float(os.environ.get("DATAMODELER_RESULT_CACHE_MB", DEFAULT_RESULT_CACHE_MB))
+    except ValueError:
+        max_mb = DEFAULT_RESULT_CACHE_MB
+    if max_mb <= 0:
+        return None
+    try:
+        return ResultCache(os.path.join(root, "results"), max_bytes=int(max_mb * 1024 * 1024))
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,203 @@
+"""Parquet / Arrow IPC / Feather inputs.
+
+Files are memory-mapped and read through pyarrow, only the requested columns are
+materialized, and Parquet footer statistics (row count, null counts, min/max)
+are exposed so profiling can skip work the metadata already answers.
+
+pyarrow is optional; it is imported on first use.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".ipc", ".feather")
+COLUMNAR_EXTENSIONS = PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Reading Parquet/Arrow inputs requires pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def is_columnar(path: str) -> bool:
+    return path.lower().endswith(COLUMNAR_EXTENSIONS)
+
+
+def is_parquet(path: str) -> bool:
+    return path.lower().endswith(PARQUET_EXTENSIONS)
+
+
+def read_table(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a columnar file (memory-mapped) into a DataFrame, optionally projected."""
+    pa = _pyarrow()
+    if is_parquet(path):
+        table = pa.parquet.read_table(path, columns=columns, memory_map=True)
+    else:
+        table = pa.feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def iter_batches(path: str, batch_rows: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of at most `batch_rows` rows, reading only `columns`."""
+    pa = _pyarrow()
+    if is_parquet(path):
+        pf = pa.parquet.ParquetFile(path, memory_map=True)
+        for batch in pf.iter_batches(batch_size=batch_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+    except pa.ArrowInvalid:
+        # Feather v1 is not an IPC file; read it (memory-mapped) and slice
+        table = pa.feather.read_table(path, columns=columns, memory_map=True)
+        for start in range(0, table.num_rows, batch_rows):
+            yield table.slice(start, batch_rows).to_pandas()
+        return
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        if columns is not None:
+            batch = batch.select(columns)
+        # slices of a memory-mapped batch are zero-copy until converted
+        for start in range(0, batch.num_rows, batch_rows):
+            yield batch.slice(start, batch_rows).to_pandas()
+
+
+def num_rows(path: str) -> int:
+    pa = _pyarrow()
+    if is_parquet(path):
+        return pa.parquet.ParquetFile(path, memory_map=True).metadata.num_rows
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        return pa.feather.read_table(path, memory_map=True).num_rows
+
+
+def take_rows(path: str, rows: np.ndarray, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """The rows at sorted positions `rows`; for Parquet only the row groups holding them are read."""
+    pa = _pyarrow()
+    if not is_parquet(path):
+        return pa.feather.read_table(path, columns=columns, memory_map=True).take(pa.array(rows)).to_pandas()
+    pf = pa.parquet.ParquetFile(path, memory_map=True)
+    starts = np.cumsum([0] + [pf.metadata.row_group(i).num_rows for i in range(pf.metadata.num_row_groups)])
+    group_of = np.searchsorted(starts, rows, side="right") - 1
+    pieces = []
+    for g in np.unique(group_of):
+        local = rows[group_of == g] - starts[g]
+        pieces.append(pf.read_row_group(int(g), columns=columns).take(pa.array(local)))
+    if not pieces:
+        return pf.schema_arrow.empty_table().to_pandas()
+    return pa.concat_tables(pieces).to_pandas()
+
+
+def schema(path: str):
+    pa = _pyarrow()
+    if is_parquet(path):
+        return pa.parquet.read_schema(path, memory_map=True)
+    try:
+        return pa.ipc.open_file(pa.memory_map(path, "r")).schema
+    except pa.ArrowInvalid:
+        return pa.feather.read_table(path, memory_map=True).schema
+
+
+def column_names(path: str) -> List[str]:
+    return list(schema(path).names)
+
+
+def pandas_dtype(path: str, column: str):
+    try:
+        return schema(path).field(column).type.to_pandas_dtype()
+    except (KeyError, NotImplementedError, TypeError):
+        return object
+
+
+@dataclass
+class ColumnFooterStats:
+    nulls: Optional[int] = None
+    min: Optional[object] = None
+    max: Optional[object] = None
+
+
+@dataclass
+class FileStats:
+    rows: int
+    columns: Dict[str, ColumnFooterStats] = field(default_factory=dict)
+
+
+def file_statistics(path: str) -> Optional[FileStats]:
+    """Row count plus per-column null counts and min/max from the Parquet footer.
+
+    A value is only reported when every row group carries it. Returns None for
+    non-Parquet files, which have no footer statistics.
+    """
+    if not is_parquet(path):
+        return None
+    pa = _pyarrow()
+    pf = pa.parquet.ParquetFile(path, memory_map=True)
+    md = pf.metadata
+    out = FileStats(rows=md.num_rows)
+    for f in pf.schema_arrow:
+        if pa.types.is_null(f.type):
+            # written without statistics, but null by type
+            out.columns[f.name] = ColumnFooterStats(nulls=md.num_rows)
+    for ci in range(md.num_columns):
+        path_in_schema = md.row_group(0).column(ci).path_in_schema if md.num_row_groups else None
+        # nested leaves ("a.b") don't map onto a top-level DataFrame column
+        if path_in_schema is None or "." in path_in_schema or path_in_schema in out.columns:
+            continue
+        nulls, lo, hi, bounded = 0, None, None, True
+        for rg in range(md.num_row_groups):
+            st = md.row_group(rg).column(ci).statistics
+            if st is None:
+                nulls, bounded = None, False
+                break
+            if nulls is not None:
+                nulls = nulls + st.null_count if st.has_null_count else None
+            if md.row_group(rg).num_rows <= (st.null_count or 0):
+                continue  # all-null row group: nothing to bound
+            if not st.has_min_max:
+                bounded = False
+                continue
+            lo = st.min if lo is None else min(lo, st.min)
+            hi = st.max if hi is None else max(hi, st.max)
+        if not bounded:
+            lo = hi = None
+        out.columns[path_in_schema] = ColumnFooterStats(nulls=nulls, min=lo, max=hi)
+    return out
+
+
+def table_statistics(paths: List[str]) -> Optional[FileStats]:
+    """`file_statistics` of several part files combined, or None unless all are Parquet.
+
+    A column missing from a part counts as null for that part's rows; a range is
+    only reported when every part that has values in the column bounds them.
+    """
+    if not paths or not all(is_parquet(p) for p in paths):
+        return None
+    parts = [file_statistics(p) for p in paths]
+    names: Dict[str, None] = {}
+    for part in parts:
+        names.update(dict.fromkeys(part.columns))
+    out = FileStats(rows=sum(part.rows for part in parts))
+    for c in names:
+        nulls, lo, hi, bounded = 0, None, None, True
+        for part in parts:
+            fs = part.columns.get(c, ColumnFooterStats(nulls=part.rows))
+            nulls = nulls + fs.nulls if nulls is not None and fs.nulls is not None else None
+            if fs.nulls == part.rows:
+                continue  # all null in this part
+            if fs.min is None or fs.max is None:
+                bounded = False
+                continue
+            lo = fs.min if lo is None else min(lo, fs.min)
+            hi = fs.max if hi is None else max(hi, fs.max)
+        out.columns[c] = ColumnFooterStats(nulls=nulls, min=lo if bounded else None, max=hi if bounded else None)
+    return out
@@ -0,0 +1,80 @@
+"""Memory-aware dtype compaction for loaded tables.
+
+`compact_frame` downcasts integers to the narrowest signed type, floats to
+float32 where that is lossless, low-cardinality strings to categoricals and
+other string columns to Arrow-backed strings (when pyarrow is installed). The
+per-column byte counts before and after are stored in
+`df.attrs["compaction"]`, where `stats.profile_table` picks them up.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CATEGORY_RATIO = 0.5
+
+
+def _arrow_string_dtype():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        # pandas' own "str" semantics (NaN for missing) where supported
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        return pd.StringDtype("pyarrow")
+
+
+def _is_string_column(s: pd.Series) -> bool:
+    if isinstance(s.dtype, pd.StringDtype):
+        return True
+    return s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) == "string"
+
+
+def compact_series(s: pd.Series, category_ratio: float = DEFAULT_CATEGORY_RATIO,
+                   string_dtype=None) -> pd.Series:
+    """Return `s` in the most compact dtype that keeps its values unchanged."""
+    if pd.api.types.is_bool_dtype(s.dtype) or isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    if pd.api.types.is_integer_dtype(s.dtype):
+        # signed only: unsigned dtypes would change how columns are typed in SQL
+        return pd.to_numeric(s, downcast="integer")
+    if pd.api.types.is_float_dtype(s.dtype):
+        if s.dtype == np.float64:
+            narrow = s.astype(np.float32)
+            both_nan = s.isna() & narrow.isna()
+            if ((narrow.astype(np.float64) == s) | both_nan).all():
+                return narrow
+        return s
+    if not _is_string_column(s):
+        return s
+    non_null = s.count()
+    if non_null and s.nunique(dropna=True) <= category_ratio * non_null:
+        return s.astype("category")
+    if string_dtype is not None and getattr(s.dtype, "storage", None) != "pyarrow":
+        return s.astype(string_dtype)
+    return s
+
+
+def compact_frame(df: pd.DataFrame, category_ratio: float = DEFAULT_CATEGORY_RATIO,
+                  arrow_strings: bool = True) -> Tuple[pd.DataFrame, Dict[str, Dict[str, int]]]:
+    """Compact every column of `df`.
+
+    Returns the new frame and `{column: {"before": bytes, "after": bytes}}`;
+    the same report is kept in the frame's `attrs["compaction"]`.
+    """
+    string_dtype = _arrow_string_dtype() if arrow_strings else None
+    out, report = {}, {}
+    for c in df.columns:
+        s = df[c]
+        before = int(s.memory_usage(index=False, deep=True))
+        out[c] = compact_series(s, category_ratio, string_dtype)
+        report[c] = {"before": before, "after": int(out[c].memory_usage(index=False, deep=True))}
+    compacted = pd.DataFrame(out, index=df.index)
+    compacted.attrs = dict(df.attrs, compaction=report)
+    return compacted, report
+
+
+def bytes_saved(report: Optional[Dict[str, Dict[str, int]]]) -> int:
+    return sum(r["before"] - r["after"] for r in (report or {}).values())
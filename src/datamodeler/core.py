@@ -1,140 +1,368 @@
 import os
 import json
-from typing import Dict, List, Tuple
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
 import pandas as pd
 from collections import defaultdict
 
 from .utils import guess_sql_type, normalize_name
-from .ai import generate_column_description
+from .ai import generate_column_descriptions
+from . import columnar
+from . import compact as compact_mod
+from . import keys
+from . import sampling
+from . import sqlkeys
+from . import sqltypes
+from . import star
+from . import stats
+from . import streaming as streaming_mod
+from .stats import ColumnStats
 
+INPUT_EXTENSIONS = streaming_mod.INPUT_EXTENSIONS
 
-def load_file(path: str) -> pd.DataFrame:
+
+def load_file(path: str, columns: Optional[List[str]] = None, compact: bool = False) -> pd.DataFrame:
+    """Read one input file; `compact=True` shrinks dtypes (see `compact.compact_frame`).
+
+    Parquet footer statistics are kept in `df.attrs["footer"]` for profiling.
+    """
+    df = _read_file(path, columns)
+    footer = columnar.table_statistics(streaming_mod.part_files(path))
+    if footer is not None:
+        df.attrs["footer"] = footer
+    if compact:
+        df, _ = compact_mod.compact_frame(df)
+    return df
+
+
+def _read_file(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    if os.path.isdir(path):
+        # a partitioned table: its part files, concatenated in name order
+        frames = [_read_file(part, columns) for part in streaming_mod.part_files(path)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    if columnar.is_columnar(path):
+        # memory-mapped, and only the requested columns are materialized
+        present = set(columnar.column_names(path)) if columns is not None else set()
+        if columns is not None and not set(columns) <= present:
+            # a part of a partitioned table that lacks some of the columns
+            return columnar.read_table(path, [c for c in columns if c in present]).reindex(columns=columns)
+        return columnar.read_table(path, columns=columns)
     if path.lower().endswith(".csv"):
-        return pd.read_csv(path)
+        return pd.read_csv(path, usecols=columns)
     if path.lower().endswith(".json"):
         # try to read as JSON lines or normal JSON
         try:
-            return pd.read_json(path, lines=True)
+            df = pd.read_json(path, lines=True)
         except ValueError:
-            return pd.read_json(path)
+            df = pd.read_json(path)
+        return df[columns] if columns is not None else df
     raise ValueError("Unsupported file type: " + path)
 
 
-def load_all_inputs(input_path: str) -> Dict[str, pd.DataFrame]:
-    tables = {}
-    if os.path.isdir(input_path):
-        for fname in os.listdir(input_path):
-            if fname.lower().endswith((".csv", ".json")):
-                full = os.path.join(input_path, fname)
-                key = normalize_name(os.path.splitext(fname)[0])
-                tables[key] = load_file(full)
-    else:
-        # single file
-        key = normalize_name(os.path.splitext(os.path.basename(input_path))[0])
-        tables[key] = load_file(input_path)
-    return tables
+def input_files(input_path: str) -> Dict[str, str]:
+    """`{table name: path}` for a single input file or the inputs in a directory.
 
+    A subdirectory holding input files (`orders/part-0001.csv`, ...) is one
+    partitioned table named after the subdirectory; see `streaming.part_files`.
+    """
+    if not os.path.isdir(input_path):
+        return {normalize_name(os.path.splitext(os.path.basename(input_path))[0]): input_path}
+    files = {}
+    for fname in sorted(os.listdir(input_path)):
+        path = os.path.join(input_path, fname)
+        if os.path.isdir(path):
+            # hidden and `_` directories are skipped as in `part_files`; top-level files never are
+            if not fname.startswith((".", "_")) and streaming_mod.part_files(path):
+                files[normalize_name(fname)] = path
+        elif fname.lower().endswith(INPUT_EXTENSIONS):
+            files[normalize_name(os.path.splitext(fname)[0])] = path
+    return files
 
-def profile_tables(tables: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
-    meta = {}
-    for name, df in tables.items():
-        cols = []
-        for c in df.columns:
-            s = df[c]
-            # handle unhashable values (dict/list) by stringifying for uniqueness/sample
-            try:
-                nunique = int(s.nunique(dropna=True))
-            except TypeError:
-                try:
-                    nunique = int(s.dropna().astype(str).nunique())
-                except Exception:
-                    nunique = None
 
-            try:
-                sample_vals = s.dropna().astype(str).unique()[:5].tolist()
-            except Exception:
-                sample_vals = []
+def load_all_inputs(input_path: str, streaming: bool = False,
+                    chunk_rows: int = streaming_mod.DEFAULT_CHUNK_ROWS,
+                    lazy: bool = False, compact: bool = False) -> Dict[str, pd.DataFrame]:
+    """Load every CSV/JSON/Parquet/Arrow input into a DataFrame.
+
+    With `streaming=True` nothing is read yet: each table is a lazy
+    `streaming.TableHandle` that later stages consume in `chunk_rows` pieces.
+    `lazy=True` also defers reading, but the table is loaded whole (typically in
+    a worker process, see `column_statistics`) and profiled exactly.
+    `compact=True` downcasts the dtypes of eagerly loaded tables.
+    """
+    def _load(path, key):
+        if streaming or lazy:
+            return streaming_mod.TableHandle(path, name=key, chunk_rows=chunk_rows, streaming=streaming)
+        return load_file(path, compact=compact)
+
+    return {key: _load(path, key) for key, path in input_files(input_path).items()}
+
+
+def _profile_table_job(name: str, table, compact: bool = False) -> Dict[str, ColumnStats]:
+    """Profile one table; runs in a worker process for lazy tables."""
+    if streaming_mod.is_lazy(table):
+        if table.streaming:
+            return streaming_mod.profile_handle(table)
+        # the DataFrame stays in the worker; only the statistics travel back.
+        # Columns the Parquet footer shows to be all null are not read.
+        footer = columnar.table_statistics(table.parts)
+        skip = {c for c, fs in footer.columns.items() if fs.nulls == footer.rows} if footer is not None else set()
+        if not skip:
+            return stats.profile_table(name, load_file(table.path, compact=compact))
+        out = stats.profile_table(name, load_file(table.path, [c for c in table.columns if c not in skip], compact))
+        return {c: out[c] if c in out else stats.null_column(name, c, footer.rows,
+                                                            columnar.pandas_dtype(table.parts[0], c))
+                for c in table.columns}
+    return stats.profile_table(name, table)
+
+
+def _is_sharded(table) -> bool:
+    return streaming_mod.is_lazy(table) and table.streaming and len(table.parts) > 1
+
+
+def column_statistics(tables: Dict[str, pd.DataFrame], workers: int = 1,
+                      compact: bool = False) -> Dict[str, Dict[str, ColumnStats]]:
+    """Profile every column once; lazy tables are scanned chunk by chunk.
+
+    With `workers` > 1 (or 0 for one per CPU) lazy tables are read and profiled in
+    a process pool, largest file first, and only their `ColumnStats` come back.
+    Streamed partitioned tables are profiled one part file per task and the
+    parts' statistics merged (`streaming.merge_profiles`). In-memory DataFrames
+    are profiled in this process, since shipping them to a worker would cost
+    more than profiling them.
+
+    `compact=True` compacts lazily loaded (non-streaming) tables before profiling;
+    categorical columns are then profiled from their codes.
+    """
+    workers = workers or os.cpu_count() or 1
+    remote = [t for t, table in tables.items() if streaming_mod.is_lazy(table)]
+    out = {}
+    tasks = sum(len(tables[t].parts) if _is_sharded(tables[t]) else 1 for t in remote)
+    if workers > 1 and tasks > 1:
+        # (table, part) units, largest first; part is None for a whole table
+        units = [(t, part, os.path.getsize(part)) for t in remote if _is_sharded(tables[t])
+                 for part in tables[t].parts]
+        units += [(t, None, tables[t].size_bytes()) for t in remote if not _is_sharded(tables[t])]
+        units.sort(key=lambda u: u[2], reverse=True)
+        with ProcessPoolExecutor(max_workers=min(workers, tasks)) as pool:
+            futures = {}
+            for t, part, _ in units:
+                if part is None:
+                    futures[(t, None)] = pool.submit(_profile_table_job, t, tables[t], compact)
+                else:
+                    seed = tables[t].parts.index(part)
+                    futures[(t, part)] = pool.submit(streaming_mod.profile_part, tables[t], part, seed=seed)
+            for t, table in tables.items():
+                if t not in remote:
+                    out[t] = _profile_table_job(t, table, compact)
+            for t in remote:
+                if _is_sharded(tables[t]):
+                    parts = [futures[(t, part)].result() for part in tables[t].parts]
+                    out[t] = {c: acc.finalize() for c, acc in streaming_mod.merge_profiles(parts).items()}
+                else:
+                    out[t] = futures[(t, None)].result()
+    else:
+        for t, table in tables.items():
+            out[t] = _profile_table_job(t, table, compact)
+    # keep the input table order regardless of completion order
+    return {t: out[t] for t in tables}
 
-            try:
-                description = generate_column_description(c, s)
-            except Exception:
-                description = None
 
+def profile_tables(tables: Dict[str, pd.DataFrame],
+                   column_stats: Optional[Dict[str, Dict[str, ColumnStats]]] = None) -> Dict[str, Dict]:
+    """Build per-table profile metadata.
+
+    `column_stats` (from `stats.profile_dataset`) lets callers share one column
+    scan with `build_sql` and `detect_foreign_keys`; it is computed when omitted.
+    """
+    if column_stats is None:
+        column_stats = column_statistics(tables)
+    meta = {}
+    for name, col_stats in column_stats.items():
+        cols = []
+        for c, st in col_stats.items():
             cols.append({
                 "name": c,
-                "dtype": str(s.dtype),
-                "nnulls": int(s.isna().sum()),
-                "nunique": nunique,
-                "sample": sample_vals,
-                "description": description
+                "dtype": st.dtype,
+                "nnulls": st.nnulls,
+                "nunique": st.nunique,
+                "sample": st.sample,
+                "description": None
             })
-        meta[name] = {"rows": len(df), "columns": cols}
+            if st.length_hist is not None:
+                cols[-1]["max_length"] = st.max_len
+                cols[-1]["length_histogram"] = st.length_hist
+        rows = next(iter(col_stats.values())).rows if col_stats else 0
+        meta[name] = {"rows": rows, "columns": cols}
+        table = tables.get(name)
+        if streaming_mod.is_lazy(table) and len(table.parts) > 1:
+            meta[name]["partitions"] = len(table.parts)
+        if any(st.memory_bytes is not None for st in col_stats.values()):
+            meta[name]["memory_bytes"] = sum(st.memory_bytes or 0 for st in col_stats.values())
+            meta[name]["memory_bytes_saved"] = sum(st.memory_saved or 0 for st in col_stats.values())
+
+    # describe every column of the dataset in one batched pass so the model is
+    # driven with full batches instead of one prompt per column
+    pending = [(name, col) for name, m in meta.items() for col in m["columns"]]
+    try:
+        descriptions = generate_column_descriptions([column_stats[name][col["name"]] for name, col in pending])
+    except Exception:
+        descriptions = [None] * len(pending)
+    for (_, col), description in zip(pending, descriptions):
+        col["description"] = description
     return meta
 
 
-def detect_primary_keys(tables: Dict[str, pd.DataFrame]) -> Dict[str, str]:
+def detect_primary_keys(tables: Dict[str, pd.DataFrame],
+                        column_stats: Optional[Dict[str, Dict[str, ColumnStats]]] = None,
+                        composite: bool = True, max_key_size: int = 4,
+                        store=None) -> Dict[str, object]:
+    """Pick the first unique, non-null column of each table.
+
+    With `column_stats` the check is made from the statistics; for approximate
+    (chunked) statistics a column counts as unique when its distinct estimate is
+    within the sketch's error of the row count.
+
+    Tables without such a column get a minimal composite key of up to
+    `max_key_size` columns (see `keys.discover_composite_keys`; without
+    `column_stats` only these tables are profiled), stored as a
+    tuple of column names; use `keys.pk_columns` to read either form. Only then
+    does the `_id` name guess apply.
+
+    With a `sqlkeys.KeyStore` holding the tables, uniqueness is decided from the
+    store's exact counts and composite keys are checked in the database.
+    """
+    if store is not None:
+        column_stats = _store_stats(store, tables, column_stats)
+    if column_stats is None and any(streaming_mod.is_lazy(t) for t in tables.values()):
+        column_stats = column_statistics(tables)
     pks = {}
     for t, df in tables.items():
-        for c in df.columns:
-            if df[c].is_unique and df[c].notna().all():
+        col_stats = (column_stats or {}).get(t)
+        columns = list(col_stats) if col_stats else list(df.columns)
+        for c in columns:
+            if col_stats:
+                st = col_stats[c]
+                unique = st.nnulls == 0 and st.nunique is not None and \
+                    st.nunique * (1 + st.nunique_error) >= st.rows
+            else:
+                unique = df[c].is_unique and df[c].notna().all()
+            if unique:
                 pks[t] = c
                 break
+        if t not in pks and composite:
+            if not col_stats:
+                # profiled only now: most tables have a single-column key
+                col_stats = column_statistics({t: df})[t]
+            if store is not None:
+                found = store.composite_keys(t, col_stats, max_size=max_key_size)
+            else:
+                found = keys.discover_composite_keys(df, col_stats, max_size=max_key_size)
+            if found:
+                pks[t] = found[0]
         # fallback heuristics
         if t not in pks:
-            for c in df.columns:
+            for c in columns:
                 if c.lower() == "id" or c.lower().endswith("_id"):
                     pks[t] = c
                     break
     return pks
 
 
-def detect_foreign_keys(tables: Dict[str, pd.DataFrame]) -> List[Dict]:
-    # naive detection: if child column values are subset of parent column values
-    fks = []
-    names = list(tables.keys())
-    for i, child_name in enumerate(names):
-        child = tables[child_name]
-        for col in child.columns:
-            if child[col].isnull().all():
-                continue
-            child_vals = set(child[col].dropna().astype(str).unique())
-            for parent_name in names:
-                if parent_name == child_name:
-                    continue
-                parent = tables[parent_name]
-                for pcol in parent.columns:
-                    parent_vals = set(parent[pcol].dropna().astype(str).unique())
-                    if not parent_vals:
-                        continue
-                    # ratio of child values found in parent
-                    matched = sum(1 for v in child_vals if v in parent_vals)
-                    if matched == 0:
-                        continue
-                    ratio = matched / max(1, len(child_vals))
-                    # heuristic thresholds
-                    if ratio > 0.6 and len(parent_vals) <= len(parent):
-                        fks.append({
-                            "child_table": child_name,
-                            "child_col": col,
-                            "parent_table": parent_name,
-                            "parent_col": pcol,
-                            "match_ratio": ratio
-                        })
-    return fks
-
-
-def build_sql(tables: Dict[str, pd.DataFrame], pks: Dict[str, str], fks: List[Dict]) -> str:
+def detect_foreign_keys(tables: Dict[str, pd.DataFrame], min_ratio: float = 0.6,
+                        parent_uniqueness: float = 0.95, mode: str = "exact",
+                        sketch_size: int = 1024, bloom_bits: int = 1 << 23,
+                        verify_top: int = 0,
+                        column_stats: Optional[Dict[str, Dict[str, ColumnStats]]] = None,
+                        restrict_to: Optional[Set[str]] = None, store=None) -> List[Dict]:
+    """Detect child -> parent column references by value containment.
+
+    Each column is profiled once (or `column_stats` is reused); candidate pairs
+    are pruned on dtype, cardinality, parent uniqueness and value range before the
+    containment ratio is computed.
+
+    `mode="approx"` scores candidates from fixed-size sketches (a KMV sample per
+    column, a Bloom filter per parent candidate) and adds `estimated_ratio` and
+    `error_bound` to each result; the top `verify_top` candidates per child column
+    are then confirmed exactly. Lazy tables use this mode unless `column_stats`
+    holds exact (non-chunked) statistics for them.
+
+    `restrict_to` limits the search to pairs with a child or parent in that set of
+    tables (used by incremental runs to re-check only changed tables).
+
+    `mode="sql"` runs the containment checks as anti-joins in a
+    `sqlkeys.KeyStore` (`store`, or a temporary one loaded from `tables`), for
+    tables whose distinct values don't fit in memory; results are exact.
+
+    `mode="sample"` estimates containment from sampled `column_stats` (see
+    `sampling.profile_samples`) and adds a `confidence` to each result.
+    """
+    if mode == "sample":
+        if column_stats is None:
+            raise ValueError("mode='sample' needs sampled column_stats (see sampling.profile_samples)")
+        return sampling.discover_foreign_keys(column_stats, min_ratio=min_ratio, parent_uniqueness=parent_uniqueness,
+                                              restrict_to=restrict_to)
+    if mode == "sql":
+        if store is None:
+            with tempfile.TemporaryDirectory(prefix="datamodeler-keys-") as tmp:
+                store = sqlkeys.KeyStore(os.path.join(tmp, "keys.sqlite"))
+                try:
+                    store.load_all(tables)
+                    return detect_foreign_keys(tables, min_ratio, parent_uniqueness, mode, column_stats=column_stats,
+                                               restrict_to=restrict_to, store=store)
+                finally:
+                    store.close()
+        return store.discover_foreign_keys(_store_stats(store, tables, column_stats), min_ratio=min_ratio,
+                                           parent_uniqueness=parent_uniqueness, restrict_to=restrict_to)
+    if any(streaming_mod.is_lazy(t) for t in tables.values()) and \
+            (column_stats is None or any(st.kmv is not None for cols in column_stats.values() for st in cols.values())):
+        mode = "approx"
+    if mode == "approx":
+        index = keys.build_column_sketches(tables, k=sketch_size, bloom_bits=bloom_bits,
+                                           parent_uniqueness=parent_uniqueness,
+                                           column_stats=column_stats)
+        return keys.discover_foreign_keys_approx(index, min_ratio=min_ratio,
+                                                 parent_uniqueness=parent_uniqueness,
+                                                 verify_top=verify_top, tables=tables,
+                                                 restrict_to=restrict_to)
+    if mode != "exact":
+        raise ValueError("Unsupported FK detection mode: " + mode)
+    if column_stats is None:
+        column_stats = stats.profile_dataset(tables)
+    return keys.discover_foreign_keys(column_stats, min_ratio=min_ratio, parent_uniqueness=parent_uniqueness,
+                                      restrict_to=restrict_to)
+
+
+def _store_stats(store, tables, column_stats):
+    """The store's exact counts, in `tables` order, typed from `column_stats`."""
+    counted = store.column_stats(column_stats)
+    return {t: counted[t] for t in tables if t in counted}
+
+
+def build_sql(tables: Dict[str, pd.DataFrame], pks: Dict[str, object], fks: List[Dict],
+              column_stats: Optional[Dict[str, Dict[str, ColumnStats]]] = None) -> str:
+    if column_stats is None and any(streaming_mod.is_lazy(t) for t in tables.values()):
+        column_stats = column_statistics(tables)
     statements = []
     for tname, df in tables.items():
         lines = [f"CREATE TABLE {tname} ("]
         col_lines = []
-        for c in df.columns:
-            dtype = guess_sql_type(df[c].dtype, sample_values=df[c].dropna().astype(str).head(50).tolist())
+        col_stats = (column_stats or {}).get(tname)
+        for c in (list(col_stats) if col_stats else df.columns):
+            st = col_stats.get(c) if col_stats else None
+            if st is not None:
+                dtype = guess_sql_type(st.dtype, max_length=st.max_len, types=st.types)
+            else:
+                col = df[c].dropna()
+                lengths = col.astype(str).str.len()
+                dtype = guess_sql_type(col.dtype, max_length=int(lengths.max()) if len(lengths) else None,
+                                       types=sqltypes.profile_values(col))
             col_lines.append(f"  {c} {dtype}")
         # primary key
-        pk = pks.get(tname)
+        pk = keys.pk_columns(pks.get(tname))
         if pk:
-            col_lines.append(f"  ,PRIMARY KEY ({pk})")
+            col_lines.append(f"  ,PRIMARY KEY ({', '.join(pk)})")
         lines.append(",\n".join(col_lines)
         )
         lines.append(");")
@@ -148,7 +376,14 @@ def build_sql(tables: Dict[str, pd.DataFrame], pks: Dict[str, str], fks: List[Di
     return "\n\n".join(statements)
 
 
-def build_catalog(profile_meta: Dict[str, Dict]) -> Dict:
+def build_catalog(profile_meta: Dict[str, Dict], sampling_info: Optional[Dict] = None) -> Dict:
+    """Catalog of tables and columns from `profile_tables` output.
+
+    For sampled runs `sampling_info` holds the sampling settings plus the
+    chosen keys and their confidence (`primary_keys`: {table: {...}},
+    `foreign_keys`: [...]); each table then records its `sample` and
+    `primary_key`.
+    """
     catalog = {"tables": {}}
     for t, m in profile_meta.items():
         catalog["tables"][t] = {
@@ -158,9 +393,19 @@ def build_catalog(profile_meta: Dict[str, Dict]) -> Dict:
                 "dtype": c["dtype"],
                 "nnulls": c["nnulls"],
                 "nunique": c["nunique"],
-                "description": c.get("description")
+                "description": c.get("description"),
+                **{k: c[k] for k in ("max_length", "length_histogram") if k in c}
             } for c in m.get("columns", [])]
         }
+        for key in ("partitions", "memory_bytes", "memory_bytes_saved", "sample"):
+            if key in m:
+                catalog["tables"][t][key] = m[key]
+    if sampling_info is not None:
+        catalog["sampling"] = {k: v for k, v in sampling_info.items() if k not in ("primary_keys", "foreign_keys")}
+        for t, pk in (sampling_info.get("primary_keys") or {}).items():
+            if t in catalog["tables"]:
+                catalog["tables"][t]["primary_key"] = pk
+        catalog["foreign_keys"] = sampling_info.get("foreign_keys") or []
     return catalog
 
 
@@ -170,20 +415,14 @@ def save_sql(sql: str, out_file: str):
         f.write(sql)
 
 
-def json_to_star(path: str) -> Dict[str, pd.DataFrame]:
-    """Convert a JSON document (possibly nested) into a simple star schema.
+def json_to_star(path: str, max_depth: Optional[int] = None,
+                 chunk_rows: int = streaming_mod.DEFAULT_CHUNK_ROWS) -> Dict[str, pd.DataFrame]:
+    """Convert a JSON document (possibly nested) into a star schema.
 
-    This is a basic flattening: top-level objects become fact table; arrays/nested objects become dimensions.
+    Records are streamed: top-level scalars become the `fact` table, nested
+    objects and arrays become deduplicated dimensions (recursively) keyed by
+    hashed surrogate keys, with `<dim>_key` columns in the parent and
+    `<dim>_bridge` tables for arrays. Nesting below `max_depth` is kept as
+    JSON text. See `datamodeler.star`.
     """
-    df = pd.read_json(path, lines=True)
-    # naive approach: explode nested lists into new tables
-    tables = {"fact": df.copy()}
-    for col in df.columns:
-        if df[col].apply(lambda x: isinstance(x, list)).any():
-            exploded = df[[col]].explode(col).dropna()
-            exploded = pd.DataFrame(exploded[col].tolist())
-            name = normalize_name(col)
-            tables[name] = exploded
-            # drop from fact
-            tables["fact"] = tables["fact"].drop(columns=[col])
-    return tables
+    return star.json_to_star(path, max_depth=max_depth, chunk_rows=chunk_rows)
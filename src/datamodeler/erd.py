@@ -1,39 +1,215 @@
+"""ERD rendering with Graphviz.
+
+Small schemas get one diagram. Larger ones (more than `max_tables` tables) are
+split into partitions, either connected components of the FK graph packed
+together up to `max_tables` tables or subject areas taken from the table name
+prefix, and the main diagram becomes an overview with one node per partition.
+Each fact table (a table referencing two or more others) can also get its own
+neighborhood diagram.
+
+Every diagram's DOT source is written next to its SVG; a diagram whose source
+is unchanged since the last render is not rendered again, and the remaining
+ones are rendered in parallel (`dot` runs as a subprocess, so threads suffice).
+"""
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
 from graphviz import Digraph
 from graphviz.backend.execute import ExecutableNotFound
-from typing import Dict, List
 
-def generate_erd(tables: Dict[str, List[Dict]], fks: List[Dict], out_path: str):
-    """Generate an ERD diagram using Graphviz.
+DEFAULT_MAX_TABLES = 60
+PARTITION_MODES = ("auto", "none", "component", "prefix")
+# first line of the SVG written when `dot` is missing
+PLACEHOLDER = "<!-- Graphviz 'dot' executable not found. DOT source saved alongside. -->\n"
 
-    - tables: {table_name: [{name, type, pk(bool)}]}
-    - fks: list of {child_table, child_col, parent_table, parent_col}
-    """
-    g = Digraph("erd", format="svg")
+
+def _table_label(tname: str, cols: List[Dict]) -> str:
+    label_lines = [f"<b>{tname}</b>"]
+    label_lines.append("<TABLE BORDER='0' CELLBORDER='1' CELLSPACING='0'>")
+    for c in cols:
+        pk = " (PK)" if c.get("pk") else ""
+        label_lines.append(f"<TR><TD ALIGN='LEFT'>{c['name']}{pk}: {c.get('type','')}</TD></TR>")
+    label_lines.append("</TABLE>")
+    return "\n".join(label_lines)
+
+
+def build_graph(tables: Dict[str, List[Dict]], fks: List[Dict], name: str = "erd") -> Digraph:
+    """Diagram of `tables` and the FKs between them (FKs to other tables are left out)."""
+    g = Digraph(name, format="svg")
     g.attr(rankdir="LR")
 
     for tname, cols in tables.items():
-        label_lines = [f"<b>{tname}</b>"]
-        label_lines.append("<TABLE BORDER='0' CELLBORDER='1' CELLSPACING='0'>")
-        for c in cols:
-            pk = " (PK)" if c.get("pk") else ""
-            label_lines.append(f"<TR><TD ALIGN='LEFT'>{c['name']}{pk}: {c.get('type','')}</TD></TR>")
-        label_lines.append("</TABLE>")
-        label = "\n".join(label_lines)
-        g.node(tname, label=f"<<{label}>>", shape="plain")
+        g.node(tname, label=f"<<{_table_label(tname, cols)}>>", shape="plain")
+
+    for fk in fks:
+        if fk["child_table"] in tables and fk["parent_table"] in tables:
+            g.edge(fk["child_table"], fk["parent_table"], label=f"{fk['child_col']} -> {fk['parent_col']}")
+    return g
+
+
+def connected_components(tables: List[str], fks: List[Dict]) -> List[List[str]]:
+    """Tables grouped by FK connectivity, largest group first."""
+    parent = {t: t for t in tables}
+
+    def find(t):
+        while parent[t] != t:
+            parent[t] = parent[parent[t]]
+            t = parent[t]
+        return t
+
+    for fk in fks:
+        a, b = fk["child_table"], fk["parent_table"]
+        if a in parent and b in parent:
+            parent[find(a)] = find(b)
+    groups: Dict[str, List[str]] = {}
+    for t in tables:
+        groups.setdefault(find(t), []).append(t)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def partition_tables(tables: List[str], fks: List[Dict], mode: str = "component",
+                     max_tables: int = DEFAULT_MAX_TABLES) -> Dict[str, List[str]]:
+    """Split tables into named partitions.
 
+    `component`: connected components, small ones packed together (first fit)
+    up to `max_tables`; a component larger than that stays whole, since
+    splitting it would cut FK edges. `prefix`: subject areas named after the
+    part of the table name before the first underscore.
+    """
+    if mode == "prefix":
+        areas: Dict[str, List[str]] = {}
+        for t in tables:
+            areas.setdefault(t.split("_", 1)[0], []).append(t)
+        return areas
+    if mode != "component":
+        raise ValueError("Unsupported ERD partition mode: " + mode)
+    bins: List[List[str]] = []
+    for comp in connected_components(tables, fks):
+        for b in bins:
+            if len(b) + len(comp) <= max_tables:
+                b.extend(comp)
+                break
+        else:
+            bins.append(list(comp))
+    return {f"part_{i + 1:03d}": sorted(b) for i, b in enumerate(bins)}
+
+
+def fact_neighborhoods(tables: List[str], fks: List[Dict], depth: int = 1) -> Dict[str, List[str]]:
+    """Each fact table (FKs to two or more parents) with the tables it reaches within `depth` hops."""
+    parents: Dict[str, set] = {}
     for fk in fks:
-        g.edge(fk["child_table"], fk["parent_table"], label=f"{fk['child_col']} -> {fk['parent_col']}")
+        if fk["child_table"] != fk["parent_table"]:
+            parents.setdefault(fk["child_table"], set()).add(fk["parent_table"])
+    out = {}
+    for fact in tables:
+        if len(parents.get(fact, ())) < 2:
+            continue
+        seen, frontier = [fact], [fact]
+        for _ in range(depth):
+            frontier = [p for t in frontier for p in sorted(parents.get(t, ())) if p not in seen]
+            seen.extend(dict.fromkeys(frontier))
+        out[fact] = seen
+    return out
+
+
+def overview_graph(partitions: Dict[str, List[str]], fks: List[Dict], name: str = "erd") -> Digraph:
+    """One node per partition, with edges counting the FKs between partitions."""
+    where = {t: p for p, ts in partitions.items() for t in ts}
+    g = Digraph(name, format="svg")
+    g.attr(rankdir="LR")
+    for p, ts in partitions.items():
+        shown = ", ".join(ts[:8]) + (", ..." if len(ts) > 8 else "")
+        g.node(p, label=f"{p} ({len(ts)} tables)\n{shown}", shape="box")
+    links: Dict[Tuple[str, str], int] = {}
+    for fk in fks:
+        a, b = where.get(fk["child_table"]), where.get(fk["parent_table"])
+        if a and b and a != b:
+            links[(a, b)] = links.get((a, b), 0) + 1
+    for (a, b), n in sorted(links.items()):
+        g.edge(a, b, label=f"{n} FK" + ("s" if n > 1 else ""))
+    return g
+
+
+def _is_current(out_path: str, digest: str) -> bool:
+    gv_path, svg_path = out_path + ".gv", out_path + ".svg"
+    if not (os.path.exists(gv_path) and os.path.exists(svg_path)):
+        return False
+    with open(svg_path, "r", encoding="utf-8", errors="replace") as f:
+        if f.readline() == PLACEHOLDER:
+            return False
+    with open(gv_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest() == digest
 
+
+def render(g: Digraph, out_path: str) -> bool:
+    """Write `<out_path>.gv` and `<out_path>.svg`; returns False when the source was unchanged."""
+    source = g.source.encode("utf-8")
+    if _is_current(out_path, hashlib.sha256(source).hexdigest()):
+        return False
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    svg_path = out_path + ".svg"
     try:
-        g.render(out_path, cleanup=True)
+        svg = g.pipe(format="svg")
     except ExecutableNotFound:
-        # Graphviz `dot` not available on PATH. Save DOT source as fallback.
-        gv_path = out_path + ".gv"
-        with open(gv_path, "w", encoding="utf-8") as f:
-            f.write(g.source)
-        # Also save an SVG-like placeholder text to inform the user
-        svg_path = out_path + ".svg"
-        with open(svg_path, "w", encoding="utf-8") as f:
-            f.write("<!-- Graphviz 'dot' executable not found. DOT source saved alongside. -->\n")
-            f.write("<!-- DOT file: {} -->\n".format(gv_path))
-        return
+        # Graphviz `dot` not available on PATH; leave a placeholder pointing at the DOT file
+        svg = (PLACEHOLDER + "<!-- DOT file: {} -->\n".format(out_path + ".gv")).encode("utf-8")
+    with open(svg_path, "wb") as f:
+        f.write(svg)
+    # written last, so an interrupted render is redone next time
+    with open(out_path + ".gv", "wb") as f:
+        f.write(source)
+    return True
+
+
+def generate_erd(tables: Dict[str, List[Dict]], fks: List[Dict], out_path: str,
+                 partition: str = "auto", neighborhoods: bool = False,
+                 max_tables: int = DEFAULT_MAX_TABLES, workers: int = 0) -> Dict[str, str]:
+    """Generate ERD diagrams using Graphviz.
+
+    - tables: {table_name: [{name, type, pk(bool)}]}
+    - fks: list of {child_table, child_col, parent_table, parent_col}
+    - partition: "auto" (partition by component above `max_tables` tables),
+      "none", "component" or "prefix"
+    - neighborhoods: also draw one diagram per fact table
+
+    `<out_path>.svg` shows the whole schema, or an overview of the partitions;
+    partitions and neighborhoods go to `<out_path>_parts/`, where diagrams of
+    partitions that no longer exist are removed. Returns `{diagram: svg path}`
+    with the main diagram under "erd", partitions under "part:<name>" and
+    neighborhoods under "fact:<table>".
+    """
+    if partition not in PARTITION_MODES:
+        raise ValueError("Unsupported ERD partition mode: " + partition)
+    if partition == "auto":
+        partition = "component" if len(tables) > max_tables else "none"
+    names = list(tables)
+    parts = {} if partition == "none" else partition_tables(names, fks, partition, max_tables)
+    graphs = {"erd": (overview_graph(parts, fks) if parts else build_graph(tables, fks), out_path)}
+    parts_dir = out_path + "_parts"
+    # namespaced, so a partition named "erd" can't replace the main diagram
+    for p, ts in parts.items():
+        graphs["part:" + p] = (build_graph({t: tables[t] for t in ts}, fks, p), os.path.join(parts_dir, p))
+    if neighborhoods:
+        for fact, ts in fact_neighborhoods(names, fks).items():
+            name = "fact_" + fact
+            graphs["fact:" + fact] = (build_graph({t: tables[t] for t in ts}, fks, name),
+                                      os.path.join(parts_dir, name))
+
+    workers = workers or min(8, os.cpu_count() or 1)
+    if workers > 1 and len(graphs) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda item: render(*item), graphs.values()))
+    else:
+        for g, path in graphs.values():
+            render(g, path)
+    if os.path.isdir(parts_dir):
+        # diagrams of partitions that no longer exist
+        keep = {os.path.basename(path) + ext for _, path in graphs.values() for ext in (".svg", ".gv")}
+        for fname in os.listdir(parts_dir):
+            if fname not in keep:
+                os.remove(os.path.join(parts_dir, fname))
+        if not os.listdir(parts_dir):
+            os.rmdir(parts_dir)
+    return {name: path + ".svg" for name, (_, path) in graphs.items()}
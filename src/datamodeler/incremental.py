@@ -0,0 +1,150 @@
+"""Persistent state for incremental re-modeling.
+
+A state directory remembers, for every input file, its fingerprint (size,
+mtime and content hash) together with the table's column statistics, profile
+entry and primary key, plus the last FK result. A rerun then only re-profiles
+tables whose file changed and only re-checks FK pairs that involve them.
+
+Layout::
+
+    <state_dir>/manifest.json      fingerprints, options key, FK list
+    <state_dir>/tables/<name>.pkl  {"column_stats", "profile", "pk"}
+"""
+import hashlib
+import json
+import os
+import pickle
+from typing import Dict, List, Optional, Set, Tuple
+
+from .streaming import part_files
+
+STATE_VERSION = 1
+
+
+def _sha256(path: str, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(path: str, previous: Optional[Dict] = None) -> Dict:
+    """Fingerprint a file; the content hash is reused when size and mtime are unchanged.
+
+    A partitioned table's directory is fingerprinted by its part files: total
+    size, newest mtime, and a hash over each part's name and content hash.
+    """
+    if os.path.isdir(path):
+        return _fingerprint_parts(path, previous)
+    st = os.stat(path)
+    fp = {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if previous and previous.get("size") == fp["size"] and previous.get("mtime_ns") == fp["mtime_ns"]:
+        fp["sha256"] = previous.get("sha256")
+    else:
+        fp["sha256"] = _sha256(path)
+    return fp
+
+
+def _fingerprint_parts(path: str, previous: Optional[Dict] = None) -> Dict:
+    parts = {os.path.relpath(p, path): os.stat(p) for p in part_files(path)}
+    fp = {"path": os.path.abspath(path), "size": sum(st.st_size for st in parts.values()),
+          "mtime_ns": max((st.st_mtime_ns for st in parts.values()), default=0), "parts": len(parts)}
+    if previous and all(previous.get(k) == fp[k] for k in ("size", "mtime_ns", "parts")):
+        fp["sha256"] = previous.get("sha256")
+        return fp
+    h = hashlib.sha256()
+    for rel in parts:
+        h.update(f"{rel}\0{_sha256(os.path.join(path, rel))}\n".encode("utf-8"))
+    fp["sha256"] = h.hexdigest()
+    return fp
+
+
+def options_key(options: Dict) -> str:
+    """Options that change per-table results; a different key invalidates the state."""
+    relevant = {k: options.get(k) for k in ("streaming", "compact")}
+    return json.dumps(relevant, sort_keys=True)
+
+
+class IncrementalState:
+    def __init__(self, state_dir: str):
+        self.state_dir = state_dir
+        self.manifest = {"version": STATE_VERSION, "options": None, "tables": {}, "fks": []}
+        path = self._manifest_path()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                if manifest.get("version") == STATE_VERSION:
+                    self.manifest = manifest
+            except (OSError, ValueError):
+                pass
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.state_dir, "manifest.json")
+
+    def _table_path(self, name: str) -> str:
+        return os.path.join(self.state_dir, "tables", name + ".pkl")
+
+    def diff(self, paths: Dict[str, str], options: Dict) -> Tuple[Dict[str, Dict], Set[str], Set[str]]:
+        """Compare input files against the stored state.
+
+        Returns `(fingerprints, changed, removed)` where `changed` holds new or
+        modified tables (all of them if the options key differs) and `removed`
+        holds tables that were in the state but are no longer inputs.
+        """
+        known = self.manifest.get("tables", {})
+        same_options = self.manifest.get("options") == options_key(options)
+        fps, changed = {}, set()
+        for name, path in paths.items():
+            prev = known.get(name)
+            fps[name] = fingerprint(path, prev)
+            if not same_options or prev is None or prev.get("sha256") != fps[name]["sha256"] \
+                    or not os.path.exists(self._table_path(name)):
+                changed.add(name)
+        removed = set(known) - set(paths)
+        return fps, changed, removed
+
+    def load_table(self, name: str) -> Optional[Dict]:
+        try:
+            with open(self._table_path(name), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def cached_fks(self, exclude: Set[str]) -> List[Dict]:
+        """Stored FKs that don't touch any table in `exclude`."""
+        return [fk for fk in self.manifest.get("fks", [])
+                if fk["child_table"] not in exclude and fk["parent_table"] not in exclude]
+
+    def save(self, fingerprints: Dict[str, Dict], options: Dict, fks: List[Dict],
+             tables: Dict[str, Dict], removed: Set[str]):
+        """Persist refreshed table entries and the new manifest."""
+        os.makedirs(os.path.join(self.state_dir, "tables"), exist_ok=True)
+        for name, entry in tables.items():
+            tmp = self._table_path(name) + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._table_path(name))
+        for name in removed:
+            try:
+                os.remove(self._table_path(name))
+            except OSError:
+                pass
+        self.manifest = {"version": STATE_VERSION, "options": options_key(options),
+                         "tables": fingerprints, "fks": fks}
+        tmp = self._manifest_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, default=str)
+        os.replace(tmp, self._manifest_path())
+
+
+def sort_fks(fks: List[Dict], column_order: Dict[str, List[str]]) -> List[Dict]:
+    """Order merged FKs like a full scan would (child table/column, parent table/column)."""
+    tables = {t: i for i, t in enumerate(column_order)}
+    cols = {t: {c: i for i, c in enumerate(cs)} for t, cs in column_order.items()}
+
+    def key(fk):
+        return (tables.get(fk["child_table"], len(tables)), cols.get(fk["child_table"], {}).get(fk["child_col"], 0),
+                tables.get(fk["parent_table"], len(tables)), cols.get(fk["parent_table"], {}).get(fk["parent_col"], 0))
+    return sorted(fks, key=key)
@@ -0,0 +1,303 @@
+"""Background job subsystem for the MCP server.
+
+Each job gets its own working directory (`<jobs_dir>/<job_id>/inputs` and
+`.../outputs`), so concurrent uploads never see each other's files. Pipelines
+run in a bounded process pool; at most `max_workers` run at once, up to
+`max_queue` more may wait, and further submissions are rejected (backpressure)
+instead of piling up. With a `ResultCache`, a job whose inputs and options
+hash to a stored result is completed from the cache without running at all.
+"""
+import asyncio
+import multiprocessing
+import os
+import shutil
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from .cache import ResultCache, get_result_cache
+from .metrics import PipelineMetrics
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+RESULT_ZIP = "datamodel_outputs.zip"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a submission would exceed the queue bound."""
+
+
+ZIP_CHUNK_BYTES = 1 << 20
+
+
+def output_files(output_dir: str, result: dict) -> List[List[str]]:
+    """`[arcname, path]` pairs for the artifacts a finished run wrote to disk."""
+    files = [["model.sql", os.path.join(output_dir, "model.sql")],
+             ["catalog.json", os.path.join(output_dir, "catalog.json")]]
+    for key, arcname in (("erd_svg", "erd.svg"), ("erd_gv", "erd.gv")):
+        path = result.get(key)
+        if path and os.path.exists(path):
+            files.append([arcname, path])
+    for name, svg in sorted((result.get("erd_parts") or {}).items()):
+        for path in (svg, svg[:-len(".svg")] + ".gv"):
+            files.append(["erd_parts/" + os.path.basename(path), path])
+    return [f for f in files if os.path.exists(f[1])]
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that hands written bytes back out.
+
+    Without `seek`/`tell` zipfile falls back to streaming mode (data
+    descriptors after each member), so the archive can be sent as it is built.
+    """
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_zip(files: List[List[str]], chunk_bytes: int = ZIP_CHUNK_BYTES) -> Iterator[bytes]:
+    """Yield a ZIP of `files` piece by piece; memory stays at about one chunk."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as z:
+        for arcname, path in files:
+            large = os.path.getsize(path) > zipfile.ZIP64_LIMIT
+            with open(path, "rb") as src, z.open(arcname, "w", force_zip64=large) as dst:
+                for block in iter(lambda: src.read(chunk_bytes), b""):
+                    dst.write(block)
+                    data = sink.drain()
+                    if data:
+                        yield data
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def warm_worker(warm_llm: bool = True):
+    """Pool initializer: import the pipeline, compile its graph and load the LLM once per worker."""
+    from datamodeler.langgraph_integration import warm_up
+
+    warm_up(llm=warm_llm)
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def run_pipeline_job(input_dir: str, output_dir: str, options: Optional[dict] = None) -> dict:
+    """Worker-process entry point: run the pipeline and return a compact summary."""
+    from datamodeler.langgraph_integration import run_datamodel_pipeline
+
+    result = run_datamodel_pipeline(input_dir, output_dir, **(options or {}))
+    if result.get("error"):
+        return {"error": result["error"], "metrics": result.get("metrics", {})}
+    return {
+        "error": None,
+        "files": output_files(output_dir, result),
+        "tables": list(result.get("tables", {})),
+        "fks": len(result.get("fks", [])),
+        "metrics": result.get("metrics", {}),
+    }
+
+
+@dataclass
+class Job:
+    id: str
+    workdir: str
+    status: str = QUEUED
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+    summary: dict = field(default_factory=dict)
+    done: Optional[asyncio.Event] = None
+    cache_key: Optional[str] = None
+    cached: bool = False
+
+    @property
+    def input_dir(self) -> str:
+        return os.path.join(self.workdir, "inputs")
+
+    @property
+    def output_dir(self) -> str:
+        return os.path.join(self.workdir, "outputs")
+
+    @property
+    def files(self) -> List[List[str]]:
+        return self.summary.get("files", [])
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error,
+            "tables": self.summary.get("tables"),
+            "fks": self.summary.get("fks"),
+            "cached": self.cached,
+            "metrics": self.summary.get("metrics"),
+        }
+
+
+class JobManager:
+    def __init__(self, jobs_dir: str, max_workers: Optional[int] = None, max_queue: int = 64,
+                 job_ttl: float = 3600.0, result_cache: Optional[ResultCache] = None,
+                 pipeline_options: Optional[dict] = None):
+        """`pipeline_options` are passed to `run_datamodel_pipeline` for every job."""
+        self.jobs_dir = os.path.abspath(jobs_dir)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.job_ttl = job_ttl
+        self.result_cache = result_cache
+        self.pipeline_options = dict(pipeline_options or {})
+        self.metrics = PipelineMetrics()
+        self.jobs: Dict[str, Job] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.warm_up_seconds: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "JobManager":
+        workers = os.environ.get("MCP_MAX_WORKERS")
+        profile_dir = os.environ.get("MCP_PROFILE_DIR")
+        sample_rows = os.environ.get("MCP_SAMPLE_ROWS")
+        options = {}
+        if profile_dir:
+            options["profile_dir"] = os.path.abspath(profile_dir)
+        if sample_rows:
+            # fast mode for interactive use (see `datamodeler.sampling`)
+            options["sample_rows"] = int(sample_rows)
+            options["confirm_keys"] = os.environ.get("MCP_CONFIRM_KEYS", "0").lower() in ("1", "true", "yes")
+        return cls(jobs_dir=os.environ.get("MCP_JOBS_DIR", "./.mcp_jobs"),
+                   max_workers=int(workers) if workers else None,
+                   max_queue=int(os.environ.get("MCP_MAX_QUEUE", "64")),
+                   job_ttl=float(os.environ.get("MCP_JOB_TTL", "3600")),
+                   result_cache=get_result_cache(),
+                   pipeline_options=options or None)
+
+    def start(self):
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=warm_worker)
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+    async def warm_up(self) -> float:
+        """Start every worker and wait until they are warm (see `warm_worker`); returns the seconds taken.
+
+        Workers are otherwise spawned, and warmed, by the first jobs that need them.
+        """
+        start = time.perf_counter()
+        self.start()
+        loop = asyncio.get_running_loop()
+        # each submission to a busy pool spawns another worker, up to `max_workers`
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _worker_ready)
+                               for _ in range(self.max_workers)))
+        self.warm_up_seconds = round(time.perf_counter() - start, 4)
+        return self.warm_up_seconds
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def active(self) -> int:
+        return sum(1 for j in self.jobs.values() if j.status in (QUEUED, RUNNING))
+
+    def create(self) -> Job:
+        """Reserve a job slot and its isolated working directory."""
+        self.start()
+        self._expire()
+        if self.active() >= self.max_workers + self.max_queue:
+            raise QueueFullError("Job queue is full")
+        job_id = uuid.uuid4().hex
+        job = Job(id=job_id, workdir=os.path.join(self.jobs_dir, job_id), done=asyncio.Event())
+        os.makedirs(job.input_dir)
+        os.makedirs(job.output_dir)
+        self.jobs[job_id] = job
+        return job
+
+    def cache_options(self) -> dict:
+        """Everything besides the inputs that changes a run's outputs."""
+        options = {k: v for k, v in self.pipeline_options.items() if k != "profile_dir"}
+        return dict(options, model=os.environ.get("LOCAL_LLM_MODEL"))
+
+    def complete_from_cache(self, job: Job, key: str) -> bool:
+        """Finish `job` from a cached result for `key`; False on a miss."""
+        job.cache_key = key
+        if self.result_cache is None:
+            return False
+        # the files are linked into the job's outputs: the entry may be evicted before they are fetched
+        summary = self.result_cache.get(key, dest=job.output_dir)
+        if summary is None:
+            return False
+        shutil.rmtree(job.input_dir, ignore_errors=True)
+        job.started = job.finished = time.time()
+        job.summary, job.cached, job.status = summary, True, SUCCEEDED
+        self.metrics.observe_job("cached")
+        job.done.set()
+        return True
+
+    def submit(self, job: Job) -> asyncio.Task:
+        """Schedule a created job whose inputs are in place."""
+        return asyncio.get_running_loop().create_task(self._run(job))
+
+    async def _run(self, job: Job):
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            job.status, job.started = RUNNING, time.time()
+            try:
+                summary = await loop.run_in_executor(self._pool, run_pipeline_job, job.input_dir,
+                                                     job.output_dir, self.pipeline_options)
+            except Exception as e:
+                summary = {"error": f"Job crashed: {e}"}
+        if self.result_cache is not None and job.cache_key and not summary.get("error"):
+            try:
+                await loop.run_in_executor(None, self.result_cache.put, job.cache_key, summary["files"],
+                                           {k: v for k, v in summary.items() if k not in ("files", "metrics")})
+            except Exception:
+                pass  # caching is best effort
+        job.finished = time.time()
+        job.error = summary.get("error")
+        job.summary = summary
+        job.status = FAILED if job.error else SUCCEEDED
+        self.metrics.observe_run(summary.get("metrics"))
+        self.metrics.observe_job(job.status)
+        job.done.set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    async def wait(self, job: Job) -> Job:
+        await job.done.wait()
+        return job
+
+    def discard(self, job: Job):
+        self.jobs.pop(job.id, None)
+        shutil.rmtree(job.workdir, ignore_errors=True)
+
+    def _expire(self):
+        now = time.time()
+        for job in list(self.jobs.values()):
+            if job.finished is not None and now - job.finished > self.job_ttl:
+                self.discard(job)
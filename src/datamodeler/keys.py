@@ -0,0 +1,444 @@
+"""Key discovery engine.
+
+Foreign-key detection used to compare every child column against every parent
+column, re-stringifying the parent inside the innermost loop. This module works
+from per-column statistics computed exactly once (`stats.ColumnStats`), prunes
+candidate pairs with cheap checks and only then runs the containment test.
+
+Tables without a single-column key get a composite-key search
+(`discover_composite_keys`) that walks the column lattice with pruning.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from . import sketches
+from .stats import (ColumnStats, KIND_BOOL, KIND_DATETIME, KIND_FLOAT, KIND_INT,
+                    KIND_OTHER, dtype_kind)
+
+
+@dataclass
+class ColumnSketch:
+    """Fixed-size stand-in for ColumnStats used by the approximate FK mode.
+
+    `kmv` samples the distinct values; `bloom` is only built for columns that can
+    be referenced (parent candidates), since only those need membership tests.
+    """
+    table: str
+    column: str
+    kind: str
+    rows: int
+    non_null: int
+    kmv: sketches.KMVSketch
+    bloom: Optional[sketches.BloomFilter] = None
+    min: Optional[object] = None
+    max: Optional[object] = None
+
+    @property
+    def nunique(self) -> float:
+        return self.kmv.cardinality()
+
+    @property
+    def nunique_error(self) -> float:
+        # two standard errors, so pruning does not drop a truly unique column
+        return 2 * self.kmv.relative_error()
+
+
+def sketch_column(table: str, column: str, s: pd.Series, k: int = 1024,
+                  chunk_rows: int = 1_000_000) -> ColumnSketch:
+    """Scan a column in bounded chunks and keep only a KMV sample and bounds."""
+    kind = dtype_kind(s.dtype)
+    kmv = sketches.KMVSketch(k)
+    for hashes in sketches.iter_hash_chunks(s, chunk_rows):
+        kmv.update(hashes)
+    non_null = int(s.notna().sum())
+    lo = hi = None
+    if non_null and kind in (KIND_INT, KIND_FLOAT, KIND_DATETIME):
+        try:
+            lo, hi = s.min(), s.max()
+        except Exception:
+            lo = hi = None
+    return ColumnSketch(table=table, column=column, kind=kind, rows=len(s),
+                        non_null=non_null, kmv=kmv, min=lo, max=hi)
+
+
+def _iter_column(table, column: str, chunk_rows: int) -> Iterator[pd.Series]:
+    """Yield a column in bounded pieces from a DataFrame or a lazy TableHandle."""
+    if hasattr(table, "iter_column"):
+        yield from table.iter_column(column)
+        return
+    s = table[column]
+    for start in range(0, len(s), chunk_rows):
+        yield s.iloc[start:start + chunk_rows]
+
+
+def _column_hashes(table, column: str, chunk_rows: int) -> Iterator[np.ndarray]:
+    for part in _iter_column(table, column, chunk_rows):
+        part = part.dropna()
+        if len(part):
+            yield sketches.hash_values(part.astype(str).to_numpy())
+
+
+def _sketch_from_stats(st: ColumnStats) -> ColumnSketch:
+    return ColumnSketch(table=st.table, column=st.column, kind=st.kind, rows=st.rows,
+                        non_null=st.non_null, kmv=st.kmv,
+                        min=st.min if st.kind in (KIND_INT, KIND_FLOAT, KIND_DATETIME) else None,
+                        max=st.max if st.kind in (KIND_INT, KIND_FLOAT, KIND_DATETIME) else None)
+
+
+def build_column_sketches(tables: Dict[str, pd.DataFrame], k: int = 1024,
+                          bloom_bits: int = 1 << 23, parent_uniqueness: float = 0.95,
+                          chunk_rows: int = 1_000_000,
+                          column_stats: Optional[Dict[str, Dict[str, ColumnStats]]] = None
+                          ) -> Dict[str, Dict[str, ColumnSketch]]:
+    """Sketch every column, then add Bloom filters to the parent candidates only.
+
+    KMV sketches already present in `column_stats` (from a chunked profile) are
+    reused; `tables` may hold DataFrames or lazy TableHandles.
+    """
+    index = {}
+    for t, table in tables.items():
+        cols = {}
+        for c, st in ((column_stats or {}).get(t) or {}).items():
+            if st.kmv is not None:
+                cols[c] = _sketch_from_stats(st)
+        if not hasattr(table, "iter_column"):
+            for c in table.columns:
+                if c not in cols:
+                    cols[c] = sketch_column(t, c, table[c], k, chunk_rows)
+        index[t] = cols
+    for t, cols in index.items():
+        for col in cols.values():
+            if is_parent_candidate(col, parent_uniqueness):
+                col.bloom = sketches.BloomFilter(bloom_bits)
+                for hashes in _column_hashes(tables[t], col.column, chunk_rows):
+                    col.bloom.add(hashes)
+    return index
+
+
+def _kinds_compatible(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    return KIND_OTHER in (a, b)
+
+
+def _ranges_overlap(child: ColumnStats, parent: ColumnStats) -> bool:
+    if child.min is None or parent.min is None:
+        return True
+    # Native bounds are only comparable within the same kind; for mixed kinds
+    # fall back to the exact containment check.
+    if child.kind != parent.kind:
+        return True
+    try:
+        return not (child.max < parent.min or child.min > parent.max)
+    except TypeError:
+        return True
+
+
+def is_parent_candidate(col: ColumnStats, parent_uniqueness: float) -> bool:
+    """A referenced column must be (nearly) unique and must not be a float/bool."""
+    if not col.nunique or col.kind in (KIND_FLOAT, KIND_BOOL):
+        return False
+    return col.nunique * (1 + col.nunique_error) >= parent_uniqueness * col.non_null
+
+
+def is_child_candidate(col: ColumnStats) -> bool:
+    return bool(col.nunique) and col.kind not in (KIND_FLOAT, KIND_BOOL)
+
+
+def candidate_pairs(index: Dict[str, Dict[str, ColumnStats]], min_ratio: float = 0.6,
+                    parent_uniqueness: float = 0.95,
+                    restrict_to: Optional[Set[str]] = None) -> Iterator[Tuple[ColumnStats, ColumnStats]]:
+    """Yield (child, parent) column pairs that survive the cheap pruning rules.
+
+    Pairs are yielded in the same order as the original all-pairs scan
+    (child table, child column, parent table, parent column). With `restrict_to`
+    only pairs touching one of those tables are considered.
+    """
+    parents = {t: [c for c in cols.values() if is_parent_candidate(c, parent_uniqueness)]
+               for t, cols in index.items()}
+    for child_table, cols in index.items():
+        for child in cols.values():
+            if not is_child_candidate(child):
+                continue
+            for parent_table, pcols in parents.items():
+                if parent_table == child_table:
+                    continue
+                if restrict_to is not None and child_table not in restrict_to \
+                        and parent_table not in restrict_to:
+                    continue
+                for parent in pcols:
+                    if not _kinds_compatible(child.kind, parent.kind):
+                        continue
+                    # matched <= |parent|, so ratio > min_ratio needs |child| < |parent| / min_ratio
+                    child_low = child.nunique * (1 - child.nunique_error)
+                    parent_high = parent.nunique * (1 + parent.nunique_error)
+                    if min_ratio * child_low >= parent_high:
+                        continue
+                    if not _ranges_overlap(child, parent):
+                        continue
+                    yield child, parent
+
+
+def containment(child: ColumnStats, parent: ColumnStats) -> float:
+    """Fraction of the child's distinct values that also appear in the parent."""
+    if not child.values:
+        return 0.0
+    return len(child.values & parent.values) / len(child.values)
+
+
+def discover_foreign_keys(index: Dict[str, Dict[str, ColumnStats]], min_ratio: float = 0.6,
+                          parent_uniqueness: float = 0.95,
+                          restrict_to: Optional[Set[str]] = None) -> List[Dict]:
+    fks = []
+    pairs = 0
+    for child, parent in candidate_pairs(index, min_ratio, parent_uniqueness, restrict_to):
+        pairs += 1
+        ratio = containment(child, parent)
+        if ratio > min_ratio:
+            fks.append({
+                "child_table": child.table,
+                "child_col": child.column,
+                "parent_table": parent.table,
+                "parent_col": parent.column,
+                "match_ratio": ratio
+            })
+    metrics.add(fk_candidate_pairs=pairs)
+    return fks
+
+
+def _distinct_strings(table, column: str, chunk_rows: int = 1_000_000) -> set:
+    vals = set()
+    for part in _iter_column(table, column, chunk_rows):
+        vals.update(part.dropna().astype(str).unique())
+    return vals
+
+
+def _exact_containment(tables: Dict[str, pd.DataFrame], child, parent) -> float:
+    child_vals = _distinct_strings(tables[child.table], child.column)
+    if not child_vals:
+        return 0.0
+    parent_vals = _distinct_strings(tables[parent.table], parent.column)
+    return len(child_vals & parent_vals) / len(child_vals)
+
+
+def discover_foreign_keys_approx(index: Dict[str, Dict[str, ColumnSketch]], min_ratio: float = 0.6,
+                                 parent_uniqueness: float = 0.95, verify_top: int = 0,
+                                 tables: Optional[Dict[str, pd.DataFrame]] = None,
+                                 restrict_to: Optional[Set[str]] = None) -> List[Dict]:
+    """Score FK candidates from sketches alone.
+
+    Each result carries `estimated_ratio` and `error_bound` next to `match_ratio`.
+    When `verify_top` > 0 and `tables` is given, the best `verify_top` candidates
+    of each child column are re-checked exactly and `match_ratio` holds the exact
+    value; otherwise `match_ratio` is the estimate.
+    """
+    by_child: Dict[Tuple[str, str], List[Dict]] = {}
+    pairs = 0
+    for child, parent in candidate_pairs(index, min_ratio, parent_uniqueness, restrict_to):
+        if parent.bloom is None:
+            continue
+        pairs += 1
+        est, bound = sketches.estimate_containment(child.kmv, parent.bloom)
+        if est + bound <= min_ratio:
+            continue
+        by_child.setdefault((child.table, child.column), []).append({
+            "child_table": child.table,
+            "child_col": child.column,
+            "parent_table": parent.table,
+            "parent_col": parent.column,
+            "match_ratio": est,
+            "estimated_ratio": est,
+            "error_bound": bound,
+            "verified": False,
+            "_pair": (child, parent)
+        })
+    metrics.add(fk_candidate_pairs=pairs)
+
+    fks = []
+    for cands in by_child.values():
+        if verify_top and tables is not None:
+            for fk in sorted(cands, key=lambda f: f["estimated_ratio"], reverse=True)[:verify_top]:
+                fk["match_ratio"] = _exact_containment(tables, *fk["_pair"])
+                fk["verified"] = True
+        for fk in cands:
+            del fk["_pair"]
+            if fk["match_ratio"] > min_ratio:
+                fks.append(fk)
+    return fks
+
+
+def pk_columns(pk) -> List[str]:
+    """Columns of a primary key: None, one column name, or a tuple of names."""
+    if not pk:
+        return []
+    if isinstance(pk, str):
+        return [pk]
+    return list(pk)
+
+
+def _id_like(column: str) -> bool:
+    return column.lower() == "id" or column.lower().endswith("_id")
+
+
+def _max_nunique(st: ColumnStats) -> float:
+    """Upper bound on a column's distinct count (estimates carry an error)."""
+    return st.nunique * (1 + st.nunique_error)
+
+
+def composite_key_candidates(col_stats: Dict[str, ColumnStats], max_size: int = 4) -> List[ColumnStats]:
+    """Columns that may be part of a minimal composite key, most promising first.
+
+    Nullable, float and constant columns are dropped (a constant never helps a
+    key be unique, so it can't be in a minimal one), as are columns whose
+    distinct count times the `max_size - 1` largest other distinct counts is
+    below the row count: no combination holding them can be unique. Nothing
+    is dropped for having a low cardinality alone, since composite keys often
+    include a line number or type code. `_id` columns and higher cardinalities
+    come first.
+    """
+    cands = [st for st in col_stats.values()
+             if st.nnulls == 0 and st.kind != KIND_FLOAT and st.nunique is not None and st.nunique > 1]
+    cands.sort(key=lambda st: (not _id_like(st.column), -st.nunique))
+    if len(cands) < 2:
+        return cands
+    rows = cands[0].rows
+    bounds = sorted((_max_nunique(st) for st in cands), reverse=True)
+    reachable = []
+    for st in cands:
+        others = list(bounds)
+        others.remove(_max_nunique(st))
+        if _max_nunique(st) * np.prod(others[:max_size - 1], dtype=float) >= rows:
+            reachable.append(st)
+    return reachable
+
+
+def _load_codes(table, columns: List[str]) -> Dict[str, np.ndarray]:
+    """Factorize the requested columns into int64 codes (lazy tables are read projected)."""
+    if hasattr(table, "iter_chunks"):
+        frame = pd.concat(list(table.iter_chunks(columns=columns)), ignore_index=True)
+    else:
+        frame = table[columns]
+    return {c: pd.factorize(frame[c], use_na_sentinel=False)[0].astype(np.int64) for c in columns}
+
+
+def _combined_codes(codes: Dict[str, np.ndarray], sizes: Dict[str, int], combo: Tuple[str, ...],
+                    rows: Optional[int] = None) -> np.ndarray:
+    """One int64 code per row for a column combination.
+
+    Codes are mixed positionally (code_a * |b| + code_b) and re-factorized
+    whenever the product could overflow, so the result is exact, not a hash.
+    """
+    out, width = None, 1
+    for c in combo:
+        part = codes[c] if rows is None else codes[c][:rows]
+        if out is None:
+            out, width = part, sizes[c]
+            continue
+        if width * sizes[c] >= 2 ** 62:
+            out, uniq = pd.factorize(out)
+            width = len(uniq)
+        out, width = out * sizes[c] + part, width * sizes[c]
+    return out
+
+
+def _is_unique(combined: np.ndarray) -> bool:
+    return len(pd.unique(combined)) == len(combined)
+
+
+def _sample_stages(rows: int, sample_rows: int, growth: int = 8) -> List[int]:
+    """Sample sizes to check before the full data, each `growth` times the last."""
+    stages = []
+    size = sample_rows
+    while size * 2 <= rows:
+        stages.append(size)
+        size *= growth
+    return stages
+
+
+def _bounded_combinations(columns: List[str], nunique: Dict[str, float], size: int,
+                          rows: int) -> Iterator[Tuple[str, ...]]:
+    """`combinations(columns, size)`, in the same order, without those whose
+    distinct counts multiply to fewer than `rows`; whole branches are skipped
+    when even the largest remaining counts can't make up the difference.
+    """
+    # best[i]: the `size` largest counts among columns[i:], descending
+    best = [sorted((nunique[c] for c in columns[i:]), reverse=True)[:size] for i in range(len(columns) + 1)]
+
+    def extend(start: int, prefix: Tuple[str, ...], product: float):
+        need = size - len(prefix)
+        if not need:
+            if product >= rows:
+                yield prefix
+            return
+        for i in range(start, len(columns) - need + 1):
+            if product * np.prod(best[i][:need], dtype=float) < rows:
+                # best[i] only shrinks as i grows
+                return
+            yield from extend(i + 1, prefix + (columns[i],), product * nunique[columns[i]])
+
+    yield from extend(0, (), 1.0)
+
+
+def lattice_keys(cands: List[ColumnStats], is_unique: Callable[[Tuple[str, ...]], bool],
+                 max_size: int = 4, limit: int = 1) -> List[Tuple[str, ...]]:
+    """Level-wise walk over combinations of `cands`, smallest first.
+
+    A combination is skipped when it contains a key already found (it would
+    not be minimal) or when the product of its columns' distinct counts is
+    below the row count (it cannot be unique; such combinations are never
+    generated); `is_unique` decides the rest. Stops after `limit` keys (0 = all
+    minimal keys).
+    """
+    if len(cands) < 2:
+        return []
+    rows = cands[0].rows
+    nunique = {st.column: _max_nunique(st) for st in cands}
+    columns = [st.column for st in cands]
+    found: List[Tuple[str, ...]] = []
+    checked = 0
+    for size in range(2, max_size + 1):
+        for combo in _bounded_combinations(columns, nunique, size, rows):
+            if any(set(key) <= set(combo) for key in found):
+                continue
+            checked += 1
+            if is_unique(combo):
+                found.append(combo)
+                if limit and len(found) >= limit:
+                    metrics.add(pk_candidate_combinations=checked)
+                    return found
+    metrics.add(pk_candidate_combinations=checked)
+    return found
+
+
+def discover_composite_keys(table, col_stats: Dict[str, ColumnStats], max_size: int = 4,
+                            sample_rows: int = 10_000, limit: int = 1,
+                            seed: int = 0) -> List[Tuple[str, ...]]:
+    """Find minimal multi-column keys of `table` in memory (see `lattice_keys`).
+
+    Candidate columns are factorized once. Each combination is checked on
+    reproducible random samples growing from `sample_rows`, where one
+    duplicate rules it out, and only survivors are confirmed on the full
+    columns.
+    """
+    cands = composite_key_candidates(col_stats, max_size)
+    if len(cands) < 2:
+        return []
+    columns = [st.column for st in cands]
+    codes = _load_codes(table, columns)
+    sizes = {c: int(codes[c].max()) + 1 for c in columns}
+    stages = _sample_stages(len(codes[columns[0]]), sample_rows)
+    sampled = {}
+    if stages:
+        # prefixes of one random draw are random samples themselves
+        drawn = np.random.default_rng(seed).choice(len(codes[columns[0]]), size=stages[-1], replace=False)
+        sampled = {c: codes[c][drawn] for c in columns}
+
+    def is_unique(combo):
+        return all(_is_unique(_combined_codes(sampled, sizes, combo, n)) for n in stages) \
+            and _is_unique(_combined_codes(codes, sizes, combo))
+
+    return lattice_keys(cands, is_unique, max_size, limit)
@@ -2,37 +2,182 @@
 
 This module wires the existing datamodeler functions as nodes in a LangGraph graph,
 enabling orchestration, visualization, and advanced execution features.
+
+The graph is compiled once per process (`get_graph`) and reused by every run;
+LangGraph and Graphviz are imported when the graph is built and the ERD drawn.
+`warm_up` pays these one-time costs up front, e.g. in a server's workers.
 """
 import os
 import json
-from typing import TypedDict, Annotated
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import BaseMessage
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Tuple, TypedDict, Annotated
 
 from datamodeler import core
-from datamodeler import erd as erd_module
+from datamodeler import streaming as streaming_mod
+from datamodeler import incremental
+from datamodeler import keys
+from datamodeler import sampling
+from datamodeler import sqlkeys
+from datamodeler import metrics as metrics_mod
+
+
+def _keep_first_error(current: str | None, update: str | None) -> str | None:
+    """Reducer for `error`: parallel branches may all report; the first error wins."""
+    return current if current else update
 
 
 class DataModelState(TypedDict):
-    """State for the DataModel graph."""
+    """State for the DataModel graph.
+
+    Tables are lightweight `streaming.TableHandle`s (file path + name), never
+    inline DataFrames. Column statistics, fast-mode samples and the SQLite key
+    store are files in the run's scratch directory `run_dir` (see `_spill`),
+    so the state stays small, serializable and cheap to checkpoint. `metrics`
+    collects each node's timing, memory and counters (see `datamodeler.metrics`).
+    """
     input_path: str
     output_dir: str
+    options: dict
+    run_id: str
+    run_dir: str
+    key_store: str
+    incremental: dict
     tables: dict
     profile: dict
     pks: dict
+    key_confidence: dict
     fks: list
     sql: str
     catalog: dict
     erd_svg: str
     erd_gv: str
-    error: str | None
+    erd_parts: dict
+    error: Annotated[str | None, _keep_first_error]
+    metrics: Annotated[dict, metrics_mod.merge_metrics]
+
+
+# Column statistics may hold every distinct value of every column, so they (and
+# fast-mode samples) are pickled into the run directory instead of the state.
+COLUMN_STATS_FILE = "column_stats.pkl"
+SAMPLES_FILE = "samples.pkl"
+KEY_STORE_FILE = "keys.sqlite"
+
+# the most recently spilled or loaded files, so the nodes of a run share one
+# copy instead of unpickling it again; entries are checked against the file's mtime
+_SPILL_CACHE: "OrderedDict[str, Tuple[int, object]]" = OrderedDict()
+_SPILL_CACHE_SIZE = 4
+_SPILL_LOCK = threading.Lock()
+
+
+def _remember(path: str, obj):
+    with _SPILL_LOCK:
+        _SPILL_CACHE[path] = (os.stat(path).st_mtime_ns, obj)
+        _SPILL_CACHE.move_to_end(path)
+        while len(_SPILL_CACHE) > _SPILL_CACHE_SIZE:
+            _SPILL_CACHE.popitem(last=False)
+
+
+def _spill(state: DataModelState, name: str, obj):
+    """Pickle `obj` into the run directory as `name`."""
+    path = os.path.join(state["run_dir"], name)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+    _remember(path, obj)
+
+
+def _unspill(state: DataModelState, name: str, default=None):
+    """The object `_spill`ed as `name` in this run, or `default`."""
+    if not state.get("run_dir"):
+        return default
+    path = os.path.join(state["run_dir"], name)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return default
+    with _SPILL_LOCK:
+        hit = _SPILL_CACHE.get(path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    with open(path, "rb") as f:
+        obj = pickle.load(f)
+    _remember(path, obj)
+    return obj
+
+
+def _forget_run(run_dir: str):
+    with _SPILL_LOCK:
+        for path in [p for p in _SPILL_CACHE if os.path.dirname(p) == run_dir]:
+            del _SPILL_CACHE[path]
+
+
+def _column_stats(state: DataModelState) -> dict:
+    return _unspill(state, COLUMN_STATS_FILE, {})
+
+
+@contextmanager
+def _key_store(state: DataModelState):
+    """The run's `sqlkeys.KeyStore` (None with the memory backend), closed afterwards."""
+    if not state.get("key_store"):
+        yield None
+        return
+    opts = state.get("options") or {}
+    store = sqlkeys.KeyStore(state["key_store"], chunk_rows=opts.get("chunk_rows", streaming_mod.DEFAULT_CHUNK_ROWS))
+    try:
+        yield store
+    finally:
+        store.close()
+
+
+def _load_key_store(state: DataModelState, changed=None) -> str:
+    """Load the tables into the run's key store, kept in the state directory when there is one.
+
+    Returns its path ("" with the memory backend).
+    """
+    opts = state.get("options") or {}
+    if opts.get("key_backend", "memory") != "sqlite":
+        return ""
+    state_dir = opts.get("state_dir")
+    path = os.path.join(state_dir or state["run_dir"], KEY_STORE_FILE)
+    store = sqlkeys.KeyStore(path, chunk_rows=opts.get("chunk_rows", streaming_mod.DEFAULT_CHUNK_ROWS))
+    try:
+        store.load_all(state["tables"], only=changed)
+    finally:
+        store.close()
+    return path
+
+
+def _count_processed(column_stats: dict):
+    metrics_mod.add(rows=sum(max((st.rows for st in cols.values()), default=0) for cols in column_stats.values()),
+                    columns=sum(len(cols) for cols in column_stats.values()))
 
 
 def load_inputs_node(state: DataModelState) -> DataModelState:
-    """Load CSV/JSON files from input_path."""
+    """Locate CSV/JSON/columnar files under input_path as lazy table handles."""
     try:
-        tables = core.load_all_inputs(state["input_path"])
-        return {"tables": tables, "error": None}
+        opts = state.get("options") or {}
+        # files are parsed while profiling (in worker processes if configured);
+        # in incremental mode unchanged files are never read at all
+        state_dir = opts.get("state_dir")
+        tables = core.load_all_inputs(state["input_path"], streaming=opts.get("streaming", False),
+                                      chunk_rows=opts.get("chunk_rows", streaming_mod.DEFAULT_CHUNK_ROWS),
+                                      lazy=True)
+        if not state_dir:
+            return {"tables": tables, "error": None}
+        inc = incremental.IncrementalState(state_dir)
+        fps, changed, removed = inc.diff({t: h.path for t, h in tables.items()}, opts)
+        return {
+            "tables": tables,
+            "incremental": {"fingerprints": fps, "changed": sorted(changed), "removed": sorted(removed)},
+            "error": None
+        }
     except Exception as e:
         return {"error": f"Load failed: {str(e)}"}
 
@@ -40,26 +185,127 @@ def load_inputs_node(state: DataModelState) -> DataModelState:
 def profile_tables_node(state: DataModelState) -> DataModelState:
     """Profile tables: compute column metadata and descriptions."""
     try:
-        profile = core.profile_tables(state["tables"])
-        return {"profile": profile, "error": None}
+        # one column scan, shared with key detection and SQL typing
+        opts = state.get("options") or {}
+        tables = state["tables"]
+        inc_info = state.get("incremental")
+        if opts.get("sample_rows"):
+            # fast mode: profile a sample of each table and extrapolate
+            column_stats, samples, infos = sampling.profile_samples(tables, opts["sample_rows"],
+                                                                    seed=opts.get("sample_seed", 0))
+            profile = core.profile_tables(tables, column_stats=column_stats)
+            for t, info in infos.items():
+                profile[t]["sample"] = info.to_dict()
+            metrics_mod.add(rows=sum(info.rows for info in infos.values()),
+                            columns=sum(len(cols) for cols in column_stats.values()))
+            _spill(state, COLUMN_STATS_FILE, column_stats)
+            _spill(state, SAMPLES_FILE, {"samples": samples, "infos": infos})
+            return {"profile": profile, "error": None}
+        if not inc_info:
+            column_stats = core.column_statistics(tables, workers=opts.get("workers", 1),
+                                                  compact=opts.get("compact", False))
+            profile = core.profile_tables(tables, column_stats=column_stats)
+            _count_processed(column_stats)
+            _spill(state, COLUMN_STATS_FILE, column_stats)
+            return {"profile": profile, "key_store": _load_key_store(state), "error": None}
+
+        # re-profile changed tables only; the rest comes from the state directory
+        changed = set(inc_info["changed"])
+        fresh = {t: tables[t] for t in tables if t in changed}
+        new_stats = core.column_statistics(fresh, workers=opts.get("workers", 1), compact=opts.get("compact", False))
+        new_profile = core.profile_tables(fresh, column_stats=new_stats)
+        _count_processed(new_stats)
+        inc = incremental.IncrementalState(opts["state_dir"])
+        column_stats, profile = {}, {}
+        for t in tables:
+            if t in changed:
+                column_stats[t], profile[t] = new_stats[t], new_profile[t]
+            else:
+                entry = inc.load_table(t)
+                column_stats[t], profile[t] = entry["column_stats"], entry["profile"]
+        _spill(state, COLUMN_STATS_FILE, column_stats)
+        return {"profile": profile, "key_store": _load_key_store(state, changed), "error": None}
     except Exception as e:
         return {"error": f"Profile failed: {str(e)}"}
 
 
-def detect_keys_node(state: DataModelState) -> DataModelState:
-    """Detect primary keys and foreign keys."""
+def detect_pks_node(state: DataModelState) -> DataModelState:
+    """Detect primary keys (runs alongside FK detection)."""
+    try:
+        tables = state["tables"]
+        column_stats = _column_stats(state)
+        inc_info = state.get("incremental")
+        sampled = _unspill(state, SAMPLES_FILE)
+        if sampled:
+            # keys are searched on the samples, then optionally confirmed on the full tables
+            samples, infos = sampled["samples"], sampled["infos"]
+            metrics_mod.add(columns=sum(len(cols) for cols in column_stats.values()))
+            pks = core.detect_primary_keys(samples, column_stats=column_stats)
+            confidence = {t: {"columns": keys.pk_columns(pk),
+                              "confidence": round(sampling.pk_confidence(samples[t], pk, infos[t]), 4),
+                              "confirmed": False} for t, pk in pks.items()}
+            if state["options"].get("confirm_keys"):
+                pks = sampling.confirm_primary_keys(tables, pks, confidence)
+            return {"pks": pks, "key_confidence": confidence, "error": None}
+        if not inc_info:
+            metrics_mod.add(columns=sum(len(cols) for cols in column_stats.values()))
+            with _key_store(state) as store:
+                return {"pks": core.detect_primary_keys(tables, column_stats=column_stats, store=store),
+                        "error": None}
+
+        changed = set(inc_info["changed"])
+        inc = incremental.IncrementalState(state["options"]["state_dir"])
+        fresh = {t: tables[t] for t in tables if t in changed}
+        metrics_mod.add(columns=sum(len(column_stats[t]) for t in fresh))
+        with _key_store(state) as store:
+            new_pks = core.detect_primary_keys(fresh, column_stats={t: column_stats[t] for t in fresh},
+                                               store=store)
+        pks = {}
+        for t in tables:
+            pk = new_pks.get(t) if t in changed else (inc.load_table(t) or {}).get("pk")
+            if pk:
+                pks[t] = pk
+        return {"pks": pks, "error": None}
+    except Exception as e:
+        return {"error": f"Primary key detection failed: {str(e)}"}
+
+
+def detect_fks_node(state: DataModelState) -> DataModelState:
+    """Detect foreign keys (runs alongside PK detection)."""
     try:
-        pks = core.detect_primary_keys(state["tables"])
-        fks = core.detect_foreign_keys(state["tables"])
-        return {"pks": pks, "fks": fks, "error": None}
+        tables = state["tables"]
+        column_stats = _column_stats(state)
+        inc_info = state.get("incremental")
+        if (state.get("options") or {}).get("sample_rows"):
+            fks = core.detect_foreign_keys(tables, column_stats=column_stats, mode="sample")
+            if state["options"].get("confirm_keys"):
+                fks = sampling.confirm_foreign_keys(tables, fks)
+            return {"fks": fks, "error": None}
+        if not inc_info:
+            with _key_store(state) as store:
+                return {"fks": core.detect_foreign_keys(tables, column_stats=column_stats,
+                                                        mode="sql" if store else "exact", store=store),
+                        "error": None}
+
+        # only FK pairs with a changed table on either side are re-checked
+        changed = set(inc_info["changed"])
+        inc = incremental.IncrementalState(state["options"]["state_dir"])
+        with _key_store(state) as store:
+            new_fks = core.detect_foreign_keys(tables, column_stats=column_stats, restrict_to=changed,
+                                               mode="sql" if store else "exact", store=store) if changed else []
+        kept = inc.cached_fks(exclude=changed | set(inc_info["removed"]))
+        fks = incremental.sort_fks(kept + new_fks, {t: list(cs) for t, cs in column_stats.items()})
+        return {"fks": fks, "error": None}
     except Exception as e:
-        return {"error": f"Key detection failed: {str(e)}"}
+        return {"error": f"Foreign key detection failed: {str(e)}"}
 
 
 def build_sql_node(state: DataModelState) -> DataModelState:
     """Generate SQL DDL statements."""
     try:
-        sql = core.build_sql(state["tables"], state["pks"], state["fks"])
+        column_stats = _column_stats(state)
+        metrics_mod.add(columns=sum(len(cols) for cols in column_stats.values()))
+        sql = core.build_sql(state["tables"], state["pks"], state["fks"], column_stats=column_stats)
         return {"sql": sql, "error": None}
     except Exception as e:
         return {"error": f"SQL generation failed: {str(e)}"}
@@ -68,7 +314,15 @@ def build_sql_node(state: DataModelState) -> DataModelState:
 def build_catalog_node(state: DataModelState) -> DataModelState:
     """Build data catalog metadata."""
     try:
-        catalog = core.build_catalog(state["profile"])
+        opts = state.get("options") or {}
+        sampling_info = None
+        if opts.get("sample_rows"):
+            sampling_info = {"sample_rows": opts["sample_rows"], "seed": opts.get("sample_seed", 0),
+                             "duplicate_tolerance": sampling.DEFAULT_TOLERANCE,
+                             "keys_confirmed": bool(opts.get("confirm_keys")),
+                             "primary_keys": state.get("key_confidence") or {},
+                             "foreign_keys": state["fks"]}
+        catalog = core.build_catalog(state["profile"], sampling_info=sampling_info)
         return {"catalog": catalog, "error": None}
     except Exception as e:
         return {"error": f"Catalog generation failed: {str(e)}"}
@@ -84,15 +338,22 @@ def generate_erd_node(state: DataModelState) -> DataModelState:
                 cols.append({
                     "name": c["name"],
                     "type": c["dtype"],
-                    "pk": (state["pks"].get(t) == c["name"])
+                    "pk": c["name"] in keys.pk_columns(state["pks"].get(t))
                 })
             tables_summary[t] = cols
+        metrics_mod.add(columns=sum(len(cols) for cols in tables_summary.values()))
 
+        opts = state.get("options") or {}
         erd_base = os.path.join(state["output_dir"], "erd")
-        erd_module.generate_erd(tables_summary, state["fks"], erd_base)
+        from datamodeler import erd as erd_module
+
+        diagrams = erd_module.generate_erd(tables_summary, state["fks"], erd_base,
+                                           partition=opts.get("erd_partition", "auto"),
+                                           neighborhoods=opts.get("erd_neighborhoods", False))
         return {
-            "erd_svg": erd_base + ".svg",
+            "erd_svg": diagrams.pop("erd"),
             "erd_gv": erd_base + ".gv",
+            "erd_parts": diagrams,
             "error": None
         }
     except Exception as e:
@@ -110,63 +371,170 @@ def save_outputs_node(state: DataModelState) -> DataModelState:
         cat_path = os.path.join(state["output_dir"], "catalog.json")
         with open(cat_path, "w", encoding="utf-8") as f:
             json.dump(state["catalog"], f, indent=2)
+
+        inc_info = state.get("incremental")
+        # a failed node leaves partial results; saving them would mark the changed
+        # tables as up to date and later runs would never redo the missing work
+        complete = not state.get("error") and all(t in state["profile"] for t in (inc_info or {}).get("changed", []))
+        if inc_info and complete:
+            opts = state["options"]
+            column_stats = _column_stats(state)
+            refreshed = {t: {"column_stats": column_stats[t], "profile": state["profile"][t],
+                             "pk": state["pks"].get(t)} for t in inc_info["changed"]}
+            incremental.IncrementalState(opts["state_dir"]).save(
+                inc_info["fingerprints"], opts, state["fks"], refreshed, set(inc_info["removed"]))
         
         return {"error": None}
     except Exception as e:
         return {"error": f"Save outputs failed: {str(e)}"}
 
 
-def build_datamodel_graph() -> StateGraph:
-    """Build and compile the DataModel LangGraph."""
+def build_datamodel_graph():
+    """Build and compile the DataModel LangGraph.
+
+    After profiling the graph fans out: PK and FK detection are independent and
+    run concurrently. SQL, catalog (which records key confidence in fast mode)
+    and ERD generation then run side by side and `save_outputs` joins them.
+    """
+    from langgraph.graph import StateGraph, END
+
     workflow = StateGraph(DataModelState)
     
-    # Add nodes
-    workflow.add_node("load_inputs", load_inputs_node)
-    workflow.add_node("profile_tables", profile_tables_node)
-    workflow.add_node("detect_keys", detect_keys_node)
-    workflow.add_node("build_sql", build_sql_node)
-    workflow.add_node("build_catalog", build_catalog_node)
-    workflow.add_node("generate_erd", generate_erd_node)
-    workflow.add_node("save_outputs", save_outputs_node)
+    # Add nodes, each wrapped to record its timing and counters
+    nodes = {
+        "load_inputs": load_inputs_node,
+        "profile_tables": profile_tables_node,
+        "detect_pks": detect_pks_node,
+        "detect_fks": detect_fks_node,
+        "build_sql": build_sql_node,
+        "build_catalog": build_catalog_node,
+        "generate_erd": generate_erd_node,
+        "save_outputs": save_outputs_node,
+    }
+    for name, fn in nodes.items():
+        workflow.add_node(name, metrics_mod.instrument(name, fn))
     
     # Define edges (execution flow)
     workflow.set_entry_point("load_inputs")
     workflow.add_edge("load_inputs", "profile_tables")
-    workflow.add_edge("profile_tables", "detect_keys")
-    workflow.add_edge("detect_keys", "build_sql")
-    workflow.add_edge("build_sql", "build_catalog")
-    workflow.add_edge("build_catalog", "generate_erd")
-    workflow.add_edge("generate_erd", "save_outputs")
+    workflow.add_edge("profile_tables", "detect_pks")
+    workflow.add_edge("profile_tables", "detect_fks")
+    workflow.add_edge(["detect_pks", "detect_fks"], "build_sql")
+    workflow.add_edge(["detect_pks", "detect_fks"], "build_catalog")
+    workflow.add_edge(["detect_pks", "detect_fks"], "generate_erd")
+    workflow.add_edge(["build_sql", "build_catalog", "generate_erd"], "save_outputs")
     workflow.add_edge("save_outputs", END)
     
     return workflow.compile()
 
 
-def run_datamodel_pipeline(input_path: str, output_dir: str) -> dict:
+# the compiled graph holds no per-run state, so one instance serves every run
+_GRAPH = None
+_GRAPH_LOCK = threading.Lock()
+
+
+def get_graph():
+    """The compiled DataModel graph, built on first use."""
+    global _GRAPH
+    with _GRAPH_LOCK:
+        if _GRAPH is None:
+            _GRAPH = build_datamodel_graph()
+        return _GRAPH
+
+
+def warm_up(llm: bool = True) -> Dict[str, float]:
+    """Compile the graph, import the ERD renderer and, with `llm`, load the optional model.
+
+    Returns the seconds each step took.
+    """
+    from datamodeler import ai
+
+    timings = {}
+    start = time.perf_counter()
+    get_graph()
+    from datamodeler import erd  # noqa: F401  (graphviz)
+    timings["graph_seconds"] = round(time.perf_counter() - start, 4)
+    if llm:
+        start = time.perf_counter()
+        ai.warm_up()
+        timings["llm_seconds"] = round(time.perf_counter() - start, 4)
+    return timings
+
+
+def run_datamodel_pipeline(input_path: str, output_dir: str, streaming: bool = False,
+                           chunk_rows: int = streaming_mod.DEFAULT_CHUNK_ROWS, workers: int = 1,
+                           state_dir: str | None = None, profile_dir: str | None = None,
+                           compact: bool = False, erd_partition: str = "auto",
+                           erd_neighborhoods: bool = False, key_backend: str = "memory",
+                           sample_rows: int | None = None, sample_seed: int = 0,
+                           confirm_keys: bool = False) -> dict:
     """Execute the DataModel pipeline using LangGraph.
     
     Args:
         input_path: Path to input CSV/JSON files or directory
         output_dir: Directory to save outputs
+        streaming: Keep tables as lazy handles and profile them chunk by chunk
+        chunk_rows: Rows per chunk in streaming mode
+        workers: Processes used to load and profile tables (0 = one per CPU)
+        state_dir: Directory keeping fingerprints and cached per-table results;
+            when set, only changed input files are re-profiled
+        profile_dir: Run every node under cProfile and dump the stats to
+            `<profile_dir>/<run_id>/<node>.prof`
+        compact: Downcast dtypes after loading (categoricals for low-cardinality
+            strings) and report the bytes saved per table in the catalog
+        erd_partition: "auto", "none", "component" or "prefix"; partitioned
+            ERDs go to `<output_dir>/erd_parts/` (see `erd.generate_erd`)
+        erd_neighborhoods: Also draw one ERD per fact table's neighborhood
+        key_backend: "memory", or "sqlite" to load the tables into a SQLite
+            file (`<state_dir>/keys.sqlite`, else a temporary one) and run PK
+            and FK checks there, for tables whose values don't fit in memory
+        sample_rows: Fast mode: profile and search keys on a reproducible
+            sample of about this many rows per table (see `datamodeler.sampling`);
+            counts are extrapolated and keys get a confidence in the catalog
+        sample_seed: Seed of the fast-mode samples
+        confirm_keys: In fast mode, re-check the chosen PKs and FKs on the
+            full tables, dropping the ones that don't hold
         
     Returns:
-        Final state dict with all results
+        Final state dict with all results; `metrics` maps node names to wall
+        and CPU seconds, peak RSS and rows/columns/FK pairs processed
     """
-    graph = build_datamodel_graph()
-    
+    if sample_rows and (state_dir or key_backend != "memory"):
+        raise ValueError("sample_rows can't be combined with state_dir or the sqlite key backend")
+    graph = get_graph()
+
+    run_id = uuid.uuid4().hex
+    # scratch files of this run (see `_spill`), removed when it ends
+    run_dir = tempfile.mkdtemp(prefix="datamodeler-run-")
     initial_state = {
         "input_path": input_path,
         "output_dir": output_dir,
+        "options": {"streaming": streaming, "chunk_rows": chunk_rows, "workers": workers,
+                    "state_dir": state_dir, "profile_dir": profile_dir,
+                    "compact": compact, "erd_partition": erd_partition,
+                    "erd_neighborhoods": erd_neighborhoods, "key_backend": key_backend,
+                    "sample_rows": sample_rows, "sample_seed": sample_seed, "confirm_keys": confirm_keys},
+        "run_id": run_id,
+        "run_dir": run_dir,
+        "key_store": "",
+        "incremental": {},
         "tables": {},
         "profile": {},
         "pks": {},
+        "key_confidence": {},
         "fks": [],
         "sql": "",
         "catalog": {},
         "erd_svg": "",
         "erd_gv": "",
-        "error": None
+        "erd_parts": {},
+        "error": None,
+        "metrics": {}
     }
     
-    result = graph.invoke(initial_state)
+    try:
+        result = graph.invoke(initial_state)
+    finally:
+        _forget_run(run_dir)
+        shutil.rmtree(run_dir, ignore_errors=True)
     return result
@@ -3,23 +3,44 @@
 This is a scaffold for future MCP integration. It accepts file uploads (CSV or JSON), runs
 the local datamodeler on them, and returns the generated SQL and catalog JSON in a ZIP.
 
+Pipelines run as background jobs (see `datamodeler.jobs`): each upload gets an isolated
+working directory and runs in a bounded process pool, so the event loop never blocks.
+`/jobs` submits without waiting; `/generate` submits and waits for the ZIP.
+
+Heavy imports (pandas, LangGraph, the LLM) happen only in the job workers, which are
+started and warmed up at server startup.
+
 Note: This server runs locally and uses the same core code; no external AI keys required.
 """
-import io
+import hashlib
 import os
-import json
-import zipfile
+from contextlib import asynccontextmanager
 from typing import List
 
+import aiofiles
 from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Header
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-from datamodeler import core
-from datamodeler import erd as erd_module
-from datamodeler.langgraph_integration import run_datamodel_pipeline
+from datamodeler import cache
+from datamodeler import jobs
+
+job_manager = jobs.JobManager.from_env()
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Warm up the job workers (pipeline imports, graph, optional LLM) before the first request; stop them on exit."""
+    await job_manager.warm_up()
+    try:
+        yield
+    finally:
+        job_manager.shutdown()
+
+
+app = FastAPI(title="DataModeler MCP Scaffold", lifespan=_lifespan)
 
-app = FastAPI(title="DataModeler MCP Scaffold")
+UPLOAD_CHUNK_BYTES = 1 << 20
 
 # Serve a small web UI from /ui
 WEB_UI_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "..", "web_ui")
@@ -36,48 +57,118 @@ def _check_api_key(x_api_key: str | None = Header(default=None)):
             raise HTTPException(status_code=401, detail="Invalid or missing API key")
 
 
+async def _create_job(files: List[UploadFile]) -> jobs.Job:
+    """Save uploads into a fresh job directory and schedule the pipeline."""
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+    try:
+        job = job_manager.create()
+    except jobs.QueueFullError:
+        raise HTTPException(status_code=429, detail="Too many pending jobs; retry later",
+                            headers={"Retry-After": "5"})
+
+    try:
+        digests = {}
+        for f in files:
+            # never trust client paths: keep only the base name inside the job dir
+            name = os.path.basename(f.filename or "")
+            if name in ("", ".", ".."):
+                name = "upload"
+            digest = hashlib.sha256()
+            # copy in bounded chunks so memory doesn't grow with the upload size,
+            # hashing on the way for the result cache
+            async with aiofiles.open(os.path.join(job.input_dir, name), "wb") as out:
+                while True:
+                    chunk = await f.read(UPLOAD_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    await out.write(chunk)
+            digests[name] = digest.hexdigest()
+
+        key = cache.result_key(digests, job_manager.cache_options())
+        if not job_manager.complete_from_cache(job, key):
+            job_manager.submit(job)
+    except BaseException:
+        # a half-written job would hold its queue slot forever
+        job_manager.discard(job)
+        raise
+    return job
+
+
+def _zip_response(job: jobs.Job) -> StreamingResponse:
+    """Stream the job's outputs as a ZIP built on the fly."""
+    return StreamingResponse(jobs.iter_zip(job.files), media_type="application/zip",
+                             headers={"Content-Disposition": f'attachment; filename="{jobs.RESULT_ZIP}"'})
+
+
 @app.post("/generate")
 async def generate_model(files: List[UploadFile] = File(...), _auth: None = Depends(_check_api_key)):
     """Accept uploaded CSV/JSON files, run the datamodeler, and return a ZIP with outputs.
 
     The ZIP contains `model.sql`, `catalog.json`, and (if generated) `erd.svg` and `erd.gv`.
     """
-    if not files:
-        raise HTTPException(status_code=400, detail="No files uploaded")
-
-    tmpdir = os.path.abspath("./.mcp_tmp")
-    os.makedirs(tmpdir, exist_ok=True)
-
-    # save uploaded files into tmpdir
-    saved_paths = []
-    for f in files:
-        fname = os.path.join(tmpdir, f.filename)
-        with open(fname, "wb") as out:
-            content = await f.read()
-            out.write(content)
-        saved_paths.append(fname)
-
-    # Run the LangGraph pipeline
-    result = run_datamodel_pipeline(tmpdir, tmpdir)
-    
-    if result.get("error"):
-        raise HTTPException(status_code=500, detail=f"Pipeline failed: {result['error']}")
-    
-    sql = result["sql"]
-    catalog = result["catalog"]
-    erd_svg = result.get("erd_svg")
-    erd_gv = result.get("erd_gv")
-
-    # package outputs into a zip in-memory
-    mem = io.BytesIO()
-    with zipfile.ZipFile(mem, mode="w", compression=zipfile.ZIP_DEFLATED) as z:
-        z.writestr("model.sql", sql)
-        z.writestr("catalog.json", json.dumps(catalog, indent=2))
-        if erd_svg and os.path.exists(erd_svg):
-            z.write(erd_svg, arcname="erd.svg")
-        if erd_gv and os.path.exists(erd_gv):
-            z.write(erd_gv, arcname="erd.gv")
-
-    mem.seek(0)
-
-    return StreamingResponse(mem, media_type="application/zip", headers={"Content-Disposition": "attachment; filename=datamodel_outputs.zip"})
+    job = await _create_job(files)
+    await job_manager.wait(job)
+    if job.status == jobs.FAILED:
+        raise HTTPException(status_code=500, detail=f"Pipeline failed: {job.error}")
+    return _zip_response(job)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(files: List[UploadFile] = File(...), _auth: None = Depends(_check_api_key)):
+    """Queue a pipeline run and return its id immediately."""
+    job = await _create_job(files)
+    return job.to_dict()
+
+
+def _get_job(job_id: str) -> jobs.Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str, _auth: None = Depends(_check_api_key)):
+    return _get_job(job_id).to_dict()
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str, _auth: None = Depends(_check_api_key)):
+    """Return the job's ZIP once it has succeeded (409 while it is still running)."""
+    job = _get_job(job_id)
+    if job.status in (jobs.QUEUED, jobs.RUNNING):
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.status == jobs.FAILED:
+        raise HTTPException(status_code=500, detail=f"Pipeline failed: {job.error}")
+    return _zip_response(job)
+
+
+@app.get("/cache/stats")
+async def cache_stats(_auth: None = Depends(_check_api_key)):
+    """Hit/miss counters and size of the pipeline result cache."""
+    if job_manager.result_cache is None:
+        return {"enabled": False}
+    return dict(job_manager.result_cache.stats(), enabled=True)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics(_auth: None = Depends(_check_api_key)):
+    """Per-node pipeline timings, counters and job/queue state in Prometheus format."""
+    running = sum(1 for j in job_manager.jobs.values() if j.status == jobs.RUNNING)
+    gauges = {
+        "datamodeler_jobs_running": (running, "Jobs currently running."),
+        "datamodeler_jobs_queued": (job_manager.active() - running, "Jobs waiting for a worker."),
+    }
+    if job_manager.warm_up_seconds is not None:
+        gauges["datamodeler_warm_up_seconds"] = (job_manager.warm_up_seconds,
+                                                 "Seconds spent warming the job workers at startup.")
+    if job_manager.result_cache is not None:
+        st = job_manager.result_cache.stats()
+        gauges.update({
+            "datamodeler_result_cache_hits": (st["hits"], "Result cache hits since startup."),
+            "datamodeler_result_cache_misses": (st["misses"], "Result cache misses since startup."),
+            "datamodeler_result_cache_bytes": (st["bytes"], "Bytes stored in the result cache."),
+        })
+    return PlainTextResponse(job_manager.metrics.render(gauges), media_type="text/plain; version=0.0.4")
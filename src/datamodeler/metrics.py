@@ -0,0 +1,190 @@
+"""Per-node pipeline instrumentation and Prometheus export.
+
+`instrument(name, fn)` wraps a LangGraph node so every call records wall time,
+CPU time, the process's peak RSS and whatever counters the node (or code it
+calls) reports through `add()`: rows and columns processed, FK candidate pairs
+evaluated. The numbers are returned in the node's state update under
+`metrics[name]`. With a `profile_dir` option each node call is also run under
+cProfile and dumped to `<profile_dir>/<run_id>/<node>.prof`. Only one profiler
+can be active per process, so profiled nodes run one at a time (parallel
+branches are serialized while profiling, and their timings exclude the wait).
+
+`PipelineMetrics` aggregates those per-run dicts in a long-running process (the
+MCP server) and renders them in the Prometheus text format.
+"""
+import cProfile
+import contextlib
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# counters reported by the node currently running on this thread
+_local = threading.local()
+
+# held by the node being profiled
+_PROFILE_LOCK = threading.Lock()
+
+COUNTERS = {
+    "rows": "Rows processed per node.",
+    "columns": "Columns processed per node.",
+    "fk_candidate_pairs": "FK candidate column pairs evaluated per node.",
+    "pk_candidate_combinations": "Composite PK column combinations checked per node.",
+}
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of this process's resident set size, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 2)
+
+
+def _children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def add(**counts: int):
+    """Add to the running node's counters; a no-op outside an instrumented node."""
+    current = getattr(_local, "counters", None)
+    if current is None:
+        return
+    for key, value in counts.items():
+        current[key] = current.get(key, 0) + int(value)
+
+
+def merge_metrics(current: Optional[Dict], update: Optional[Dict]) -> Dict:
+    """State reducer: parallel nodes each contribute their own entry."""
+    merged = dict(current or {})
+    merged.update(update or {})
+    return merged
+
+
+def _call(fn: Callable[[dict], dict], state: dict, profiler: Optional[cProfile.Profile]) -> Tuple[dict, bool]:
+    """Run the node, under `profiler` if given; returns its update and whether it was profiled."""
+    if profiler is None:
+        return fn(state), False
+    try:
+        profiler.enable()
+    except ValueError:
+        # another profiler is active (e.g. `python -m cProfile`); run unprofiled
+        return fn(state), False
+    try:
+        return fn(state), True
+    finally:
+        profiler.disable()
+
+
+def instrument(name: str, fn: Callable[[dict], dict]) -> Callable[[dict], dict]:
+    def node(state: dict) -> dict:
+        opts = state.get("options") or {}
+        profile_dir = opts.get("profile_dir")
+        profiler = cProfile.Profile() if profile_dir else None
+        with _PROFILE_LOCK if profiler is not None else contextlib.nullcontext():
+            _local.counters = {}
+            wall, cpu, children = time.perf_counter(), time.thread_time(), _children_cpu()
+            try:
+                update, profiled = _call(fn, state, profiler)
+            finally:
+                counters, _local.counters = _local.counters, None
+            # CPU of worker processes the node waited for is added via RUSAGE_CHILDREN
+            entry = {
+                "wall_seconds": round(time.perf_counter() - wall, 4),
+                "cpu_seconds": round(time.thread_time() - cpu + _children_cpu() - children, 4),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        entry.update({key: counters.get(key, 0) for key in COUNTERS})
+        if profiled:
+            run_dir = os.path.join(profile_dir, state.get("run_id") or "run")
+            os.makedirs(run_dir, exist_ok=True)
+            entry["profile"] = os.path.join(run_dir, name + ".prof")
+            profiler.dump_stats(entry["profile"])
+        update = dict(update or {})
+        update["metrics"] = {name: entry}
+        return update
+
+    node.__name__ = getattr(fn, "__name__", name)
+    node.__doc__ = fn.__doc__
+    return node
+
+
+# Upper bounds (seconds) of the node duration histogram.
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class _NodeAggregate:
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.wall = self.cpu = 0.0
+        self.peak_rss_mb = 0.0
+        self.counters = {key: 0 for key in COUNTERS}
+
+    def observe(self, entry: Dict):
+        wall = float(entry.get("wall_seconds", 0.0))
+        self.count += 1
+        self.wall += wall
+        self.cpu += float(entry.get("cpu_seconds", 0.0))
+        self.peak_rss_mb = max(self.peak_rss_mb, float(entry.get("peak_rss_mb") or 0.0))
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if wall <= bound:
+                self.buckets[i] += 1
+        for key in COUNTERS:
+            self.counters[key] += int(entry.get(key, 0))
+
+
+class PipelineMetrics:
+    """Thread-safe aggregate of node metrics and job outcomes across runs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes: Dict[str, _NodeAggregate] = {}
+        self._jobs: Dict[str, int] = {}
+
+    def observe_run(self, node_metrics: Optional[Dict[str, Dict]]):
+        with self._lock:
+            for name, entry in (node_metrics or {}).items():
+                self._nodes.setdefault(name, _NodeAggregate()).observe(entry)
+
+    def observe_job(self, status: str):
+        with self._lock:
+            self._jobs[status] = self._jobs.get(status, 0) + 1
+
+    def render(self, gauges: Optional[Dict[str, Tuple[float, str]]] = None) -> str:
+        """Prometheus text exposition; `gauges` adds `{name: (value, help)}` point-in-time values."""
+        lines: List[str] = []
+
+        def family(metric: str, kind: str, help_text: str):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+
+        with self._lock:
+            nodes = sorted(self._nodes.items())
+            family("datamodeler_node_duration_seconds", "histogram", "Wall time per pipeline node call.")
+            for name, agg in nodes:
+                for bound, n in zip(DURATION_BUCKETS, agg.buckets):
+                    lines.append(f'datamodeler_node_duration_seconds_bucket{{node="{name}",le="{bound}"}} {n}')
+                lines.append(f'datamodeler_node_duration_seconds_bucket{{node="{name}",le="+Inf"}} {agg.count}')
+                lines.append(f'datamodeler_node_duration_seconds_sum{{node="{name}"}} {agg.wall:.6f}')
+                lines.append(f'datamodeler_node_duration_seconds_count{{node="{name}"}} {agg.count}')
+            family("datamodeler_node_cpu_seconds_total", "counter", "CPU time per pipeline node.")
+            for name, agg in nodes:
+                lines.append(f'datamodeler_node_cpu_seconds_total{{node="{name}"}} {agg.cpu:.6f}')
+            family("datamodeler_node_peak_rss_megabytes", "gauge", "Highest process peak RSS seen after a node.")
+            for name, agg in nodes:
+                lines.append(f'datamodeler_node_peak_rss_megabytes{{node="{name}"}} {agg.peak_rss_mb}')
+            for key, help_text in COUNTERS.items():
+                metric = f"datamodeler_node_{key}_total"
+                family(metric, "counter", help_text)
+                for name, agg in nodes:
+                    lines.append(f'{metric}{{node="{name}"}} {agg.counters[key]}')
+            family("datamodeler_jobs_total", "counter", "Finished jobs by outcome.")
+            for status, n in sorted(self._jobs.items()):
+                lines.append(f'datamodeler_jobs_total{{status="{status}"}} {n}')
+        for metric, (value, help_text) in sorted((gauges or {}).items()):
+            family(metric, "gauge", help_text)
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,358 @@
+"""Sampling-based fast profiling.
+
+`sample_table` draws a reproducible sample of about `rows` rows from a
+DataFrame or a lazy `TableHandle`, stratified by part file (each part gets
+rows in proportion to its size):
+
+- Parquet: uniformly random rows, reading only the row groups that hold them;
+- CSV and JSON lines: the file is cut into `strata` equal byte ranges and a
+  block of whole lines is read at a seeded offset in each; the table's row
+  count is estimated from the bytes per sampled line;
+- small files, JSON arrays, CSVs with quoted line breaks and Arrow files: one
+  chunked pass keeping a uniform (bottom-k) reservoir of rows.
+
+`profile_sample` profiles the sample exactly and extrapolates to the table:
+null counts and length histograms scale with the sampling fraction (the
+longest length is the sample's) and distinct counts use the Duj1
+estimator of Haas et al. (1995), which is exact for a complete sample, gives
+the row count for an all-distinct sample and the sample's count when no value
+occurs only once.
+
+Keys found on the sample carry a confidence. For a primary key it is the
+probability that the sample would have shown a duplicate if at least
+`tolerance` of the rows were duplicated; for a foreign key, the probability
+that the true containment ratio is above `min_ratio` (normal approximation of
+the matched count). `confirm_primary_keys` / `confirm_foreign_keys` re-check
+only the chosen keys on the full data, FKs for both containment and parent
+uniqueness.
+"""
+import io
+import math
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import columnar
+from . import keys
+from . import metrics
+from . import stats
+from . import streaming as streaming_mod
+from .stats import ColumnStats
+
+DEFAULT_SAMPLE_ROWS = 100_000
+DEFAULT_STRATA = 32
+# fraction of duplicated rows a sampled PK's confidence is stated against
+DEFAULT_TOLERANCE = 0.001
+# files this small are read whole: sampling them would not save any work
+SMALL_FILE_BYTES = 4 << 20
+
+
+@dataclass
+class SampleInfo:
+    rows: int
+    total_rows: int
+    # False when `total_rows` is estimated from the bytes per sampled line
+    exact_total: bool
+    method: str
+
+    @property
+    def fraction(self) -> float:
+        return min(1.0, self.rows / self.total_rows) if self.total_rows else 1.0
+
+    @property
+    def complete(self) -> bool:
+        return self.exact_total and self.rows >= self.total_rows
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _reservoir(frames: Iterator[pd.DataFrame], n: int, rng: np.random.Generator) -> Tuple[pd.DataFrame, int]:
+    """Uniform sample of `n` rows in one pass (smallest random priorities), in file order."""
+    kept, prio, total = None, np.empty(0), 0
+    for chunk in frames:
+        chunk = chunk.set_axis(np.arange(total, total + len(chunk)))
+        total += len(chunk)
+        kept = chunk if kept is None else pd.concat([kept, chunk])
+        prio = np.concatenate([prio, rng.random(len(chunk))])
+        if len(kept) > n:
+            top = np.sort(np.argpartition(prio, n - 1)[:n])
+            kept, prio = kept.iloc[top], prio[top]
+    if kept is None:
+        return pd.DataFrame(), 0
+    return kept.reset_index(drop=True), total
+
+
+def _block_sample(path: str, n: int, rng: np.random.Generator,
+                  strata: int) -> Optional[Tuple[pd.DataFrame, int]]:
+    """Blocks of whole lines from `strata` byte ranges; None if the file can't be split on newlines."""
+    csv = path.lower().endswith(".csv")
+    size = os.path.getsize(path)
+    per_block = max(1, math.ceil(n / strata))
+    lines: List[bytes] = []
+    with open(path, "rb") as f:
+        header = f.readline() if csv else b""
+        if not csv and f.read(64).lstrip().startswith(b"["):
+            return None  # a JSON array, not JSON lines
+        start = len(header)
+        span = (size - start) / strata
+        for i in range(strata):
+            lo, hi = start + int(i * span), start + int((i + 1) * span)
+            # a seeded offset in the first half of the range leaves room for the block
+            offset = lo + int(rng.random() * span / 2)
+            f.seek(offset)
+            if offset > start:
+                f.readline()  # finish the line the offset landed in
+            block = 0
+            while block < per_block and f.tell() < hi:
+                line = f.readline()
+                if not line:
+                    break
+                if line.strip():
+                    lines.append(line if line.endswith(b"\n") else line + b"\n")
+                    block += 1
+    if not lines:
+        return None
+    if csv and any(line.count(b'"') % 2 for line in lines):
+        return None  # a quoted field spans lines: line starts aren't row starts
+    sampled_bytes = sum(len(line) for line in lines)
+    total = max(len(lines), int(round((size - len(header)) * len(lines) / sampled_bytes)))
+    data = io.BytesIO(header + b"".join(lines))
+    df = pd.read_csv(data) if csv else pd.read_json(data, lines=True)
+    return df, total
+
+
+def _sample_file(path: str, n: int, rng: np.random.Generator, strata: int,
+                 chunk_rows: int) -> Tuple[pd.DataFrame, SampleInfo]:
+    lower = path.lower()
+    if os.path.getsize(path) > SMALL_FILE_BYTES:
+        if columnar.is_parquet(path):
+            total = columnar.num_rows(path)
+            if total > n:
+                rows = np.sort(rng.choice(total, size=n, replace=False))
+                return columnar.take_rows(path, rows), SampleInfo(n, total, True, "row_groups")
+        elif lower.endswith((".csv", ".json")):
+            got = _block_sample(path, n, rng, strata)
+            if got is not None:
+                df, total = got
+                return df, SampleInfo(len(df), total, False, "blocks")
+    df, total = _reservoir(streaming_mod.iter_file_chunks(path, chunk_rows), n, rng)
+    return df, SampleInfo(len(df), total, True, "full" if len(df) >= total else "reservoir")
+
+
+def sample_table(table, rows: int = DEFAULT_SAMPLE_ROWS, seed: int = 0,
+                 strata: int = DEFAULT_STRATA) -> Tuple[pd.DataFrame, SampleInfo]:
+    """A reproducible sample of about `rows` rows of a DataFrame or lazy table."""
+    if not streaming_mod.is_lazy(table):
+        if len(table) <= rows:
+            return table, SampleInfo(len(table), len(table), True, "full")
+        sample = table.sample(rows, random_state=seed).sort_index()
+        return sample, SampleInfo(rows, len(table), True, "rows")
+    sizes = [os.path.getsize(p) for p in table.parts]
+    frames, infos = [], []
+    for i, (part, size) in enumerate(zip(table.parts, sizes)):
+        # stratified by part: rows in proportion to the part's share of the bytes
+        n = max(1, int(round(rows * size / sum(sizes)))) if sum(sizes) else rows
+        df, info = _sample_file(part, n, np.random.default_rng([seed, i]), strata, table.chunk_rows)
+        frames.append(df)
+        infos.append(info)
+    sample = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    methods = sorted({info.method for info in infos})
+    return sample, SampleInfo(len(sample), sum(info.total_rows for info in infos),
+                              all(info.exact_total for info in infos), "+".join(methods))
+
+
+def estimate_distinct(distinct: int, singletons: int, sample_values: int, total_values: int) -> int:
+    """Duj1 estimate of a column's distinct count from a sample.
+
+    `distinct` and `singletons` (values seen exactly once) are counted over
+    `sample_values` non-null sampled values out of `total_values`.
+    """
+    if not sample_values or sample_values >= total_values:
+        return distinct
+    q = sample_values / total_values
+    estimate = distinct / (1.0 - (1.0 - q) * singletons / sample_values)
+    return int(round(min(max(estimate, distinct), total_values)))
+
+
+def _scale_histogram(hist: Dict[int, int], total: int) -> Dict[int, int]:
+    """Scale bucket counts to sum to `total`, rounding by largest remainder."""
+    n = sum(hist.values())
+    if not n:
+        return dict(hist)
+    exact = {k: v * total / n for k, v in hist.items()}
+    out = {k: int(x) for k, x in exact.items()}
+    for k in sorted(exact, key=lambda k: out[k] - exact[k])[:total - sum(out.values())]:
+        out[k] += 1
+    return out
+
+
+def profile_sample(name: str, table, rows: int = DEFAULT_SAMPLE_ROWS, seed: int = 0
+                   ) -> Tuple[Dict[str, ColumnStats], pd.DataFrame, SampleInfo]:
+    """Column statistics of `table` extrapolated from a sample, with the sample itself.
+
+    Row and null counts and the length histogram are scaled up and `nunique`
+    is estimated; `values`, min/max, `max_len` and SQL types describe the sample.
+    """
+    sample, info = sample_table(table, rows, seed)
+    col_stats = stats.profile_table(name, sample)
+    if info.complete:
+        return col_stats, sample, info
+    scale = info.total_rows / max(1, info.rows)
+    for c, st in col_stats.items():
+        if st.nunique is None:
+            continue
+        counts = sample[c].dropna().astype(str).value_counts(sort=False)
+        sampled = st.non_null
+        st.rows = info.total_rows
+        st.nnulls = int(round(st.nnulls * scale))
+        st.nunique = estimate_distinct(st.nunique, int((counts == 1).sum()), sampled, st.non_null)
+        if st.length_hist is not None:
+            st.length_hist = _scale_histogram(st.length_hist, st.non_null)
+    return col_stats, sample, info
+
+
+def profile_samples(tables: Dict[str, object], rows: int = DEFAULT_SAMPLE_ROWS, seed: int = 0
+                    ) -> Tuple[Dict[str, Dict[str, ColumnStats]], Dict[str, pd.DataFrame], Dict[str, SampleInfo]]:
+    """`profile_sample` for every table: (column stats, samples, sample infos)."""
+    col_stats, samples, infos = {}, {}, {}
+    for t, table in tables.items():
+        col_stats[t], samples[t], infos[t] = profile_sample(t, table, rows, seed)
+    return col_stats, samples, infos
+
+
+def pk_confidence(sample: pd.DataFrame, pk, info: SampleInfo, tolerance: float = DEFAULT_TOLERANCE) -> float:
+    """Confidence that `pk` has fewer than `tolerance` duplicated rows in the full table.
+
+    Zero when the sample already has nulls or duplicates in the key. Each
+    duplicated pair lands wholly in a uniform sample with probability about
+    `fraction ** 2`, so with `tolerance * rows / 2` pairs the sample misses all
+    of them with probability `(1 - fraction ** 2) ** pairs`.
+    """
+    cols = keys.pk_columns(pk)
+    if not cols or not all(c in sample.columns for c in cols):
+        return 0.0
+    key = sample[cols]
+    if key.isna().any().any() or key.duplicated().any():
+        return 0.0
+    q = info.fraction
+    if q >= 1.0:
+        return 1.0
+    pairs = tolerance * info.total_rows / 2
+    return float(-math.expm1(pairs * math.log1p(-q * q)))
+
+
+def _normal_cdf(z: float) -> float:
+    return 0.5 * (1.0 + math.erf(z / math.sqrt(2.0)))
+
+
+def discover_foreign_keys(index: Dict[str, Dict[str, ColumnStats]], min_ratio: float = 0.6,
+                          parent_uniqueness: float = 0.95, restrict_to=None) -> List[Dict]:
+    """FKs from sampled statistics, each with an estimated `match_ratio` and a `confidence`.
+
+    The child's sampled distinct values are matched against the parent's; as
+    the parent sample holds only part of the parent's values, the observed
+    ratio is divided by that coverage (sampled / estimated distinct count).
+    """
+    fks = []
+    pairs = 0
+    for child, parent in keys.candidate_pairs(index, min_ratio, parent_uniqueness, restrict_to):
+        pairs += 1
+        k = len(child.values)
+        if not k or not parent.values:
+            continue
+        coverage = min(1.0, len(parent.values) / max(1, parent.nunique or 0))
+        p = len(child.values & parent.values) / k
+        ratio = min(1.0, p / coverage)
+        if ratio <= min_ratio:
+            continue
+        # Agresti-Coull variance (sane at p = 1) of the matched fraction, with a
+        # finite-population correction when only the child is sampled
+        fpc = max(0.0, (child.nunique - k) / max(1, child.nunique - 1)) if child.nunique else 0.0
+        adjusted = (p * k + 2) / (k + 4)
+        variance = adjusted * (1 - adjusted) / (k + 4) * (fpc if coverage >= 1.0 else 1.0)
+        se = math.sqrt(variance) / coverage
+        confidence = 1.0 if se == 0 else _normal_cdf((ratio - min_ratio) / se)
+        fks.append({
+            "child_table": child.table,
+            "child_col": child.column,
+            "parent_table": parent.table,
+            "parent_col": parent.column,
+            "match_ratio": ratio,
+            "confidence": round(confidence, 4)
+        })
+    metrics.add(fk_candidate_pairs=pairs)
+    return fks
+
+
+def _full_columns(table, columns: List[str]) -> pd.DataFrame:
+    if streaming_mod.is_lazy(table):
+        chunks = list(table.iter_chunks(columns=columns))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+    return table[columns]
+
+
+def confirm_primary_keys(tables: Dict[str, object], pks: Dict[str, object],
+                         confidence: Dict[str, Dict]) -> Dict[str, object]:
+    """Check the chosen keys on the full tables; keys that fail are dropped.
+
+    `confidence` entries are updated in place (`confidence` 1 or 0, `confirmed`).
+    """
+    out = {}
+    for t, pk in pks.items():
+        key = _full_columns(tables[t], keys.pk_columns(pk))
+        ok = not key.isna().any().any() and not key.duplicated().any()
+        confidence.setdefault(t, {"columns": keys.pk_columns(pk)})
+        confidence[t].update(confidence=1.0 if ok else 0.0, confirmed=ok)
+        if ok:
+            out[t] = pk
+    return out
+
+
+def _distinct_strings(tables: Dict[str, object], columns: Dict[str, set]
+                      ) -> Tuple[Dict[Tuple[str, str], set], Dict[Tuple[str, str], int]]:
+    """Distinct stringified values and non-null counts of `columns` ({table: {column}}), reading each table once."""
+    values, non_null = {}, {}
+    for t, cols in columns.items():
+        cols = sorted(cols)
+        table = tables[t]
+        frames = table.iter_chunks(columns=cols) if streaming_mod.is_lazy(table) else [table[cols]]
+        vals = {c: set() for c in cols}
+        counts = dict.fromkeys(cols, 0)
+        for frame in frames:
+            for c in cols:
+                s = frame[c].dropna()
+                counts[c] += len(s)
+                vals[c].update(pd.Series(s.unique()).astype(str).tolist())
+        values.update({(t, c): v for c, v in vals.items()})
+        non_null.update({(t, c): n for c, n in counts.items()})
+    return values, non_null
+
+
+def confirm_foreign_keys(tables: Dict[str, object], fks: List[Dict], min_ratio: float = 0.6,
+                         parent_uniqueness: float = 0.95) -> List[Dict]:
+    """Recompute each sampled FK on the full columns.
+
+    An FK is kept when its `match_ratio` is above `min_ratio` and its parent
+    column's distinct values are at least `parent_uniqueness` of its non-null
+    rows, the same rules the exact mode applies.
+    """
+    needed: Dict[str, set] = {}
+    for fk in fks:
+        needed.setdefault(fk["child_table"], set()).add(fk["child_col"])
+        needed.setdefault(fk["parent_table"], set()).add(fk["parent_col"])
+    values, non_null = _distinct_strings(tables, needed)
+    out = []
+    for fk in fks:
+        child = values[(fk["child_table"], fk["child_col"])]
+        parent_key = (fk["parent_table"], fk["parent_col"])
+        parent = values[parent_key]
+        if not parent or len(parent) < parent_uniqueness * non_null[parent_key]:
+            continue
+        ratio = len(child & parent) / len(child) if child else 0.0
+        if ratio > min_ratio:
+            out.append(dict(fk, match_ratio=ratio, confidence=1.0, confirmed=True))
+    return out
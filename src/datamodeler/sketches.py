@@ -0,0 +1,184 @@
+"""Fixed-size probabilistic sketches used for approximate key discovery.
+
+All sketches work on 64-bit hashes of the stringified values, so two columns
+match exactly when their string forms match — the same rule as the exact
+foreign-key check.
+"""
+import math
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+_HASH_KEY = "datamodeler-hash"  # pandas requires a 16-byte key
+_TWO_64 = float(2 ** 64)
+
+
+def hash_values(values) -> np.ndarray:
+    """Hash stringified values to uint64 with a stable, process-independent key."""
+    arr = np.asarray(values, dtype=object)
+    if arr.size == 0:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_array(arr, hash_key=_HASH_KEY, categorize=True)
+
+
+def iter_hash_chunks(s: pd.Series, chunk_rows: int = 1_000_000) -> Iterable[np.ndarray]:
+    """Yield hashes of the non-null, stringified values of `s` in bounded chunks."""
+    for start in range(0, len(s), chunk_rows):
+        part = s.iloc[start:start + chunk_rows].dropna()
+        if len(part):
+            yield hash_values(part.astype(str).to_numpy())
+
+
+class KMVSketch:
+    """Bottom-k (K minimum values) sketch.
+
+    Keeps the `k` smallest distinct hashes seen. They form a uniform sample of the
+    distinct values and give an unbiased distinct-count estimate.
+    """
+
+    def __init__(self, k: int = 1024):
+        self.k = k
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def update(self, hashes: np.ndarray):
+        if hashes.size == 0:
+            return
+        if not self.exact:
+            hashes = hashes[hashes < self.hashes[-1]]
+        # Only the smallest few values can enter the sketch; avoid sorting the chunk.
+        m = 4 * self.k
+        if hashes.size > m:
+            head = np.unique(np.partition(hashes, m)[:m])
+            if head.size >= self.k:
+                hashes = head
+        merged = np.union1d(self.hashes, hashes)
+        self.hashes = merged[:self.k]
+
+    def merge(self, other: "KMVSketch") -> "KMVSketch":
+        out = KMVSketch(min(self.k, other.k))
+        out.update(np.union1d(self.hashes, other.hashes))
+        return out
+
+    @property
+    def exact(self) -> bool:
+        """True while fewer than `k` distinct values have been seen."""
+        return len(self.hashes) < self.k
+
+    def cardinality(self) -> float:
+        if self.exact:
+            return float(len(self.hashes))
+        kth = float(self.hashes[-1]) / _TWO_64
+        return (self.k - 1) / kth if kth > 0 else float(len(self.hashes))
+
+    def relative_error(self) -> float:
+        """One standard error of `cardinality()` relative to the estimate."""
+        if self.exact:
+            return 0.0
+        return 1.0 / math.sqrt(max(1, self.k - 2))
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with `2 ** precision` one-byte registers.
+
+    Mergeable (register-wise max), so counts from separately profiled shards
+    combine exactly as if the data had been seen in one pass.
+    """
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray):
+        if hashes.size == 0:
+            return
+        p = np.uint64(self.precision)
+        idx = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        rest = hashes << p
+        # leading zeros of the remaining bits, from an exact bit length of each 32-bit half
+        hi = (rest >> np.uint64(32)).astype(np.float64)
+        lo = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        bits = np.where(hi > 0, np.frexp(hi)[1] + 32, np.frexp(lo)[1])
+        rank = np.minimum(64 - bits, 64 - self.precision) + 1
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        out = HyperLogLog(self.precision)
+        out.registers = np.maximum(self.registers, other.registers)
+        return out
+
+    def cardinality(self) -> float:
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1.0 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # linear counting is more accurate for small cardinalities
+            return m * math.log(m / zeros)
+        return estimate
+
+    def relative_error(self) -> float:
+        """One standard error of `cardinality()` relative to the estimate."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 64-bit hashes using double hashing."""
+
+    def __init__(self, num_bits: int = 1 << 23, num_hashes: int = 4):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = np.zeros((num_bits + 7) // 8, dtype=np.uint8)
+        # fill-based false-positive rate, computed once after the last `add`
+        self._fpr: Optional[float] = None
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.num_hashes, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + i * h2[None, :]) % np.uint64(self.num_bits)).ravel()
+
+    def add(self, hashes: np.ndarray):
+        if hashes.size == 0:
+            return
+        pos = self._positions(hashes)
+        self._fpr = None
+        np.bitwise_or.at(self.bits, (pos >> np.uint64(3)).astype(np.intp),
+                         (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8)))
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        if hashes.size == 0:
+            return np.zeros(0, dtype=bool)
+        pos = self._positions(hashes)
+        hit = (self.bits[(pos >> np.uint64(3)).astype(np.intp)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1
+        return hit.reshape(self.num_hashes, -1).all(axis=0)
+
+    def false_positive_rate(self) -> float:
+        """Observed false-positive probability given the current fill ratio."""
+        if self._fpr is None:
+            filled = int(np.unpackbits(self.bits).sum()) / float(self.num_bits)
+            self._fpr = filled ** self.num_hashes
+        return self._fpr
+
+
+def estimate_containment(child: KMVSketch, parent: BloomFilter, z: float = 1.96,
+                         child_cardinality: Optional[float] = None):
+    """Estimate |child ∩ parent| / |child| from a child KMV sample and a parent Bloom filter.
+
+    Returns `(estimate, error_bound)` where the bound is a ~95% half-width that
+    accounts for sampling error and Bloom-filter false positives.
+    """
+    sample = child.hashes
+    n = len(sample)
+    if n == 0:
+        return 0.0, 0.0
+    fpr = min(parent.false_positive_rate(), 0.999)
+    observed = float(parent.contains(sample).mean())
+    estimate = min(1.0, max(0.0, (observed - fpr) / (1.0 - fpr)))
+    population = child_cardinality if child_cardinality is not None else child.cardinality()
+    fpc = 0.0 if child.exact else max(0.0, (population - n) / max(1.0, population - 1))
+    variance = observed * (1.0 - observed) / n * fpc + fpr * (1.0 - fpr) / n
+    bound = min(1.0, z * math.sqrt(variance) / (1.0 - fpr))
+    return estimate, bound
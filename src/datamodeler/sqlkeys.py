@@ -0,0 +1,237 @@
+"""Out-of-core key detection in an embedded SQLite database.
+
+`KeyStore` bulk-loads tables chunk by chunk into a database file, storing every
+value as the string the in-memory checks compare (`astype(str)`, NULL for
+missing), so results match `detect_primary_keys` / `detect_foreign_keys`
+without holding distinct values in Python:
+
+- per-column row, null and distinct counts come from one `COUNT(DISTINCT)` scan
+  per table and are kept in the database, so unchanged tables are not rescanned;
+- columns that may be referenced get an index;
+- composite keys are checked with `SELECT DISTINCT` over the combination, first
+  on a systematic sample of rows;
+- containment is an anti-join of a child column's distinct values against the
+  parent's index, with all candidate parents of one child column counted in
+  the same scan.
+"""
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from . import keys
+from . import metrics
+from .stats import ColumnStats, dtype_kind
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def _q(name: str) -> str:
+    """Quote an identifier."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _iter_frames(table, chunk_rows: int):
+    if hasattr(table, "iter_chunks"):
+        yield from table.iter_chunks()
+        return
+    for start in range(0, len(table), chunk_rows):
+        yield table.iloc[start:start + chunk_rows]
+
+
+class KeyStore:
+    """Tables loaded into a SQLite file, with cached per-column counts.
+
+    Each thread gets its own connection to the file, so the PK and FK nodes of
+    the pipeline can query it concurrently; writes are serialized.
+    """
+
+    def __init__(self, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._conns: List[sqlite3.Connection] = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS _columns (
+                tbl TEXT, col TEXT, pos INTEGER, dtype TEXT,
+                rows INTEGER, nnulls INTEGER, nunique INTEGER, indexed INTEGER DEFAULT 0,
+                PRIMARY KEY (tbl, col));
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # one connection per thread; check_same_thread is off only so `close` can reach them all
+            conn = sqlite3.connect(self.path, timeout=600, isolation_level=None, check_same_thread=False)
+            # a scratch database: durability is not needed, bulk-load speed is
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+            with self._write_lock:
+                self._conns.append(conn)
+        return conn
+
+    def close(self):
+        with self._write_lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns = []
+        self._local = threading.local()
+
+    def tables(self) -> List[str]:
+        return [r[0] for r in self._conn().execute("SELECT DISTINCT tbl FROM _columns ORDER BY tbl")]
+
+    def drop(self, name: str):
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute(f"DROP TABLE IF EXISTS {_q(name)}")
+            conn.execute("DELETE FROM _columns WHERE tbl = ?", (name,))
+
+    def load(self, name: str, table):
+        """(Re)load one DataFrame or lazy TableHandle and count its columns."""
+        self.drop(name)
+        with self._write_lock:
+            conn = self._conn()
+            columns: List[str] = []
+            dtypes: Dict[str, str] = {}
+            for frame in _iter_frames(table, self.chunk_rows):
+                if not columns:
+                    columns = list(frame.columns)
+                    conn.execute(f"CREATE TABLE {_q(name)} ({', '.join(_q(c) for c in columns)})")
+                cols = []
+                for c in columns:
+                    s = frame[c] if c in frame.columns else pd.Series([None] * len(frame), index=frame.index)
+                    dtype = str(s.dtype)
+                    # JSON chunks may disagree on a column's dtype; mixed means object
+                    dtypes[c] = dtype if dtypes.get(c, dtype) == dtype else "object"
+                    vals = s.astype(str).to_numpy(dtype=object)
+                    vals[s.isna().to_numpy()] = None
+                    cols.append(vals)
+                placeholders = ", ".join("?" * len(columns))
+                conn.execute("BEGIN")
+                conn.executemany(f"INSERT INTO {_q(name)} VALUES ({placeholders})", zip(*cols))
+                conn.execute("COMMIT")
+            if not columns:
+                return
+            # every column's counts in a single scan
+            exprs = ", ".join(f"COUNT({_q(c)}), COUNT(DISTINCT {_q(c)})" for c in columns)
+            row = conn.execute(f"SELECT COUNT(*), {exprs} FROM {_q(name)}").fetchone()
+            rows = row[0]
+            conn.executemany("INSERT INTO _columns (tbl, col, pos, dtype, rows, nnulls, nunique) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [(name, c, i, dtypes[c], rows, rows - row[1 + 2 * i], row[2 + 2 * i])
+                              for i, c in enumerate(columns)])
+
+    def load_all(self, tables: Dict[str, object], only: Optional[Set[str]] = None):
+        """Load `tables` (just `only` when given, plus any not stored yet) and drop the rest."""
+        stored = set(self.tables())
+        for t in stored - set(tables):
+            self.drop(t)
+        for t, table in tables.items():
+            if only is None or t in only or t not in stored:
+                self.load(t, table)
+
+    def column_stats(self, column_stats: Optional[Dict[str, Dict[str, ColumnStats]]] = None
+                     ) -> Dict[str, Dict[str, ColumnStats]]:
+        """Exact row/null/distinct counts as `ColumnStats` (no values).
+
+        dtype, min/max and lengths are taken from `column_stats` when given.
+        """
+        out: Dict[str, Dict[str, ColumnStats]] = {}
+        for tbl, col, dtype, rows, nnulls, nunique in self._conn().execute(
+                "SELECT tbl, col, dtype, rows, nnulls, nunique FROM _columns ORDER BY tbl, pos"):
+            ref = ((column_stats or {}).get(tbl) or {}).get(col)
+            if ref is not None:
+                dtype = ref.dtype
+            st = ColumnStats(table=tbl, column=col, dtype=dtype, kind=dtype_kind(dtype),
+                             rows=rows, nnulls=nnulls, nunique=nunique)
+            if ref is not None:
+                st.min, st.max, st.min_len, st.max_len = ref.min, ref.max, ref.min_len, ref.max_len
+                st.sample, st.types = ref.sample, ref.types
+            out.setdefault(tbl, {})[col] = st
+        if column_stats:
+            out = {t: out[t] for t in column_stats if t in out}
+        return out
+
+    def _ensure_index(self, table: str, column: str):
+        conn = self._conn()
+        row = conn.execute("SELECT indexed, pos FROM _columns WHERE tbl = ? AND col = ?",
+                           (table, column)).fetchone()
+        if row is None:
+            raise KeyError(f"{table}.{column} is not loaded")
+        if row[0]:
+            return
+        # named by column position: `ix_<table>_<column>` collides (`a_b`.`c` vs `a`.`b_c`),
+        # and a digits-only suffix after the last `_` can't
+        name = f"ix_{table}_{row[1]}"
+        with self._write_lock:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {_q(name)} "
+                         f"ON {_q(table)} ({_q(column)})")
+            conn.execute("UPDATE _columns SET indexed = 1 WHERE tbl = ? AND col = ?", (table, column))
+
+    def is_unique(self, table: str, combo: Tuple[str, ...], rows: int, sample_rows: int = 10_000) -> bool:
+        """Whether `combo` has no duplicate rows; a systematic sample is checked first."""
+        cols = ", ".join(_q(c) for c in combo)
+        conn = self._conn()
+        if rows > 2 * sample_rows:
+            stride = rows // sample_rows
+            n, distinct = conn.execute(
+                f"SELECT COUNT(*), (SELECT COUNT(*) FROM (SELECT DISTINCT {cols} FROM {_q(table)} "
+                f"WHERE rowid % {stride} = 0)) FROM {_q(table)} WHERE rowid % {stride} = 0").fetchone()
+            if distinct < n:
+                return False
+        distinct = conn.execute(f"SELECT COUNT(*) FROM (SELECT DISTINCT {cols} FROM {_q(table)})").fetchone()[0]
+        return distinct == rows
+
+    def composite_keys(self, table: str, col_stats: Dict[str, ColumnStats], max_size: int = 4,
+                       limit: int = 1) -> List[Tuple[str, ...]]:
+        cands = keys.composite_key_candidates(col_stats, max_size)
+        if len(cands) < 2:
+            return []
+        rows = cands[0].rows
+        return keys.lattice_keys(cands, lambda combo: self.is_unique(table, combo, rows), max_size, limit)
+
+    def unmatched_counts(self, child: ColumnStats, parents: List[ColumnStats]) -> Tuple[int, List[int]]:
+        """Distinct non-null child values, and how many of them each parent lacks (one scan)."""
+        for p in parents:
+            self._ensure_index(p.table, p.column)
+        anti = ", ".join(f"SUM(NOT EXISTS (SELECT 1 FROM {_q(p.table)} WHERE {_q(p.column)} = d.v))"
+                         for p in parents)
+        row = self._conn().execute(
+            f"SELECT COUNT(*), {anti} FROM (SELECT DISTINCT {_q(child.column)} AS v FROM {_q(child.table)} "
+            f"WHERE {_q(child.column)} IS NOT NULL) d").fetchone()
+        return row[0], [int(v or 0) for v in row[1:]]
+
+    def discover_foreign_keys(self, index: Dict[str, Dict[str, ColumnStats]], min_ratio: float = 0.6,
+                              parent_uniqueness: float = 0.95,
+                              restrict_to: Optional[Set[str]] = None) -> List[Dict]:
+        """Same candidates, ratios and order as `keys.discover_foreign_keys`."""
+        groups: List[Tuple[ColumnStats, List[ColumnStats]]] = []
+        pairs = 0
+        for child, parent in keys.candidate_pairs(index, min_ratio, parent_uniqueness, restrict_to):
+            pairs += 1
+            if groups and groups[-1][0] is child:
+                groups[-1][1].append(parent)
+            else:
+                groups.append((child, [parent]))
+        metrics.add(fk_candidate_pairs=pairs)
+        fks = []
+        for child, parents in groups:
+            total, unmatched = self.unmatched_counts(child, parents)
+            if not total:
+                continue
+            for parent, missing in zip(parents, unmatched):
+                ratio = (total - missing) / total
+                if ratio > min_ratio:
+                    fks.append({
+                        "child_table": child.table,
+                        "child_col": child.column,
+                        "parent_table": parent.table,
+                        "parent_col": parent.column,
+                        "match_ratio": ratio
+                    })
+        return fks
@@ -0,0 +1,156 @@
+"""Whole-column SQL type inference.
+
+`profile_values` summarizes a column (or one chunk of it) as a `TypeProfile`:
+which SQL types every value fits (boolean, integer, decimal, float, date,
+timestamp), the integer range and the decimal precision and scale. Profiles of
+chunks `merge`, so the streaming profiler gets the same answer as a full scan;
+`sql_type` then picks the narrowest type that fits all of them.
+
+String columns are checked with vectorized regular expressions (Arrow compute
+kernels for Arrow-backed strings) on their distinct values. Each pattern is
+tried on a small sample first, so a pattern that fails is usually ruled out
+without a pass over the whole column.
+"""
+from dataclasses import dataclass, fields
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+INT32_MAX = 2 ** 31 - 1
+INT64_MAX = 2 ** 63 - 1
+MAX_DECIMAL_PRECISION = 38
+SAMPLE_SIZE = 1000
+
+INT_RE = r"[+-]?(?:0|[1-9][0-9]*)"
+DECIMAL_RE = r"[+-]?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?"
+DATE_RE = r"[0-9]{4}-[0-9]{2}-[0-9]{2}"
+TIMESTAMP_RE = DATE_RE + r"(?:[T ][0-9]{2}:[0-9]{2}(?::[0-9]{2}(?:\.[0-9]+)?)?(?:Z|[+-][0-9]{2}:?[0-9]{2})?)?"
+BOOL_WORDS = ("true", "false", "t", "f", "yes", "no", "y", "n")
+
+
+@dataclass
+class TypeProfile:
+    """Which SQL types fit every value seen so far (vacuously all, for no values)."""
+    values: int = 0
+    fits_bool: bool = True
+    fits_int: bool = True
+    fits_decimal: bool = True
+    fits_float: bool = True
+    fits_date: bool = True
+    fits_timestamp: bool = True
+    min_int: Optional[int] = None
+    max_int: Optional[int] = None
+    # widest integer part and fractional part seen among decimal values
+    int_digits: int = 0
+    scale: int = 0
+
+    def merge(self, other: "TypeProfile") -> "TypeProfile":
+        out = TypeProfile(values=self.values + other.values)
+        for f in fields(self):
+            if f.name.startswith("fits_"):
+                setattr(out, f.name, getattr(self, f.name) and getattr(other, f.name))
+        ints = [v for v in (self.min_int, other.min_int) if v is not None]
+        out.min_int = min(ints) if ints else None
+        ints = [v for v in (self.max_int, other.max_int) if v is not None]
+        out.max_int = max(ints) if ints else None
+        out.int_digits = max(self.int_digits, other.int_digits)
+        out.scale = max(self.scale, other.scale)
+        return out
+
+
+def _only(values: int, **fits: bool) -> TypeProfile:
+    flags = {f.name: False for f in fields(TypeProfile) if f.name.startswith("fits_")}
+    flags.update(fits)
+    return TypeProfile(values=values, **flags)
+
+
+def _all_match(s: pd.Series, pattern: str) -> bool:
+    if len(s) > SAMPLE_SIZE and not s.iloc[:SAMPLE_SIZE].str.fullmatch(pattern).all():
+        return False
+    return bool(s.str.fullmatch(pattern).all())
+
+
+def _digits(n: int) -> int:
+    return len(str(abs(n)))
+
+
+def _profile_ints(values: int, lo: int, hi: int) -> TypeProfile:
+    p = _only(values, fits_int=True, fits_decimal=True, fits_float=True)
+    p.min_int, p.max_int = lo, hi
+    p.int_digits = max(_digits(lo), _digits(hi))
+    return p
+
+
+def _profile_strings(s: pd.Series) -> TypeProfile:
+    p = _only(len(s))
+    if _all_match(s, DECIMAL_RE):
+        p.fits_decimal = p.fits_float = True
+        unsigned = s.str.lstrip("+-")
+        dot = unsigned.str.find(".")
+        lengths = unsigned.str.len()
+        has_dot = dot >= 0
+        p.int_digits = int(lengths.where(~has_dot, dot).max())
+        p.scale = int((lengths - dot - 1).where(has_dot, 0).max())
+        if p.scale == 0 and _all_match(s, INT_RE) and p.int_digits <= 18:
+            # up to 18 digits always fits int64
+            ints = pd.to_numeric(s).astype(np.int64)
+            p.fits_int = True
+            p.min_int, p.max_int = int(ints.min()), int(ints.max())
+        return p
+    if s.str.lower().isin(BOOL_WORDS).all():
+        p.fits_bool = True
+        return p
+    if _all_match(s, TIMESTAMP_RE):
+        parsed = pd.to_datetime(s, format="ISO8601", errors="coerce", utc=True)
+        if parsed.notna().all():
+            p.fits_timestamp = True
+            p.fits_date = _all_match(s, DATE_RE)
+    return p
+
+
+def profile_values(s: pd.Series) -> TypeProfile:
+    """Profile the non-null values of `s` (distinct values suffice)."""
+    s = s.dropna()
+    if not len(s):
+        return TypeProfile()
+    dtype = s.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return _only(len(s), fits_bool=True)
+    if pd.api.types.is_integer_dtype(dtype):
+        return _profile_ints(len(s), int(s.min()), int(s.max()))
+    if pd.api.types.is_float_dtype(dtype):
+        values = s.to_numpy(dtype=np.float64)
+        if np.isfinite(values).all() and (values == np.floor(values)).all() \
+                and np.abs(values).max() <= 2 ** 53:
+            # integers stored as floats, usually because the column has nulls
+            return _profile_ints(len(s), int(values.min()), int(values.max()))
+        return _only(len(s), fits_float=True)
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return _only(len(s), fits_timestamp=True, fits_date=bool((s == s.dt.normalize()).all()))
+    if isinstance(dtype, pd.CategoricalDtype):
+        s = pd.Series(s.cat.categories[pd.unique(s.cat.codes)])
+    return _profile_strings(s.astype(str))
+
+
+def sql_type(profile: Optional[TypeProfile]) -> Optional[str]:
+    """The narrowest SQL type that fits every profiled value, or None for text."""
+    if profile is None or not profile.values:
+        return None
+    if profile.fits_bool:
+        return "BOOLEAN"
+    if profile.fits_int:
+        if -INT32_MAX - 1 <= profile.min_int and profile.max_int <= INT32_MAX:
+            return "INTEGER"
+        return "BIGINT"
+    if profile.fits_decimal:
+        precision = max(profile.int_digits + profile.scale, 1)
+        if precision <= MAX_DECIMAL_PRECISION:
+            return f"DECIMAL({precision},{profile.scale})"
+    if profile.fits_float:
+        return "FLOAT"
+    if profile.fits_date:
+        return "DATE"
+    if profile.fits_timestamp:
+        return "TIMESTAMP"
+    return None
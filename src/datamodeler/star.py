@@ -0,0 +1,175 @@
+"""Streaming, recursive JSON -> star schema flattening.
+
+Records are read one at a time and split bottom-up:
+
+- scalar fields stay in the row they belong to;
+- a nested object becomes a row of the dimension table named after its path
+  (`details`, `details_child`, ...) and is replaced in its parent by a
+  `<dimension>_key` column;
+- an array becomes a dimension of its elements plus a `<dimension>_bridge`
+  table with `(parent key, element key, position)` rows, since a one-to-many
+  link can't be a column of the parent. Scalar elements are stored as
+  `{"value": x}`.
+
+Dimension keys are 64-bit hashes of a row's content (its scalars and the keys
+of its own children), so identical sub-objects share one key and are stored
+once. Because children are hashed before their parents, each value is
+serialized once and the work stays linear in the input size. Fact rows get a
+sequential `fact_id`. Links to a dimension are nullable `Int64` columns: a
+record without the nested object, or with null in its place, gets a null key
+rather than a float that can't hold the 64-bit hash.
+
+Rows are buffered per table and converted to DataFrames every `chunk_rows`
+records, so Python-object overhead is bounded by the chunk, not the file.
+"""
+import functools
+import hashlib
+import json
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from .utils import normalize_name
+
+FACT = "fact"
+FACT_KEY = "fact_id"
+
+
+@functools.lru_cache(maxsize=4096)
+def _column_name(field) -> str:
+    return normalize_name(str(field)) or "field"
+
+
+def _row_key(row: Dict, links: List) -> int:
+    # repr of builtin scalars is stable across processes (unlike hash()) and
+    # much cheaper than a sorted json.dumps
+    payload = repr((sorted(row.items()), links))
+    return int.from_bytes(hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def iter_json_records(path: str) -> Iterator[Dict]:
+    """Yield records from a JSON Lines file, or from a single top-level JSON array."""
+    with open(path, "r", encoding="utf-8") as f:
+        first = ""
+        for line in f:
+            first = line.strip()
+            if first:
+                break
+        if first.startswith("["):
+            # a JSON array has to be parsed whole
+            f.seek(0)
+            data = json.load(f)
+            yield from (rec for rec in data if isinstance(rec, dict))
+            return
+        if first:
+            yield json.loads(first)
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class StarBuilder:
+    """Accumulates flattened rows; `add` one record at a time, then `tables()`."""
+
+    def __init__(self, max_depth: Optional[int] = None, chunk_rows: int = 100_000):
+        self.max_depth = max_depth
+        self.chunk_rows = chunk_rows
+        self._rows: Dict[str, List[Dict]] = {}
+        self._frames: Dict[str, List[pd.DataFrame]] = {}
+        self._seen: Dict[str, Set[int]] = {}
+        # per table, `<dimension>_key` columns linking to dimensions and the fields they replace
+        self._key_columns: Dict[str, Set[str]] = {}
+        self._nested: Dict[str, Set[str]] = {}
+        self._facts = 0
+
+    def _emit(self, table: str, row: Dict):
+        self._rows.setdefault(table, []).append(row)
+
+    def _flatten(self, obj: Dict, table: str, depth: int) -> Tuple[Dict, List]:
+        """Split `obj` into a flat row for `table`, emitting its children's rows.
+
+        Arrays need the parent's key, which depends on the finished row, so
+        their `(dimension, element keys)` links are returned for the caller to
+        emit as bridge rows.
+        """
+        row, links = {}, []
+        too_deep = self.max_depth is not None and depth >= self.max_depth
+        for field, value in obj.items():
+            col = _column_name(field)
+            if too_deep and isinstance(value, (dict, list)):
+                row[col] = json.dumps(value, sort_keys=True, default=str)
+            elif isinstance(value, dict):
+                dim = f"{table}_{col}" if table != FACT else col
+                row[f"{dim}_key"] = self._dimension_row(dim, value, depth + 1)
+                self._key_columns.setdefault(table, set()).add(f"{dim}_key")
+                self._nested.setdefault(table, set()).add(col)
+            elif isinstance(value, list):
+                dim = f"{table}_{col}" if table != FACT else col
+                self._nested.setdefault(table, set()).add(col)
+                keys = [self._dimension_row(dim, v if isinstance(v, dict) else {"value": v}, depth + 1)
+                        for v in value]
+                links.append((dim, keys))
+            else:
+                row[col] = value
+        return row, links
+
+    def _dimension_row(self, dim: str, obj: Dict, depth: int) -> int:
+        row, links = self._flatten(obj, dim, depth)
+        key = _row_key(row, links)
+        seen = self._seen.setdefault(dim, set())
+        if key not in seen:
+            seen.add(key)
+            self._emit(dim, dict(row, **{f"{dim}_key": key}))
+            self._emit_links(f"{dim}_key", key, links)
+        return key
+
+    def _emit_links(self, parent_col: str, parent_key: int, links):
+        for dim, keys in links:
+            for pos, key in enumerate(keys):
+                self._emit(f"{dim}_bridge", {parent_col: parent_key, f"{dim}_key": key, "position": pos})
+
+    def add(self, record: Dict):
+        self._facts += 1
+        row, links = self._flatten(record, FACT, 0)
+        self._emit(FACT, dict({FACT_KEY: self._facts}, **row))
+        self._emit_links(FACT_KEY, self._facts, links)
+        if self._facts % self.chunk_rows == 0:
+            self._flush()
+
+    def _flush(self):
+        for table, rows in self._rows.items():
+            if rows:
+                frame = pd.DataFrame.from_records(rows)
+                # built from the Python ints: going through float64 (for the nulls) would round them
+                for col in self._key_columns.get(table, ()):
+                    if col in frame.columns:
+                        frame[col] = pd.array([r.get(col) for r in rows], dtype="Int64")
+                self._frames.setdefault(table, []).append(frame)
+        self._rows = {}
+
+    def _finish(self, table: str, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        key_columns = self._key_columns.get(table, set())
+        for frame in frames:
+            # chunks without a link column get it as nulls, so concat keeps Int64
+            for col in key_columns - set(frame.columns):
+                frame[col] = pd.array([None] * len(frame), dtype="Int64")
+        out = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        # a field that is a nested object or array elsewhere and null here is
+        # already represented by a null key or no bridge rows
+        empty = [c for c in self._nested.get(table, ()) if c in out.columns and out[c].isna().all()]
+        return out.drop(columns=empty)
+
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        self._flush()
+        out = {table: self._finish(table, frames) for table, frames in self._frames.items()}
+        # fact first, then the other tables in first-seen order
+        return dict(sorted(out.items(), key=lambda kv: kv[0] != FACT))
+
+
+def json_to_star(path: str, max_depth: Optional[int] = None, chunk_rows: int = 100_000) -> Dict[str, pd.DataFrame]:
+    builder = StarBuilder(max_depth=max_depth, chunk_rows=chunk_rows)
+    for record in iter_json_records(path):
+        if isinstance(record, dict):
+            builder.add(record)
+    return builder.tables()
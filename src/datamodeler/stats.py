@@ -0,0 +1,220 @@
+"""Single-pass column statistics shared by profiling, SQL typing and key detection.
+
+`profile_column` stringifies a column once and derives everything the later
+stages need from that one pass; `profile_dataset` does it for every table.
+
+A DataFrame read from Parquet carries the footer statistics in
+`df.attrs["footer"]` (a `columnar.FileStats`). Null counts and min/max are
+then taken from the footer instead of the data, and an all-null column is not
+scanned at all; distinct values and lengths still need the scan.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import sqltypes
+from .sketches import HyperLogLog, KMVSketch
+from .sqltypes import TypeProfile
+
+# Coarse dtype families. Values are compared as strings for FK detection, so an
+# int column can still match an object column holding "10".
+KIND_INT = "int"
+KIND_FLOAT = "float"
+KIND_BOOL = "bool"
+KIND_DATETIME = "datetime"
+KIND_OTHER = "other"
+
+SAMPLE_SIZE = 5
+
+
+def dtype_kind(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype):
+        return KIND_BOOL
+    if pd.api.types.is_integer_dtype(dtype):
+        return KIND_INT
+    if pd.api.types.is_float_dtype(dtype):
+        return KIND_FLOAT
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return KIND_DATETIME
+    return KIND_OTHER
+
+
+@dataclass
+class ColumnStats:
+    """Everything downstream stages need to know about one column.
+
+    `values` holds the stringified distinct values and is only kept for kinds
+    that can take part in a foreign key (not float/bool). Statistics built from
+    a chunked scan leave `values` empty, carry an approximate `nunique` and keep
+    a KMV sketch, a HyperLogLog and a reservoir sample instead.
+
+    `length_hist` counts non-null values by stringified length, in power-of-two
+    buckets keyed by their largest length (0, 1, 3, 7, 15, ...).
+    """
+    table: str
+    column: str
+    dtype: str
+    kind: str
+    rows: int
+    nnulls: int
+    nunique: Optional[int]
+    sample: List[str] = field(default_factory=list)
+    values: frozenset = frozenset()
+    min: Optional[object] = None
+    max: Optional[object] = None
+    min_len: Optional[int] = None
+    max_len: Optional[int] = None
+    kmv: Optional[KMVSketch] = None
+    hll: Optional[HyperLogLog] = None
+    reservoir: List[str] = field(default_factory=list)
+    length_hist: Optional[Dict[int, int]] = None
+    # which SQL types fit every value (see `sqltypes`)
+    types: Optional[TypeProfile] = None
+    # in-memory size after dtype compaction and the bytes it saved (see `compact`)
+    memory_bytes: Optional[int] = None
+    memory_saved: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return self.column
+
+    @property
+    def non_null(self) -> int:
+        return self.rows - self.nnulls
+
+    @property
+    def exact(self) -> bool:
+        return self.kmv is None or self.kmv.exact
+
+    @property
+    def nunique_error(self) -> float:
+        # relative error of `nunique`; zero for exact statistics
+        if self.exact:
+            return 0.0
+        return 2 * (self.hll.relative_error() if self.hll is not None else self.kmv.relative_error())
+
+
+def length_histogram(lengths: np.ndarray, weights: Optional[np.ndarray] = None) -> Dict[int, int]:
+    """Count lengths (each `weights` times) by power-of-two bucket, keyed by the bucket's largest length."""
+    exponents = np.frexp(np.asarray(lengths, dtype=np.float64))[1]
+    counts = np.bincount(exponents, weights=weights)
+    return {(1 << int(b)) - 1: int(counts[b]) for b in np.flatnonzero(counts)}
+
+
+def merge_length_histograms(a: Dict[int, int], b: Dict[int, int]) -> Dict[int, int]:
+    out = dict(a)
+    for k, n in b.items():
+        out[k] = out.get(k, 0) + n
+    return dict(sorted(out.items()))
+
+
+def _categorical_uniques(s: pd.Series):
+    """Distinct values of a categorical as strings, in first-appearance order.
+
+    Works on the integer codes, so only the categories are ever stringified.
+    """
+    codes = s.cat.codes.to_numpy()
+    used = pd.unique(codes[codes >= 0])
+    return s.cat.categories.astype(str).to_numpy(dtype=object)[used]
+
+
+def footer_nulls(kind: str, footer) -> Optional[int]:
+    """A column's null count from its `columnar.ColumnFooterStats`, where it matches a scan's."""
+    if footer is None or kind == KIND_FLOAT:
+        # Parquet does not count NaN as null, pandas does
+        return None
+    return footer.nulls
+
+
+def footer_range(kind: str, footer) -> Optional[tuple]:
+    """(min, max) from a column's footer statistics, in the form a scan would produce, or None."""
+    if footer is None or footer.min is None or footer.max is None:
+        return None
+    if kind == KIND_DATETIME:
+        return pd.Timestamp(footer.min), pd.Timestamp(footer.max)
+    if kind in (KIND_INT, KIND_FLOAT):
+        return footer.min, footer.max
+    # other kinds are ranged over their stringified values, which only strings keep
+    if isinstance(footer.min, str) and isinstance(footer.max, str):
+        return footer.min, footer.max
+    return None
+
+
+def null_column(table: str, column: str, rows: int, dtype) -> ColumnStats:
+    """Statistics of a column known to hold only nulls."""
+    return ColumnStats(table=table, column=column, dtype=str(dtype), kind=dtype_kind(dtype),
+                       rows=rows, nnulls=rows, nunique=0, length_hist={})
+
+
+def profile_column(table: str, column: str, s: pd.Series, footer=None) -> ColumnStats:
+    """Compute a column's statistics with a single stringify/unique pass.
+
+    `footer` (`columnar.ColumnFooterStats` covering exactly the rows of `s`)
+    supplies the null count and range where they match what the scan gives.
+    """
+    kind = dtype_kind(s.dtype)
+    nulls = footer_nulls(kind, footer)
+    if nulls is not None and nulls == len(s):
+        return null_column(table, column, len(s), s.dtype)
+    categorical = isinstance(s.dtype, pd.CategoricalDtype)
+    non_null = s if categorical else s.dropna()
+    if nulls is None:
+        nulls = int(s.isna().sum()) if categorical else len(s) - len(non_null)
+    st = ColumnStats(table=table, column=column, dtype=str(s.dtype), kind=kind,
+                     rows=len(s), nnulls=nulls, nunique=None)
+    try:
+        if categorical:
+            uniq = _categorical_uniques(s)
+            codes = s.cat.codes.to_numpy()
+            # each category's length, weighted by how often it occurs
+            st.length_hist = length_histogram(s.cat.categories.astype(str).str.len().to_numpy(),
+                                              np.bincount(codes[codes >= 0], minlength=len(s.cat.categories)))
+        else:
+            strs = non_null.astype(str)
+            # unique() keeps first-appearance order, so the sample matches a head() scan
+            uniq = strs.unique()
+            st.length_hist = length_histogram(strs.str.len().to_numpy())
+    except Exception:
+        return st
+    st.nunique = len(uniq)
+    st.sample = uniq[:SAMPLE_SIZE].tolist()
+    if kind not in (KIND_FLOAT, KIND_BOOL):
+        st.values = frozenset(uniq)
+    if len(uniq):
+        # the longest value is always among the distinct ones
+        lengths = pd.Series(uniq).str.len()
+        st.min_len, st.max_len = int(lengths.min()), int(lengths.max())
+        # strings are typed from their distinct values, everything else from its native dtype
+        st.types = sqltypes.profile_values(pd.Series(uniq) if kind == KIND_OTHER else non_null)
+        known = footer_range(kind, footer)
+        if known is not None:
+            st.min, st.max = known
+            return st
+        try:
+            if kind in (KIND_INT, KIND_FLOAT, KIND_DATETIME):
+                st.min, st.max = non_null.min(), non_null.max()
+            else:
+                st.min, st.max = min(uniq), max(uniq)
+        except Exception:
+            st.min = st.max = None
+    return st
+
+
+def profile_table(name: str, df: pd.DataFrame) -> Dict[str, ColumnStats]:
+    footer = df.attrs.get("footer")
+    if footer is not None and footer.rows != len(df):
+        footer = None  # e.g. a sample of the table: the footer describes other rows
+    columns = footer.columns if footer is not None else {}
+    out = {c: profile_column(name, c, df[c], columns.get(c)) for c in df.columns}
+    for c, sizes in df.attrs.get("compaction", {}).items():
+        if c in out:
+            out[c].memory_bytes = sizes["after"]
+            out[c].memory_saved = sizes["before"] - sizes["after"]
+    return out
+
+
+def profile_dataset(tables: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, ColumnStats]]:
+    """Profile every column of every table exactly once."""
+    return {t: profile_table(t, df) for t, df in tables.items()}
@@ -0,0 +1,411 @@
+"""Chunked loading and incremental profiling for inputs larger than RAM.
+
+`TableHandle` is a lazy stand-in for a DataFrame: it knows its file and reads
+it in fixed-size chunks on demand. `ColumnAccumulator` updates a column's
+statistics one chunk at a time, so peak memory depends on the chunk size and
+the sketch sizes, not on the file size.
+
+A handle may also stand for a partitioned table: a directory of part files
+(`orders/part-0001.csv`, ...) read one after the other. Accumulators merge,
+so each part is profiled on its own (`profile_part`, possibly in another
+process or on another machine) and the results are combined with
+`merge_profiles`, in any grouping.
+"""
+import os
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import columnar
+from . import sketches
+from . import sqltypes
+from .sqltypes import TypeProfile
+from .stats import (ColumnStats, KIND_DATETIME, KIND_FLOAT, KIND_INT, KIND_OTHER, SAMPLE_SIZE, dtype_kind,
+                    footer_nulls, footer_range, length_histogram, merge_length_histograms)
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_RESERVOIR_SIZE = 1000
+DEFAULT_HLL_PRECISION = 14
+INPUT_EXTENSIONS = (".csv", ".json") + columnar.COLUMNAR_EXTENSIONS
+
+
+def part_files(path: str) -> List[str]:
+    """The files making up an input: the file itself, or a directory's part files in name order.
+
+    Hidden and `_`-prefixed entries (`_SUCCESS`, `.crc` files, `_delta_log`) are
+    skipped; subdirectories (e.g. `date=2024-01-01/`) are searched too.
+    """
+    if not os.path.isdir(path):
+        return [path]
+    parts = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith((".", "_")))
+        for fname in sorted(files):
+            if not fname.startswith((".", "_")) and fname.lower().endswith(INPUT_EXTENSIONS):
+                parts.append(os.path.join(root, fname))
+    return parts
+
+
+def _is_json_lines(path: str) -> bool:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                return not line.startswith("[")
+    return True
+
+
+def file_columns(path: str) -> List[str]:
+    """Column names of one input file (for JSON, those of its first chunk)."""
+    if columnar.is_columnar(path):
+        return columnar.column_names(path)
+    if path.lower().endswith(".csv"):
+        return list(pd.read_csv(path, nrows=0).columns)
+    for chunk in iter_file_chunks(path, DEFAULT_CHUNK_ROWS):
+        return list(chunk.columns)
+    return []
+
+
+def iter_file_chunks(path: str, chunk_rows: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Yield chunks of one file; requested `columns` the file lacks come back all-null."""
+    lower = path.lower()
+    if columns is not None and (columnar.is_columnar(lower) or lower.endswith(".csv")):
+        present = file_columns(path)
+        if not set(columns) <= set(present):
+            # a part of a partitioned table may predate (or drop) a column; read what it has.
+            # Reading no column at all would lose the row count, so keep one.
+            read = [c for c in columns if c in present] or present[:1]
+            for chunk in iter_file_chunks(path, chunk_rows, read):
+                yield chunk.reindex(columns=columns)
+            return
+    if columnar.is_columnar(lower):
+        yield from columnar.iter_batches(path, chunk_rows, columns=columns)
+        return
+    if lower.endswith(".csv"):
+        reader = pd.read_csv(path, chunksize=chunk_rows, usecols=columns)
+        with reader:
+            yield from reader
+        return
+    if lower.endswith(".json"):
+        if _is_json_lines(path):
+            reader = pd.read_json(path, lines=True, chunksize=chunk_rows)
+            with reader:
+                for chunk in reader:
+                    yield chunk.reindex(columns=columns) if columns is not None else chunk
+            return
+        # a single JSON array cannot be parsed incrementally by pandas
+        df = pd.read_json(path)
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            yield chunk.reindex(columns=columns) if columns is not None else chunk
+        return
+    raise ValueError("Unsupported file type: " + path)
+
+
+class TableHandle:
+    """Lazy table backed by a CSV, JSON or columnar file, read in `chunk_rows` pieces.
+
+    `path` may also be a directory of part files (see `part_files`), which
+    together form one table.
+
+    `streaming=False` marks a handle whose table fits in memory: it is only
+    deferred (e.g. so a worker process can load it), and is profiled exactly.
+    """
+
+    def __init__(self, path: str, name: Optional[str] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 streaming: bool = True):
+        self.path = path
+        self.name = name or os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+        self.chunk_rows = chunk_rows
+        self.streaming = streaming
+        self._columns: Optional[List[str]] = None
+        self._parts: Optional[List[str]] = None
+
+    def __repr__(self):
+        return f"TableHandle({self.path!r}, chunk_rows={self.chunk_rows}, streaming={self.streaming})"
+
+    @property
+    def parts(self) -> List[str]:
+        if self._parts is None:
+            self._parts = part_files(self.path)
+        return self._parts
+
+    def size_bytes(self) -> int:
+        try:
+            return sum(os.path.getsize(p) for p in self.parts)
+        except OSError:
+            return 0
+
+    def iter_chunks(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        for part in self.parts:
+            yield from iter_file_chunks(part, self.chunk_rows, columns)
+
+    def iter_column(self, column: str) -> Iterator[pd.Series]:
+        for chunk in self.iter_chunks(columns=[column]):
+            yield chunk[column]
+
+    @property
+    def columns(self) -> List[str]:
+        """Columns of all parts, in order of first appearance."""
+        if self._columns is None:
+            names: Dict[str, None] = {}
+            for part in self.parts or [self.path]:
+                names.update(dict.fromkeys(file_columns(part)))
+            self._columns = list(names)
+        return self._columns
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materialize the whole table; only for inputs known to fit in memory."""
+        if self.parts and all(columnar.is_columnar(p) for p in self.parts):
+            frames = [columnar.read_table(p) for p in self.parts]
+        else:
+            frames = list(self.iter_chunks())
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=self.columns)
+
+
+def _merge_dtype(a, b):
+    if a is None or str(a) == str(b):
+        return b
+    try:
+        return np.promote_types(a, b)
+    except TypeError:
+        return np.dtype(object)
+
+
+class ColumnAccumulator:
+    """Incrementally maintained, mergeable column statistics.
+
+    Tracks rows, nulls, distinct counts (a KMV sketch, whose sample of distinct
+    hashes also drives approximate FK detection, and a HyperLogLog for the
+    count itself), the first few distinct values, a uniform reservoir sample,
+    string length bounds and a histogram of value lengths, min/max and the SQL
+    types that fit every value (`sqltypes.TypeProfile`).
+
+    `merge` combines accumulators of two disjoint pieces of a column; it is
+    associative, so shards can be profiled independently and merged in any
+    grouping. The reservoir keeps the values with the smallest random
+    priorities, which stays a uniform sample under merging.
+    """
+
+    def __init__(self, table: str, column: str, sketch_size: int = 1024,
+                 reservoir_size: int = DEFAULT_RESERVOIR_SIZE, seed: int = 0,
+                 hll_precision: int = DEFAULT_HLL_PRECISION):
+        self.table = table
+        self.column = column
+        self.dtype = None
+        self.rows = 0
+        self.nnulls = 0
+        self.kmv = sketches.KMVSketch(sketch_size)
+        self.hll = sketches.HyperLogLog(hll_precision)
+        self.sample: List[str] = []
+        self.reservoir: List[str] = []
+        self.reservoir_size = reservoir_size
+        self._priorities = np.empty(0)
+        self._rng = np.random.default_rng(seed)
+        self.min = self.max = None
+        self.min_len = self.max_len = None
+        self.length_hist: Dict[int, int] = {}
+        self.types = TypeProfile()
+        # False when min/max are known without the data (Parquet footer)
+        self.track_range = True
+
+    def update(self, s: pd.Series):
+        self.dtype = _merge_dtype(self.dtype, s.dtype)
+        self.rows += len(s)
+        non_null = s.dropna()
+        self.nnulls += len(s) - len(non_null)
+        if not len(non_null):
+            return
+        as_str = non_null.astype(str)
+        strs = as_str.to_numpy(dtype=object)
+        uniq = pd.unique(strs)
+        hashes = sketches.hash_values(uniq)
+        self.kmv.update(hashes)
+        self.hll.update(hashes)
+        self._add_sample(uniq)
+        self._update_reservoir(strs, self._rng.random(len(strs)))
+
+        self.length_hist = merge_length_histograms(
+            self.length_hist, length_histogram(as_str.str.len().to_numpy()))
+        lengths = pd.Series(uniq).str.len()
+        self._update_bounds(int(lengths.min()), int(lengths.max()))
+        kind = dtype_kind(s.dtype)
+        self.types = self.types.merge(sqltypes.profile_values(pd.Series(uniq) if kind == KIND_OTHER else non_null))
+
+        if not self.track_range:
+            return
+        try:
+            if kind in (KIND_INT, KIND_FLOAT, KIND_DATETIME):
+                lo, hi = non_null.min(), non_null.max()
+            else:
+                lo, hi = min(uniq), max(uniq)
+            self._update_range(lo, hi)
+        except Exception:
+            pass
+
+    def _add_sample(self, values):
+        for v in values:
+            if len(self.sample) >= SAMPLE_SIZE:
+                break
+            if v not in self.sample:
+                self.sample.append(v)
+
+    def _update_bounds(self, lo: Optional[int], hi: Optional[int]):
+        if lo is not None:
+            self.min_len = lo if self.min_len is None else min(self.min_len, lo)
+        if hi is not None:
+            self.max_len = hi if self.max_len is None else max(self.max_len, hi)
+
+    def _update_range(self, lo, hi):
+        if lo is not None:
+            self.min = lo if self.min is None else min(self.min, lo)
+        if hi is not None:
+            self.max = hi if self.max is None else max(self.max, hi)
+
+    def _update_reservoir(self, values, priorities: np.ndarray):
+        # bottom-k by random priority: a uniform sample that can be merged
+        if len(self.reservoir) >= self.reservoir_size:
+            keep = priorities < self._priorities.max()
+            values, priorities = np.asarray(values, dtype=object)[keep], priorities[keep]
+            if not len(values):
+                return
+        pool = np.concatenate([np.asarray(self.reservoir, dtype=object), np.asarray(values, dtype=object)])
+        prio = np.concatenate([self._priorities, priorities])
+        if len(pool) > self.reservoir_size:
+            top = np.argpartition(prio, self.reservoir_size - 1)[:self.reservoir_size]
+            pool, prio = pool[top], prio[top]
+        self.reservoir, self._priorities = pool.tolist(), prio
+
+    def merge(self, other: "ColumnAccumulator") -> "ColumnAccumulator":
+        """Statistics of this piece of the column followed by `other`'s."""
+        out = ColumnAccumulator(self.table, self.column, min(self.kmv.k, other.kmv.k),
+                                self.reservoir_size, hll_precision=self.hll.precision)
+        out.dtype = self.dtype if other.dtype is None else _merge_dtype(self.dtype, other.dtype)
+        out.rows = self.rows + other.rows
+        out.nnulls = self.nnulls + other.nnulls
+        out.kmv = self.kmv.merge(other.kmv)
+        out.hll = self.hll.merge(other.hll)
+        out.sample = list(self.sample)
+        out._add_sample(other.sample)
+        out.reservoir, out._priorities = list(self.reservoir), self._priorities
+        out._update_reservoir(other.reservoir, other._priorities)
+        out.min, out.max = self.min, self.max
+        try:
+            out._update_range(other.min, other.max)
+        except TypeError:
+            # incomparable types across shards: no usable range
+            out.min = out.max = None
+        out.min_len, out.max_len = self.min_len, self.max_len
+        out._update_bounds(other.min_len, other.max_len)
+        out.length_hist = merge_length_histograms(self.length_hist, other.length_hist)
+        out.types = self.types.merge(other.types)
+        out._rng = self._rng
+        return out
+
+    def nunique(self) -> int:
+        # exact while the KMV sketch holds every distinct value, HyperLogLog beyond
+        if self.kmv.exact:
+            return len(self.kmv.hashes)
+        return int(round(self.hll.cardinality()))
+
+    def finalize(self) -> ColumnStats:
+        dtype = self.dtype if self.dtype is not None else np.dtype(object)
+        return ColumnStats(table=self.table, column=self.column, dtype=str(dtype),
+                           kind=dtype_kind(dtype), rows=self.rows, nnulls=self.nnulls,
+                           nunique=self.nunique(), sample=list(self.sample),
+                           min=self.min, max=self.max, min_len=self.min_len, max_len=self.max_len,
+                           types=self.types, kmv=self.kmv, hll=self.hll, reservoir=list(self.reservoir),
+                           length_hist=dict(self.length_hist))
+
+
+def _null_accumulator(table: str, column: str, rows: int, dtype=None, sketch_size: int = 1024,
+                      reservoir_size: int = DEFAULT_RESERVOIR_SIZE) -> ColumnAccumulator:
+    acc = ColumnAccumulator(table, column, sketch_size, reservoir_size)
+    acc.dtype = dtype
+    acc.rows = acc.nnulls = rows
+    return acc
+
+
+def profile_part(handle: TableHandle, part: Optional[str] = None, sketch_size: int = 1024,
+                 reservoir_size: int = DEFAULT_RESERVOIR_SIZE, seed: int = 0) -> Dict[str, ColumnAccumulator]:
+    """Accumulate statistics for one part file of `handle` (its only file by default).
+
+    For Parquet inputs the footer statistics supply row and null counts and
+    min/max (see `stats.footer_range`), so the scan only derives what the footer
+    cannot (distinct values, lengths, SQL types); columns the footer shows to be
+    entirely null are not read.
+    """
+    path = part or handle.parts[0]
+    footer = columnar.file_statistics(path) if columnar.is_parquet(path) else None
+    file_columns = columnar.column_names(path) if footer is not None else None
+    skip = set()
+    if footer is not None:
+        skip = {c for c, fs in footer.columns.items() if fs.nulls == footer.rows}
+    scan = [c for c in file_columns if c not in skip] if skip else None
+
+    accs: Dict[str, ColumnAccumulator] = {}
+    total = 0
+    for chunk in iter_file_chunks(path, handle.chunk_rows, columns=scan):
+        for c in chunk.columns:
+            if c not in accs:
+                acc = accs[c] = ColumnAccumulator(handle.name, c, sketch_size, reservoir_size, seed=seed)
+                # JSON records may introduce a key late: earlier rows were nulls
+                acc.rows = acc.nnulls = total
+                if footer is not None:
+                    known = footer_range(dtype_kind(chunk[c].dtype), footer.columns.get(c))
+                    if known is not None:
+                        acc.min, acc.max = known
+                        acc.track_range = False
+            accs[c].update(chunk[c])
+        for c, acc in accs.items():
+            if c not in chunk.columns:
+                acc.rows += len(chunk)
+                acc.nnulls += len(chunk)
+        total += len(chunk)
+
+    if footer is not None:
+        for c in file_columns:
+            if c in skip:
+                accs[c] = _null_accumulator(handle.name, c, footer.rows, np.dtype(columnar.pandas_dtype(path, c)),
+                                            sketch_size, reservoir_size)
+            elif c in accs:
+                nulls = footer_nulls(dtype_kind(accs[c].dtype), footer.columns.get(c))
+                if nulls is not None:
+                    accs[c].nnulls = nulls
+        accs = {c: accs[c] for c in file_columns if c in accs}
+    return accs
+
+
+def merge_profiles(profiles: List[Dict[str, ColumnAccumulator]]) -> Dict[str, ColumnAccumulator]:
+    """Combine per-part accumulators, in part order, into one per column.
+
+    A column missing from a part counts as null for all of that part's rows.
+    """
+    out: Dict[str, ColumnAccumulator] = {}
+    total = 0
+    for prof in profiles:
+        rows = max((acc.rows for acc in prof.values()), default=0)
+        for c, acc in out.items():
+            if c not in prof:
+                out[c] = acc.merge(_null_accumulator(acc.table, c, rows, acc.dtype, acc.kmv.k, acc.reservoir_size))
+        for c, acc in prof.items():
+            if c in out:
+                out[c] = out[c].merge(acc)
+            else:
+                out[c] = _null_accumulator(acc.table, c, total, acc.dtype, acc.kmv.k,
+                                           acc.reservoir_size).merge(acc) if total else acc
+        total += rows
+    return out
+
+
+def profile_handle(handle: TableHandle, sketch_size: int = 1024,
+                   reservoir_size: int = DEFAULT_RESERVOIR_SIZE) -> Dict[str, ColumnStats]:
+    """Profile a lazy table in one chunked pass over each of its part files."""
+    profiles = [profile_part(handle, part, sketch_size, reservoir_size, seed=i)
+                for i, part in enumerate(handle.parts)]
+    return {c: acc.finalize() for c, acc in merge_profiles(profiles).items()}
+
+
+def is_lazy(table) -> bool:
+    return isinstance(table, TableHandle)
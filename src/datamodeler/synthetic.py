@@ -0,0 +1,133 @@
+"""Deterministic synthetic datasets for benchmarking.
+
+`SyntheticSpec` describes a schema (table count, rows, extra columns, value
+cardinality, FK topology, nested JSON depth); the same spec and seed always
+produce the same files. Every table has an `<table>_id` primary key, and FK
+columns are named after the parent key so the expected relationships are
+known up front (`expected_fks`).
+
+Topologies:
+
+- ``star``: table 0 is a fact referencing every other table.
+- ``snowflake``: a binary tree rooted at the fact; every table references up
+  to two sub-dimensions.
+- ``chain``: table i references table i - 1.
+"""
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+TOPOLOGIES = ("star", "snowflake", "chain")
+
+
+@dataclass
+class SyntheticSpec:
+    name: str = "star"
+    tables: int = 5
+    rows: int = 10_000
+    columns: int = 4
+    cardinality: int = 100
+    topology: str = "star"
+    json_rows: int = 1_000
+    json_depth: int = 2
+    seed: int = 0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def table_names(spec: SyntheticSpec) -> List[str]:
+    if spec.topology == "chain":
+        return [f"t{i}" for i in range(spec.tables)]
+    return ["fact"] + [f"dim{i}" for i in range(1, spec.tables)]
+
+
+def expected_fks(spec: SyntheticSpec) -> List[Tuple[str, str]]:
+    """`(child_table, parent_table)` pairs the generator wires together."""
+    if spec.topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology {spec.topology!r}; expected one of {TOPOLOGIES}")
+    names = table_names(spec)
+    if spec.topology == "star":
+        return [(names[0], names[i]) for i in range(1, len(names))]
+    if spec.topology == "chain":
+        return [(names[i], names[i - 1]) for i in range(1, len(names))]
+    # snowflake: node i's parent in a binary tree rooted at the fact is (i - 1) // 2
+    return [(names[(i - 1) // 2], names[i]) for i in range(1, len(names))]
+
+
+def _attribute(rng: np.random.Generator, j: int, rows: int, cardinality: int) -> pd.Series:
+    # rotate through the dtypes the pipeline has to type and profile
+    kind = j % 4
+    if kind == 0:
+        return pd.Series(rng.integers(0, cardinality, rows))
+    if kind == 1:
+        codes = rng.integers(0, cardinality, rows)
+        return pd.Series(np.char.add("cat_", codes.astype(str)), dtype=object)
+    if kind == 2:
+        return pd.Series(np.round(rng.normal(100, 25, rows), 2))
+    days = rng.integers(0, min(cardinality, 3650), rows)
+    return pd.Series((np.datetime64("2020-01-01") + days.astype("timedelta64[D]")).astype(str), dtype=object)
+
+
+def generate_tables(spec: SyntheticSpec) -> Dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(spec.seed)
+    names = table_names(spec)
+    parents: Dict[str, List[str]] = {n: [] for n in names}
+    for child, parent in expected_fks(spec):
+        parents[child].append(parent)
+
+    # disjoint key ranges, so only the wired FKs are genuine containments
+    base = {n: i * 10 * spec.rows + 1 for i, n in enumerate(names)}
+    tables = {}
+    for name in names:
+        cols = {f"{name}_id": np.arange(base[name], base[name] + spec.rows)}
+        for parent in parents[name]:
+            cols[f"{parent}_id"] = rng.integers(base[parent], base[parent] + spec.rows, spec.rows)
+        for j in range(spec.columns):
+            cols[f"attr_{j}"] = _attribute(rng, j, spec.rows, spec.cardinality)
+        tables[name] = pd.DataFrame(cols)
+    return tables
+
+
+def _nested(rng: np.random.Generator, depth: int, cardinality: int):
+    node = {"code": f"c{int(rng.integers(0, cardinality))}", "value": float(np.round(rng.random() * 100, 2))}
+    if depth > 1:
+        node["child"] = _nested(rng, depth - 1, cardinality)
+        node["items"] = [_nested(rng, depth - 1, cardinality) for _ in range(int(rng.integers(0, 3)))]
+    return node
+
+
+def generate_nested_records(spec: SyntheticSpec) -> List[Dict]:
+    """Order-like documents with nested objects and arrays `json_depth` levels deep."""
+    rng = np.random.default_rng(spec.seed + 1)
+    records = []
+    for i in range(spec.json_rows):
+        rec = {"order_id": i + 1, "customer": f"cust_{int(rng.integers(0, spec.cardinality))}",
+               "amount": float(np.round(rng.random() * 1000, 2))}
+        if spec.json_depth > 0:
+            rec["details"] = _nested(rng, spec.json_depth, spec.cardinality)
+            rec["lines"] = [_nested(rng, spec.json_depth, spec.cardinality)
+                            for _ in range(int(rng.integers(1, 4)))]
+        records.append(rec)
+    return records
+
+
+def write_dataset(spec: SyntheticSpec, out_dir: str) -> Tuple[str, str]:
+    """Write the tables as CSV and the nested documents as JSON lines.
+
+    Returns `(tables_dir, json_path)`; the JSON file lives outside the tables
+    directory so it isn't loaded as a table.
+    """
+    tables_dir = os.path.join(out_dir, "tables")
+    os.makedirs(tables_dir, exist_ok=True)
+    for name, df in generate_tables(spec).items():
+        df.to_csv(os.path.join(tables_dir, name + ".csv"), index=False)
+    json_path = os.path.join(out_dir, "nested.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        for rec in generate_nested_records(spec):
+            f.write(json.dumps(rec) + "\n")
+    return tables_dir, json_path
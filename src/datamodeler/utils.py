@@ -1,16 +1,36 @@
 import re
 
-def guess_sql_type(pd_dtype, sample_values=None):
+from . import sqltypes
+
+# longer text gets TEXT rather than a VARCHAR that would truncate it
+MAX_VARCHAR = 2000
+
+
+def guess_sql_type(pd_dtype, sample_values=None, max_length=None, types=None):
+    """Map a pandas dtype to a SQL type.
+
+    `types` (a `sqltypes.TypeProfile` of the whole column) picks the narrowest
+    type that fits every value. `max_length` (the column's longest stringified
+    value) takes precedence over measuring `sample_values`.
+    """
+    inferred = sqltypes.sql_type(types)
+    if inferred is not None:
+        return inferred
     t = str(pd_dtype)
-    if t.startswith("int"):
-        return "INTEGER"
-    if t.startswith("float"):
-        return "FLOAT"
-    if "datetime" in t or "date" in t:
-        return "TIMESTAMP"
+    if types is None:
+        if t.startswith("int"):
+            return "INTEGER"
+        if t.startswith("float"):
+            return "FLOAT"
+        if "datetime" in t or "date" in t:
+            return "TIMESTAMP"
     # fallback to varchar with length heuristic
     maxlen = 255
-    if sample_values is not None:
+    if max_length is not None:
+        if int(max_length) > MAX_VARCHAR:
+            return "TEXT"
+        maxlen = max(50, int(max_length))
+    elif sample_values is not None:
         try:
             maxlen = max((len(str(x)) for x in sample_values if x is not None), default=50)
             maxlen = min(max(50, maxlen), 2000)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Make `src` importable without installing the package, like the run_*.py scripts
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+SAMPLES_DIR = os.path.join(os.path.dirname(SRC), "samples")
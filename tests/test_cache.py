@@ -0,0 +1,58 @@
+import os
+import threading
+
+from datamodeler import cache
+
+
+def _outputs(tmp_path, n=20, size=200_000):
+    files = []
+    for i in range(n):
+        path = tmp_path / f"f{i}.bin"
+        path.write_bytes(bytes([i]) * size)
+        files.append([f"sub/f{i}.bin", str(path)])
+    return files
+
+
+def test_concurrent_puts_of_one_key_store_a_complete_entry(tmp_path):
+    rc = cache.ResultCache(str(tmp_path / "cache"), max_bytes=1 << 30)
+    files = _outputs(tmp_path)
+    errors = []
+
+    def put():
+        try:
+            rc.put("k", files, {"tables": ["t"]})
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=put) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    summary = rc.get("k")
+    assert summary is not None and len(summary["files"]) == len(files)
+    for (arcname, cached), (_, original) in zip(summary["files"], files):
+        assert os.path.getsize(cached) == os.path.getsize(original)
+    # no temporary directories left behind
+    assert not [f for f in os.listdir(tmp_path / "cache") if f.startswith(".tmp")]
+
+
+def test_eviction_keeps_the_size_budget(tmp_path):
+    rc = cache.ResultCache(str(tmp_path / "cache"), max_bytes=500_000)
+    files = _outputs(tmp_path, n=1)
+    for key in ("a", "b", "c"):
+        rc.put(key, files, {})
+    assert rc.get("a") is None and rc.get("c") is not None
+    assert rc.stats()["bytes"] <= 500_000
+
+
+def test_files_fetched_into_dest_survive_eviction(tmp_path):
+    rc = cache.ResultCache(str(tmp_path / "cache"), max_bytes=300_000)
+    rc.put("a", _outputs(tmp_path, n=1), {"tables": ["t"]})
+    summary = rc.get("a", dest=str(tmp_path / "job"))
+    assert summary["tables"] == ["t"]
+    assert summary["files"] == [["sub/f0.bin", str(tmp_path / "job" / "sub" / "f0.bin")]]
+    rc.put("b", _outputs(tmp_path, n=1), {})
+    assert rc.get("a") is None
+    assert os.path.getsize(summary["files"][0][1]) == 200_000
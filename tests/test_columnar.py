@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from datamodeler import core  # noqa: E402
+from datamodeler import stats  # noqa: E402
+from datamodeler import streaming  # noqa: E402
+
+FIELDS = ("dtype", "rows", "nnulls", "nunique", "min", "max", "min_len", "max_len", "length_hist")
+
+
+def _frame(rows=1_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "maybe": pd.array(np.where(rng.random(rows) < 0.2, None, rng.integers(0, 50, rows)), dtype="Int64"),
+        # NaN is a value to Parquet but null to pandas
+        "ratio": np.where(rng.random(rows) < 0.1, np.nan, rng.random(rows)),
+        "name": rng.choice(["ann", "bob", "cy", None], rows),
+        "when": pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 100, rows), unit="D"),
+        "flag": rng.random(rows) < 0.5,
+        "empty": pd.Series([None] * rows, dtype=object),
+    })
+
+
+def _write_parts(root, frame, parts=2):
+    root.mkdir()
+    step = -(-len(frame) // parts)
+    for i in range(parts):
+        frame.iloc[i * step:(i + 1) * step].to_parquet(root / f"part-{i}.parquet", index=False, row_group_size=100)
+    return root
+
+
+def _scanned(frame):
+    return stats.profile_table("t", frame.reset_index(drop=True))
+
+
+def _same(a, b):
+    assert list(a) == list(b)
+    for c in a:
+        for f in FIELDS:
+            assert getattr(a[c], f) == getattr(b[c], f), (c, f)
+
+
+def test_footer_stats_match_a_scan(tmp_path):
+    path = _write_parts(tmp_path / "t", _frame())
+    df = core.load_file(str(path))
+    assert df.attrs["footer"].rows == len(df)
+    with_footer = stats.profile_table("t", df)
+    without = dict(df.attrs)
+    df.attrs = {}
+    _same(with_footer, stats.profile_table("t", df))
+    df.attrs = without
+    assert with_footer["empty"].nnulls == len(df) and with_footer["empty"].nunique == 0
+
+    # a sample carries the attrs but not the footer's rows
+    sample = df.sample(100, random_state=0)
+    assert stats.profile_table("t", sample)["maybe"].nnulls == sample["maybe"].isna().sum()
+
+
+def test_lazy_table_skips_all_null_columns(tmp_path, monkeypatch):
+    path = _write_parts(tmp_path / "t", _frame())
+    reads = []
+    load_file = core.load_file
+
+    def spy(path, columns=None, compact=False):
+        reads.append(columns)
+        return load_file(path, columns, compact)
+
+    monkeypatch.setattr(core, "load_file", spy)
+    handle = streaming.TableHandle(str(path), name="t", streaming=False)
+    lazy = core._profile_table_job("t", handle)
+    assert reads and "empty" not in reads[0]
+    monkeypatch.undo()
+    df = core.load_file(str(path))
+    df.attrs = {}
+    expected = _scanned(df)
+    _same({c: lazy[c] for c in expected if c != "empty"}, {c: expected[c] for c in expected if c != "empty"})
+    assert lazy["empty"].nnulls == len(df) and lazy["empty"].nunique == 0
+
+
+def test_streamed_parquet_takes_ranges_from_the_footer(tmp_path, monkeypatch):
+    path = _write_parts(tmp_path / "t", _frame())
+    tracked = []
+    update = streaming.ColumnAccumulator.update
+
+    def spy(self, s):
+        tracked.append((self.column, self.track_range))
+        return update(self, s)
+
+    monkeypatch.setattr(streaming.ColumnAccumulator, "update", spy)
+    handle = streaming.TableHandle(str(path), chunk_rows=128)
+    streamed = streaming.profile_handle(handle)
+    assert not {c for c, track in tracked if c in ("id", "maybe", "name", "when") and track}
+    assert "empty" not in {c for c, _ in tracked}
+
+    df = core.load_file(str(path))
+    df.attrs = {}
+    expected = _scanned(df)
+    for c, st in streamed.items():
+        assert (st.rows, st.nnulls, st.nunique, st.min, st.max) == \
+            (expected[c].rows, expected[c].nnulls, expected[c].nunique, expected[c].min, expected[c].max), c
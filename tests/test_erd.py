@@ -0,0 +1,55 @@
+import os
+
+from datamodeler import erd
+
+
+def _schema():
+    tables = {t: [{"name": "id", "type": "INTEGER", "pk": True}, {"name": "ref_id", "type": "INTEGER"}]
+              for t in ("erd_a", "erd_b", "fact_x", "dim_y", "dim_z")}
+    fks = [{"child_table": "fact_x", "child_col": "ref_id", "parent_table": p, "parent_col": "id"}
+           for p in ("dim_y", "dim_z")]
+    fks.append({"child_table": "erd_b", "child_col": "ref_id", "parent_table": "erd_a", "parent_col": "id"})
+    return tables, fks
+
+
+def test_partition_named_erd_keeps_the_overview(tmp_path):
+    tables, fks = _schema()
+    out = str(tmp_path / "erd")
+    diagrams = erd.generate_erd(tables, fks, out, partition="prefix", neighborhoods=True, workers=1)
+    assert diagrams["erd"] == out + ".svg"
+    assert diagrams["part:erd"] == os.path.join(out + "_parts", "erd.svg")
+    assert diagrams["part:fact"] == os.path.join(out + "_parts", "fact.svg")
+    assert diagrams["fact:fact_x"] == os.path.join(out + "_parts", "fact_fact_x.svg")
+    assert len(set(diagrams.values())) == len(diagrams)
+    assert all(os.path.exists(p) for p in diagrams.values())
+
+
+def test_component_partitions_pack_up_to_max_tables():
+    tables, fks = _schema()
+    parts = erd.partition_tables(list(tables), fks, "component", max_tables=3)
+    assert sorted(len(ts) for ts in parts.values()) == [2, 3]
+    assert sorted(t for ts in parts.values() for t in ts) == sorted(tables)
+
+
+def test_unchanged_diagrams_are_not_rendered_again(tmp_path, monkeypatch):
+    # stand in for Graphviz `dot`, which may not be installed
+    monkeypatch.setattr(erd.Digraph, "pipe", lambda self, format=None: b"<svg/>")
+    tables, fks = _schema()
+    g = erd.build_graph(tables, fks)
+    out = str(tmp_path / "erd")
+    assert erd.render(g, out)
+    assert not erd.render(g, out)
+    g.edge("dim_y", "dim_z")
+    assert erd.render(g, out)
+
+
+def test_placeholder_is_rendered_again(tmp_path, monkeypatch):
+    def missing(self, format=None):
+        raise erd.ExecutableNotFound(["dot"])
+
+    monkeypatch.setattr(erd.Digraph, "pipe", missing)
+    g = erd.build_graph(*_schema())
+    out = str(tmp_path / "erd")
+    assert erd.render(g, out) and erd.render(g, out)
+    with open(out + ".svg", encoding="utf-8") as f:
+        assert f.readline() == erd.PLACEHOLDER
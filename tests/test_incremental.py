@@ -0,0 +1,55 @@
+import os
+import shutil
+
+from conftest import SAMPLES_DIR
+from datamodeler import core
+from datamodeler import langgraph_integration as lg
+
+
+def _fk_set(result):
+    return {(fk["child_table"], fk["child_col"], fk["parent_table"], fk["parent_col"]) for fk in result["fks"]}
+
+
+def test_failed_run_does_not_save_state(tmp_path, monkeypatch):
+    inputs = tmp_path / "inputs"
+    shutil.copytree(SAMPLES_DIR, inputs)
+    fresh = lg.run_datamodel_pipeline(str(inputs), str(tmp_path / "fresh"))
+    assert not fresh["error"] and fresh["fks"]
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    with monkeypatch.context() as m:
+        m.setattr(core, "detect_foreign_keys", fail)
+        failed = lg.run_datamodel_pipeline(str(inputs), str(tmp_path / "out1"), state_dir=str(tmp_path / "state"))
+    assert "boom" in failed["error"]
+
+    rerun = lg.run_datamodel_pipeline(str(inputs), str(tmp_path / "out2"), state_dir=str(tmp_path / "state"))
+    assert not rerun["error"]
+    assert sorted(rerun["incremental"]["changed"]) == sorted(fresh["tables"])
+    assert _fk_set(rerun) == _fk_set(fresh)
+
+
+def test_state_is_self_contained(tmp_path):
+    """Nodes find the run's column statistics from the state alone, e.g. after a resume elsewhere."""
+    import pickle
+    import tempfile
+
+    state = {"input_path": SAMPLES_DIR, "output_dir": str(tmp_path), "options": {}, "run_id": "r",
+             "run_dir": tempfile.mkdtemp(dir=tmp_path), "key_store": "", "incremental": {}, "error": None}
+    state.update(lg.load_inputs_node(state))
+    state.update(lg.profile_tables_node(state))
+    assert not state["error"]
+    state = pickle.loads(pickle.dumps(state))
+    lg._forget_run(state["run_dir"])
+    pks = lg.detect_pks_node(state)
+    assert not pks["error"]
+    lg._forget_run(state["run_dir"])
+    assert pks["pks"] == lg.run_datamodel_pipeline(SAMPLES_DIR, str(tmp_path / "out"))["pks"]
+
+
+def test_run_leaves_no_scratch_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(lg.tempfile, "tempdir", str(tmp_path))
+    lg.run_datamodel_pipeline(SAMPLES_DIR, str(tmp_path / "out"), key_backend="sqlite")
+    assert os.listdir(tmp_path) == ["out"]
+    assert not [path for path in lg._SPILL_CACHE if path.startswith(str(tmp_path))]
@@ -0,0 +1,74 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from datamodeler import keys
+from datamodeler.stats import profile_table
+
+
+def _wide_table(rows=50_000, noise=40, seed=0):
+    """`noise` columns of about 40 values each plus a key (a, b, c) of 1000 x 10 x 5 values."""
+    rng = np.random.default_rng(seed)
+    idx = rng.permutation(rows)
+    df = pd.DataFrame({f"x{i}": rng.integers(0, 40, rows) for i in range(noise)})
+    df["a"], df["b"], df["c"] = idx // 50, (idx // 5) % 10, idx % 5
+    return df
+
+
+def test_wide_table_keeps_low_cardinality_key_columns():
+    df = _wide_table()
+    assert keys.discover_composite_keys(df, profile_table("t", df)) == [("a", "b", "c")]
+
+
+def test_candidates_drop_only_columns_that_cannot_reach_the_row_count():
+    df = pd.DataFrame({"id": np.arange(100) // 5, "line": np.arange(100) % 5, "flag": np.arange(100) % 2})
+    cands = [st.column for st in keys.composite_key_candidates(profile_table("t", df), max_size=2)]
+    # 2 x 20 < 100 rows, so "flag" can't be in a 2-column key, but "line" can (5 x 20)
+    assert cands == ["id", "line"]
+    assert keys.discover_composite_keys(df, profile_table("t", df), max_size=2) == [("id", "line")]
+
+
+def test_bounded_combinations_matches_filtered_itertools():
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        columns = [f"c{i}" for i in range(rng.integers(2, 9))]
+        nunique = {c: float(rng.choice([2, 3, 5, 10, 40, 1000])) for c in columns}
+        rows = int(rng.choice([10, 100, 1000, 50_000]))
+        for size in (2, 3, 4):
+            expected = [combo for combo in combinations(columns, size)
+                        if np.prod([nunique[c] for c in combo]) >= rows]
+            assert list(keys._bounded_combinations(columns, nunique, size, rows)) == expected
+
+
+def test_lattice_returns_minimal_keys_only():
+    df = pd.DataFrame({"a": [1, 1, 2, 2], "b": [1, 2, 1, 2], "c": [1, 2, 3, 3]})
+    found = keys.discover_composite_keys(df, profile_table("t", df), limit=0)
+    assert ("a", "b") in found
+    assert all(not set(k) < set(other) for k in found for other in found)
+
+
+@pytest.mark.parametrize("limit", [1, 0])
+def test_no_key_when_rows_repeat(limit):
+    df = pd.DataFrame({"a": [1, 1, 2, 2], "b": [1, 1, 2, 3]})
+    assert keys.discover_composite_keys(df, profile_table("t", df), limit=limit) == []
+
+
+def test_only_tables_without_a_single_column_key_are_profiled(monkeypatch):
+    from datamodeler import core
+
+    tables = {
+        "orders": pd.DataFrame({"order_id": [1, 2, 3], "note": ["a", "a", "b"]}),
+        "lines": pd.DataFrame({"order_id": [1, 1, 2], "line": [1, 2, 1]}),
+    }
+    profiled = []
+    column_statistics = core.column_statistics
+
+    def spy(tables, *args, **kwargs):
+        profiled.append(sorted(tables))
+        return column_statistics(tables, *args, **kwargs)
+
+    monkeypatch.setattr(core, "column_statistics", spy)
+    assert core.detect_primary_keys(tables) == {"orders": "order_id", "lines": ("order_id", "line")}
+    assert profiled == [["lines"]]
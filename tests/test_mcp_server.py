@@ -0,0 +1,115 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("aiofiles")
+
+from datamodeler import jobs  # noqa: E402
+from datamodeler import mcp_server  # noqa: E402
+
+
+class _BrokenUpload:
+    """An upload whose client disconnects after the first chunk."""
+    filename = "orders.csv"
+
+    def __init__(self):
+        self.reads = 0
+
+    async def read(self, size):
+        self.reads += 1
+        if self.reads > 1:
+            raise ConnectionResetError("client went away")
+        return b"id\n1\n"
+
+
+class _Upload:
+    def __init__(self, filename, data):
+        self.filename, self._data = filename, data
+
+    async def read(self, size):
+        data, self._data = self._data, b""
+        return data
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    jm = jobs.JobManager(str(tmp_path / "jobs"), max_workers=1, max_queue=1)
+    monkeypatch.setattr(mcp_server, "job_manager", jm)
+    yield jm
+    jm.shutdown()
+
+
+def test_failed_uploads_release_their_slot(manager):
+    async def upload_past_the_queue():
+        for _ in range(manager.max_workers + manager.max_queue + 1):
+            with pytest.raises(ConnectionResetError):
+                await mcp_server._create_job([_BrokenUpload()])
+
+    asyncio.run(upload_past_the_queue())
+    assert manager.active() == 0
+    assert os.listdir(manager.jobs_dir) == []
+
+
+def test_unsafe_filenames_stay_inside_the_job(manager, monkeypatch):
+    monkeypatch.setattr(manager, "submit", lambda job: None)
+    monkeypatch.setattr(manager, "complete_from_cache", lambda job, key: False)
+
+    async def create():
+        return await mcp_server._create_job([_Upload("dir/", b"a\n1\n"), _Upload("../x.csv", b"b\n2\n")])
+
+    job = asyncio.run(create())
+    assert sorted(os.listdir(job.input_dir)) == ["upload", "x.csv"]
+
+
+def test_cached_job_outputs_outlive_the_cache_entry(tmp_path):
+    from datamodeler import cache
+
+    rc = cache.ResultCache(str(tmp_path / "cache"), max_bytes=1_000)
+    src = tmp_path / "model.sql"
+    src.write_text("CREATE TABLE t (id INTEGER);\n")
+    rc.put("k", [["model.sql", str(src)]], {"tables": ["t"], "fks": 0})
+    jm = jobs.JobManager(str(tmp_path / "jobs"), max_workers=1, result_cache=rc)
+    try:
+        job = jm.create()
+        assert jm.complete_from_cache(job, "k")
+        # a later result evicts the entry before the client downloads this one
+        big = tmp_path / "big"
+        big.write_bytes(b"x" * 2_000)
+        rc.put("other", [["big", str(big)]], {})
+        assert rc.get("k") is None
+        assert [arc for arc, _ in job.files] == ["model.sql"]
+        assert b"".join(jobs.iter_zip(job.files))
+        assert all(path.startswith(job.output_dir) for _, path in job.files)
+    finally:
+        jm.shutdown()
+
+
+def test_metrics_require_the_api_key(manager, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(mcp_server.app)
+    assert client.get("/metrics").status_code == 200
+    monkeypatch.setenv("MCP_API_KEY", "secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"X-API-Key": "wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"X-API-Key": "secret"})
+    assert response.status_code == 200 and "datamodeler_jobs_queued" in response.text
+
+
+def test_lifespan_warms_up_and_shuts_down_the_workers(manager, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    calls = []
+
+    async def warm_up():
+        calls.append("warm_up")
+        return 0.0
+
+    monkeypatch.setattr(manager, "warm_up", warm_up)
+    monkeypatch.setattr(manager, "shutdown", lambda: calls.append("shutdown"))
+    with TestClient(mcp_server.app) as client:
+        assert calls == ["warm_up"]
+        assert client.get("/cache/stats").status_code == 200
+    assert calls == ["warm_up", "shutdown"]
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from datamodeler import metrics
+
+
+def _busy(state):
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        sum(range(1000))
+    metrics.add(rows=1)
+    return {"done": True}
+
+
+def test_concurrent_profiled_nodes_are_serialized(tmp_path):
+    state = {"options": {"profile_dir": str(tmp_path)}, "run_id": "r"}
+    results, errors = {}, []
+
+    def run(name):
+        try:
+            results[name] = metrics.instrument(name, _busy)(state)
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(f"n{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    for name, update in results.items():
+        entry = update["metrics"][name]
+        assert entry["rows"] == 1
+        assert (tmp_path / "r" / f"{name}.prof").exists()
+        assert entry["profile"] == str(tmp_path / "r" / f"{name}.prof")
+    assert len(results) == 4
+
+
+def test_profiling_is_off_without_profile_dir(tmp_path):
+    update = metrics.instrument("n", _busy)({"options": {}})
+    assert update["done"] and "profile" not in update["metrics"]["n"]
+
+
+def test_node_runs_unprofiled_when_another_profiler_is_active(tmp_path, monkeypatch):
+    def refuse(self):
+        raise ValueError("Another profiling tool is already active")
+
+    monkeypatch.setattr(metrics.cProfile.Profile, "enable", refuse)
+    update = metrics.instrument("n", _busy)({"options": {"profile_dir": str(tmp_path)}})
+    assert update["done"] and "profile" not in update["metrics"]["n"]
+    assert not (tmp_path / "run").exists()
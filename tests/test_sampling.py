@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from conftest import SAMPLES_DIR
+from datamodeler import langgraph_integration as lg
+from datamodeler import sampling
+from datamodeler.sampling import SampleInfo
+
+
+def test_estimate_distinct_edge_cases():
+    # a complete sample is exact
+    assert sampling.estimate_distinct(40, 10, 100, 100) == 40
+    # all-distinct sample: every value is a singleton, so the estimate is the row count
+    assert sampling.estimate_distinct(100, 100, 100, 10_000) == 10_000
+    # no singletons: the values seen are all there is
+    assert sampling.estimate_distinct(5, 0, 100, 10_000) == 5
+    assert sampling.estimate_distinct(0, 0, 0, 10_000) == 0
+
+
+def test_estimate_distinct_is_close_on_a_uniform_sample():
+    rng = np.random.default_rng(0)
+    population = rng.integers(0, 5_000, size=200_000)
+    sample = rng.choice(population, size=20_000, replace=False)
+    counts = pd.Series(sample).value_counts()
+    estimate = sampling.estimate_distinct(len(counts), int((counts == 1).sum()), len(sample), len(population))
+    truth = len(np.unique(population))
+    assert abs(estimate - truth) / truth < 0.05
+
+
+def test_profile_sample_scales_length_histogram():
+    df = pd.DataFrame({"s": ["a", "bb", "ccc", None] * 250})
+    col_stats, sample, info = sampling.profile_sample("t", df, rows=100)
+    st = col_stats["s"]
+    assert not info.complete and st.rows == 1000
+    assert sum(st.length_hist.values()) == st.non_null
+    assert sampling._scale_histogram({1: 1, 3: 1, 7: 1}, 10) in ({1: 4, 3: 3, 7: 3}, {1: 3, 3: 4, 7: 3},
+                                                                  {1: 3, 3: 3, 7: 4})
+
+
+def test_pk_confidence():
+    sample = pd.DataFrame({"id": range(100), "dup": [1, 1] + list(range(2, 100)),
+                           "gap": [None] + list(range(99))})
+    full = SampleInfo(100, 100, True, "full")
+    part = SampleInfo(100, 1_000_000, True, "rows")
+    assert sampling.pk_confidence(sample, "id", full) == 1.0
+    assert sampling.pk_confidence(sample, "dup", part) == 0.0
+    assert sampling.pk_confidence(sample, "gap", part) == 0.0
+    assert sampling.pk_confidence(sample, "missing", part) == 0.0
+    low = sampling.pk_confidence(sample, "id", part)
+    high = sampling.pk_confidence(sample, "id", SampleInfo(100_000, 1_000_000, True, "rows"))
+    assert 0.0 < low < high < 1.0
+    # a looser tolerance (more duplicated rows) would more surely have shown up
+    assert sampling.pk_confidence(sample, "id", part, tolerance=0.01) > low
+
+
+def test_confirm_primary_keys_drops_keys_that_fail_on_full_data():
+    tables = {"a": pd.DataFrame({"id": [1, 2, 3]}), "b": pd.DataFrame({"id": [1, 1, 2]})}
+    confidence = {"a": {"columns": ["id"], "confidence": 0.5}, "b": {"columns": ["id"], "confidence": 0.5}}
+    assert sampling.confirm_primary_keys(tables, {"a": "id", "b": "id"}, confidence) == {"a": "id"}
+    assert confidence["a"]["confirmed"] and not confidence["b"]["confirmed"]
+
+
+def test_confirm_foreign_keys_checks_containment_and_parent_uniqueness():
+    tables = {
+        "parent": pd.DataFrame({"id": [1, 2, 3, 4]}),
+        "lines": pd.DataFrame({"parent_id": [1, 1, 2, 3]}),
+        "child": pd.DataFrame({"parent_id": [1, 2, 2, 9], "other": [7, 8, 9, 10]}),
+    }
+    fk = {"child_table": "child", "child_col": "parent_id", "parent_table": "parent", "parent_col": "id",
+          "match_ratio": 1.0, "confidence": 0.9}
+    bad_ratio = dict(fk, child_col="other")
+    not_unique = dict(fk, child_table="parent", child_col="id", parent_table="lines", parent_col="parent_id")
+    confirmed = sampling.confirm_foreign_keys(tables, [fk, bad_ratio, not_unique])
+    assert confirmed == [dict(fk, match_ratio=2 / 3, confidence=1.0, confirmed=True)]
+
+
+def _fk_set(result):
+    return {(fk["child_table"], fk["child_col"], fk["parent_table"], fk["parent_col"]) for fk in result["fks"]}
+
+
+def test_confirmed_sample_fks_match_exact_mode(tmp_path):
+    exact = lg.run_datamodel_pipeline(SAMPLES_DIR, str(tmp_path / "exact"))
+    fast = lg.run_datamodel_pipeline(SAMPLES_DIR, str(tmp_path / "fast"), sample_rows=3, confirm_keys=True)
+    assert not fast["error"]
+    assert all(fk["confirmed"] for fk in fast["fks"])
+    assert _fk_set(fast) == _fk_set(exact)
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from datamodeler import sketches
+
+
+def _hashes(start, stop):
+    return sketches.hash_values([str(i) for i in range(start, stop)])
+
+
+def test_hashes_are_stable_and_match_string_forms():
+    a = sketches.hash_values(["1", "2", "x"])
+    assert a.dtype == np.uint64
+    assert (a == sketches.hash_values(["1", "2", "x"])).all()
+    chunks = list(sketches.iter_hash_chunks(pd.Series(["1", None, "2"], dtype=object), chunk_rows=2))
+    assert (np.concatenate(chunks) == sketches.hash_values(["1", "2"])).all()
+
+
+def test_kmv_is_exact_below_k():
+    kmv = sketches.KMVSketch(k=256)
+    kmv.update(_hashes(0, 200))
+    kmv.update(_hashes(100, 200))
+    assert kmv.exact and kmv.cardinality() == 200 and kmv.relative_error() == 0.0
+
+
+def test_kmv_estimate_within_error_bound():
+    n = 200_000
+    kmv = sketches.KMVSketch(k=1024)
+    for start in range(0, n, 50_000):
+        kmv.update(_hashes(start, start + 50_000))
+    assert not kmv.exact
+    assert abs(kmv.cardinality() - n) / n < 4 * kmv.relative_error()
+
+
+def test_kmv_merge_equals_single_pass():
+    whole, left, right = (sketches.KMVSketch(k=512) for _ in range(3))
+    whole.update(_hashes(0, 30_000))
+    left.update(_hashes(0, 20_000))
+    right.update(_hashes(10_000, 30_000))
+    merged = left.merge(right)
+    assert (merged.hashes == whole.hashes).all()
+    assert merged.cardinality() == whole.cardinality()
+
+
+def test_hll_estimate_within_error_bound():
+    for n in (100, 5_000, 200_000):
+        hll = sketches.HyperLogLog(precision=12)
+        hll.update(_hashes(0, n))
+        assert abs(hll.cardinality() - n) / n < 4 * hll.relative_error()
+
+
+def test_hll_merge_equals_single_pass():
+    whole, left, right = (sketches.HyperLogLog(precision=10) for _ in range(3))
+    whole.update(_hashes(0, 30_000))
+    left.update(_hashes(0, 20_000))
+    right.update(_hashes(10_000, 30_000))
+    assert (left.merge(right).registers == whole.registers).all()
+
+
+def test_hll_rejects_mismatched_precision():
+    try:
+        sketches.HyperLogLog(10).merge(sketches.HyperLogLog(12))
+    except ValueError:
+        pass
+    else:  # pragma: no cover
+        raise AssertionError("expected ValueError")
+
+
+def test_bloom_has_no_false_negatives_and_bounded_false_positives():
+    bloom = sketches.BloomFilter(num_bits=1 << 16, num_hashes=4)
+    bloom.add(_hashes(0, 5_000))
+    assert bloom.contains(_hashes(0, 5_000)).all()
+    fpr = bloom.false_positive_rate()
+    assert 0 < fpr < 0.05
+    observed = bloom.contains(_hashes(100_000, 120_000)).mean()
+    assert observed < 2 * fpr + 0.005
+
+
+def test_containment_estimate_brackets_truth():
+    parent = sketches.BloomFilter(num_bits=1 << 20)
+    parent.add(_hashes(0, 50_000))
+    child = sketches.KMVSketch(k=1024)
+    child.update(_hashes(25_000, 75_000))  # half of the child values are in the parent
+    estimate, bound = sketches.estimate_containment(child, parent)
+    assert abs(estimate - 0.5) <= bound
+    assert sketches.estimate_containment(sketches.KMVSketch(), parent) == (0.0, 0.0)
+
+
+def test_approx_fks_match_exact():
+    from datamodeler import core
+
+    rng = np.random.default_rng(0)
+    tables = {
+        "customers": pd.DataFrame({"customer_id": np.arange(20_000), "zip": rng.integers(10_000, 99_999, 20_000)}),
+        "orders": pd.DataFrame({"order_id": np.arange(100_000, 150_000),
+                                "customer_id": rng.integers(0, 20_000, 50_000),
+                                # about 65% of these values are customer ids
+                                "coupon": rng.integers(7_000, 27_000, 50_000),
+                                "batch": rng.integers(15_000, 40_000, 50_000)}),
+    }
+    exact = {(fk["child_col"], fk["parent_col"]): fk for fk in core.detect_foreign_keys(tables)}
+    approx = {(fk["child_col"], fk["parent_col"]): fk for fk in core.detect_foreign_keys(tables, mode="approx")}
+    assert set(exact) == set(approx) == {("customer_id", "customer_id"), ("coupon", "customer_id")}
+    # the bound is a ~95% interval; hashing is deterministic, so this draw is fixed
+    for key, fk in approx.items():
+        assert abs(fk["estimated_ratio"] - exact[key]["match_ratio"]) <= fk["error_bound"] + 1e-9
+
+    verified = core.detect_foreign_keys(tables, mode="approx", verify_top=1)
+    assert all(fk["verified"] for fk in verified)
+    assert {(fk["child_col"], fk["match_ratio"]) for fk in verified} == \
+        {(key[0], fk["match_ratio"]) for key, fk in exact.items()}
+
+
+def test_bloom_false_positive_rate_is_cached_until_the_next_add():
+    bloom = sketches.BloomFilter(num_bits=1 << 12)
+    bloom.add(_hashes(0, 100))
+    first = bloom.false_positive_rate()
+    assert bloom._fpr == first
+    bloom.add(_hashes(100, 1_000))
+    assert bloom._fpr is None and bloom.false_positive_rate() > first
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from conftest import SAMPLES_DIR
+from datamodeler import core
+from datamodeler import sqlkeys
+
+
+def _fk_set(fks):
+    return {(fk["child_table"], fk["child_col"], fk["parent_table"], fk["parent_col"], round(fk["match_ratio"], 9))
+            for fk in fks}
+
+
+def _tables():
+    rng = np.random.default_rng(0)
+    return {
+        # `a_b`.`c` and `a`.`b_c` used to share one index name
+        "a_b": pd.DataFrame({"c": np.arange(500), "x": rng.integers(0, 50, 500)}),
+        "a": pd.DataFrame({"b_c": np.arange(1_000, 1_300), "y": rng.integers(0, 5, 300)}),
+        "child": pd.DataFrame({"c_ref": rng.integers(0, 500, 2_000), "bc_ref": rng.integers(1_000, 1_300, 2_000),
+                               "mixed": rng.integers(0, 800, 2_000), "note": [None, "x"] * 1_000}),
+        "lines": pd.DataFrame({"order": np.repeat(np.arange(100), 3), "line": np.tile([1, 2, 3], 100)}),
+    }
+
+
+def test_every_referenced_column_gets_its_own_index(tmp_path):
+    tables = _tables()
+    store = sqlkeys.KeyStore(str(tmp_path / "keys.sqlite"))
+    try:
+        store.load_all(tables)
+        core.detect_foreign_keys(tables, mode="sql", store=store)
+        conn = store._conn()
+        indexed = conn.execute("SELECT tbl, col FROM _columns WHERE indexed = 1").fetchall()
+        assert ("a_b", "c") in indexed and ("a", "b_c") in indexed
+        index_columns = set()
+        for name, tbl in conn.execute("SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'"):
+            for row in conn.execute(f"PRAGMA index_info({sqlkeys._q(name)})"):
+                index_columns.add((tbl, row[2]))
+        assert set(indexed) <= index_columns
+    finally:
+        store.close()
+
+
+def test_sql_mode_matches_exact_mode(tmp_path):
+    tables = _tables()
+    exact = core.detect_foreign_keys(tables)
+    sql = core.detect_foreign_keys(tables, mode="sql")
+    assert exact and _fk_set(sql) == _fk_set(exact)
+
+    store = sqlkeys.KeyStore(str(tmp_path / "keys.sqlite"))
+    try:
+        store.load_all(tables)
+        assert core.detect_primary_keys(tables, store=store) == core.detect_primary_keys(tables)
+    finally:
+        store.close()
+
+
+def test_sql_mode_matches_exact_mode_on_samples(tmp_path):
+    tables = core.load_all_inputs(SAMPLES_DIR)
+    assert _fk_set(core.detect_foreign_keys(tables, mode="sql")) == _fk_set(core.detect_foreign_keys(tables))
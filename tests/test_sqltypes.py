@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datamodeler import sqltypes
+
+
+def _type(values, dtype=None):
+    return sqltypes.sql_type(sqltypes.profile_values(pd.Series(values, dtype=dtype)))
+
+
+@pytest.mark.parametrize("values, dtype, expected", [
+    ([1, 2, 3], None, "INTEGER"),
+    ([1.0, None, 3.0], None, "INTEGER"),
+    ([-2 ** 31, 2 ** 31 - 1], "int64", "INTEGER"),
+    ([0, 2 ** 31], "int64", "BIGINT"),
+    (["12", "-7", "+3"], object, "INTEGER"),
+    (["3000000000"], object, "BIGINT"),
+    (["1.5", "-22.25", "3"], object, "DECIMAL(4,2)"),
+    (["1" * 19], object, "DECIMAL(19,0)"),
+    (["0." + "1" * 40], object, "FLOAT"),
+    ([1.5, 2.25], None, "FLOAT"),
+    ([1.0, np.inf], None, "FLOAT"),
+    ([True, False], None, "BOOLEAN"),
+    (["yes", "No", "Y"], object, "BOOLEAN"),
+    (["2024-01-31", "1999-12-01"], object, "DATE"),
+    (["2024-01-31", "2024-02-01T10:30:00Z"], object, "TIMESTAMP"),
+    (["2024-01-31 10:30:00+02:00"], object, "TIMESTAMP"),
+    (pd.to_datetime(["2024-01-01", "2024-01-02"]), None, "DATE"),
+    (pd.to_datetime(["2024-01-01 10:00"]), None, "TIMESTAMP"),
+    (["2024-13-45"], object, None),
+    (["007", "12"], object, None),
+    (["a", "b"], object, None),
+    ([None, None], object, None),
+])
+def test_sql_type(values, dtype, expected):
+    assert _type(values, dtype) == expected
+
+
+def test_categorical_columns_profile_their_used_categories():
+    s = pd.Series(pd.Categorical(["1", "2"], categories=["1", "2", "x"]))
+    assert sqltypes.sql_type(sqltypes.profile_values(s)) == "INTEGER"
+
+
+def test_one_value_that_does_not_fit_rules_the_type_out():
+    values = ["1"] * (sqltypes.SAMPLE_SIZE + 10) + ["1.25"]
+    assert _type(values, object) == "DECIMAL(3,2)"
+
+
+@pytest.mark.parametrize("chunks", [
+    [["1", "2"], ["3000000000"]],
+    [["1", "2"], ["1.5"], ["-10.125"]],
+    [["yes"], ["no"]],
+    [["2024-01-01"], ["2024-01-01T00:00:00"]],
+    [["1"], ["x"]],
+    [["1"], []],
+])
+def test_merged_chunks_match_whole_column(chunks):
+    merged = sqltypes.TypeProfile()
+    for chunk in chunks:
+        merged = merged.merge(sqltypes.profile_values(pd.Series(chunk, dtype=object)))
+    whole = sqltypes.profile_values(pd.Series([v for c in chunks for v in c], dtype=object))
+    assert merged.values == whole.values
+    assert sqltypes.sql_type(merged) == sqltypes.sql_type(whole)
@@ -0,0 +1,59 @@
+import json
+
+import pandas as pd
+import pytest
+
+from datamodeler import star
+
+
+def _write_jsonl(path, records):
+    path.write_text("\n".join(json.dumps(r) for r in records), encoding="utf-8")
+    return str(path)
+
+
+def _records(n=20):
+    return [{"id": i,
+             "cust": None if i % 2 == 0 else {"name": f"c{i}", "tier": i % 3},
+             "tags": None if i % 3 == 0 else ["a", "b"]} for i in range(n)]
+
+
+@pytest.mark.parametrize("chunk_rows", [100, 3, 1])
+def test_nullable_links_keep_exact_keys(tmp_path, chunk_rows):
+    tables = star.json_to_star(_write_jsonl(tmp_path / "d.jsonl", _records()), chunk_rows=chunk_rows)
+    fact = tables["fact"]
+    assert fact["cust_key"].dtype == "Int64"
+    assert fact["cust_key"].notna().sum() == 10
+    assert fact["cust_key"].dropna().isin(tables["cust"]["cust_key"]).all()
+    # null nested values leave no scalar column behind
+    assert "cust" not in fact.columns and "tags" not in fact.columns
+
+
+def test_arrays_become_bridges(tmp_path):
+    tables = star.json_to_star(_write_jsonl(tmp_path / "d.jsonl", _records(6)))
+    bridge = tables["tags_bridge"]
+    # records 1, 2, 4 and 5 have two tags each
+    assert len(bridge) == 8
+    assert set(bridge["fact_id"]) == {2, 3, 5, 6}
+    assert sorted(tables["tags"]["value"]) == ["a", "b"]
+    assert bridge["tags_key"].isin(tables["tags"]["tags_key"]).all()
+
+
+def test_identical_sub_objects_share_a_key(tmp_path):
+    records = [{"id": i, "addr": {"city": "x", "geo": {"lat": 1, "lon": 2}}} for i in range(5)]
+    tables = star.json_to_star(_write_jsonl(tmp_path / "d.jsonl", records))
+    assert len(tables["addr"]) == 1 and len(tables["addr_geo"]) == 1
+    assert tables["fact"]["addr_key"].nunique() == 1
+
+
+def test_max_depth_serializes_deeper_values(tmp_path):
+    records = [{"id": 1, "a": {"b": {"c": 1}}}]
+    tables = star.json_to_star(_write_jsonl(tmp_path / "d.jsonl", records), max_depth=1)
+    assert json.loads(tables["a"]["b"].iloc[0]) == {"c": 1}
+    assert "a_b" not in tables
+
+
+def test_json_array_input(tmp_path):
+    path = tmp_path / "d.json"
+    path.write_text(json.dumps([{"id": 1}, {"id": 2}]), encoding="utf-8")
+    fact = star.json_to_star(str(path))["fact"]
+    pd.testing.assert_series_equal(fact["id"], pd.Series([1, 2], name="id"))
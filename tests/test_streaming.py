@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from datamodeler import langgraph_integration as lg
+from datamodeler import streaming
+
+
+def _drifting_orders(root, ext=".csv"):
+    """`orders` split in two parts; the second part adds a `note` column."""
+    parts = root / "orders"
+    parts.mkdir(parents=True)
+    first = pd.DataFrame({"order_id": [1, 2], "line": [1, 1], "cust_id": [1, 2]})
+    second = pd.DataFrame({"order_id": [3, 4], "line": [1, 1], "cust_id": [1, 3], "note": ["hi", None]})
+    for i, df in enumerate((first, second), 1):
+        path = parts / f"part-000{i}{ext}"
+        if ext == ".csv":
+            df.to_csv(path, index=False)
+        else:
+            df.to_parquet(path, index=False)
+    pd.DataFrame({"customer_id": [1, 2, 3]}).to_csv(root / "customers.csv", index=False)
+    return parts
+
+
+@pytest.mark.parametrize("ext", [".csv", ".parquet"])
+def test_parts_with_different_columns(tmp_path, ext):
+    handle = streaming.TableHandle(str(_drifting_orders(tmp_path, ext)), chunk_rows=1)
+    assert handle.columns == ["order_id", "line", "cust_id", "note"]
+
+    chunks = list(handle.iter_chunks(columns=["order_id", "note"]))
+    frame = pd.concat(chunks, ignore_index=True)
+    assert frame["order_id"].tolist() == [1, 2, 3, 4]
+    assert frame["note"].isna().tolist() == [True, True, False, True]
+    only_new = pd.concat(handle.iter_chunks(columns=["note"]), ignore_index=True)
+    assert len(only_new) == 4
+
+    stats = streaming.profile_handle(handle)
+    assert stats["note"].rows == 4 and stats["note"].nnulls == 3
+    assert stats["order_id"].nunique == 4
+
+
+def test_streaming_run_over_drifting_parts(tmp_path):
+    _drifting_orders(tmp_path / "in")
+    exact = lg.run_datamodel_pipeline(str(tmp_path / "in"), str(tmp_path / "exact"))
+    lazy = lg.run_datamodel_pipeline(str(tmp_path / "in"), str(tmp_path / "lazy"), streaming=True, chunk_rows=1)
+    assert not exact["error"] and not lazy["error"]
+    assert lazy["pks"] == exact["pks"]
+    assert {(fk["child_col"], fk["parent_table"]) for fk in lazy["fks"]} >= {("cust_id", "customers")}
+
+
+def test_underscore_files_are_skipped_only_inside_partitions(tmp_path):
+    from datamodeler import core
+
+    pd.DataFrame({"a": [1]}).to_csv(tmp_path / "t.csv", index=False)
+    pd.DataFrame({"a": [1]}).to_csv(tmp_path / "_staging.csv", index=False)
+    orders = _drifting_orders(tmp_path)
+    (orders / "_SUCCESS").write_text("")
+    pd.DataFrame({"a": [1]}).to_csv(orders / "_tmp.csv", index=False)
+    (tmp_path / "_delta_log").mkdir()
+    pd.DataFrame({"a": [1]}).to_csv(tmp_path / "_delta_log" / "x.csv", index=False)
+
+    tables = ["_staging", "customers", "orders", "t"]
+    assert sorted(core.input_files(str(tmp_path))) == tables
+    assert sorted(core.load_all_inputs(str(tmp_path))) == tables
+    assert [p.rsplit("/", 1)[1] for p in streaming.part_files(str(orders))] == ["part-0001.csv", "part-0002.csv"]